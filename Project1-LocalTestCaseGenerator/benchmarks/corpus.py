@@ -0,0 +1,133 @@
+"""
+Synthetic inputs for the pipeline benchmarks.
+
+Everything is generated deterministically from a size name, so two runs
+(or two versions of the package) time exactly the same work.
+"""
+
+import json
+import random
+
+# Top-level functions per module size; every fifth unit is a class
+MODULE_SIZES = {
+    "small": 5,
+    "medium": 50,
+    "large": 500,
+    "xlarge": 2000
+}
+
+# Manual test cases per synthetic LLM response
+RESPONSE_SIZES = {
+    "small": 2,
+    "medium": 10,
+    "large": 100
+}
+
+_SEED = 1234
+
+
+def _function(index: int, rng: random.Random) -> str:
+    args = ", ".join(f"arg{n}" for n in range(rng.randint(1, 4)))
+    lines = [
+        f"def function_{index}({args}):",
+        f'    """Compute value {index} from its arguments.',
+        "",
+        "    Longer explanation that a real module would carry in its docstring,",
+        "    describing parameters, return values and edge cases.",
+        '    """',
+        "    # Guard against missing input",
+        "    if arg0 is None:",
+        "        raise ValueError('arg0 is required')",
+        "    total = 0",
+        f"    for item in range({rng.randint(2, 20)}):",
+        "        total += item * arg0",
+    ]
+    if index:
+        # Reference an earlier helper so call graphs have edges
+        lines.append(f"    total += function_{rng.randrange(index)}(arg0)")
+    lines.append("    return total")
+    return "\n".join(lines)
+
+
+def _class(index: int, rng: random.Random) -> str:
+    methods = []
+    for n in range(rng.randint(2, 5)):
+        methods.append(
+            f"    def method_{n}(self, value):\n"
+            f'        """Method {n} of Model{index}."""\n'
+            f"        self.history.append(value)\n"
+            f"        return value * {n + 1}"
+        )
+    return (
+        f"class Model{index}:\n"
+        f'    """Synthetic model class {index}."""\n\n'
+        "    def __init__(self):\n"
+        "        self.history = []\n\n"
+        + "\n\n".join(methods)
+    )
+
+
+def make_module(size: str) -> str:
+    """Python source with MODULE_SIZES[size] top-level units."""
+    rng = random.Random(f"{_SEED}-module-{size}")
+    parts = [
+        f'"""Synthetic {size} module for benchmarks."""',
+        "import os\nimport sys\nfrom typing import List, Optional",
+        "LIMIT = 100"
+    ]
+    for index in range(MODULE_SIZES[size]):
+        if index % 5 == 4:
+            parts.append(_class(index, rng))
+        else:
+            parts.append(_function(index, rng))
+    return "\n\n\n".join(parts) + "\n"
+
+
+def make_response(size: str, style: str = "json") -> str:
+    """
+    A model answer with RESPONSE_SIZES[size] manual test cases.
+
+    Styles mirror what models actually return: 'json' (bare object),
+    'fenced' (```json block), 'prose' (chatter around the object) and
+    'python' (no JSON, just a ```python block).
+    """
+    count = RESPONSE_SIZES[size]
+    cases = [
+        {
+            "id": f"TC_{n + 1:03d}",
+            "title": f"Scenario {n + 1}",
+            "type": "POSITIVE" if n % 2 == 0 else "NEGATIVE",
+            "steps": [f"Call function_{n}(1)", "Check the result"],
+            "expected": f"Returns {n}"
+        }
+        for n in range(count)
+    ]
+    pytest_code = "import pytest\n\n" + "\n\n".join(
+        f"def test_function_{n}():\n    assert function_{n}(1) == {n}"
+        for n in range(count)
+    )
+    body = json.dumps({"manual_test_cases": cases, "pytest_code": pytest_code}, indent=2)
+    if style == "json":
+        return body
+    if style == "fenced":
+        return f"```json\n{body}\n```"
+    if style == "prose":
+        return f"Here are the test cases you asked for:\n\n{body}\n\nLet me know if you need more."
+    if style == "python":
+        return f"Sure! Here are the tests:\n\n```python\n{pytest_code}\n```\n"
+    raise ValueError(f"Unknown response style: {style}")
+
+
+RESPONSE_STYLES = ("json", "fenced", "prose", "python")
+
+# Inputs for the classifiers, one per routing outcome
+CLASSIFIER_INPUTS = {
+    "code": "def add(a, b):\n    return a + b\n",
+    "url": "https://example.com/login",
+    "domain": "example.org",
+    "feature": "As a user I want to reset my password by email so that I can log in again",
+    "feature_if": "Login should fail if the password is wrong # important",
+    "dotted_code": "result = requests.get(url).json()",
+    "javascript": "function add(a, b) {\n  return a + b;\n}\n",
+    "long_text": " ".join(["The checkout page must validate card numbers and expiry dates."] * 50)
+}
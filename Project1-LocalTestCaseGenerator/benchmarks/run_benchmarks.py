@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the pipeline stages that do not call the LLM.
+
+Times parsing, prompt building, response parsing, input routing and the
+quick-mode generators over the synthetic corpus in benchmarks/corpus.py
+and writes the results as JSON, so two versions can be compared.
+
+Usage:
+    python benchmarks/run_benchmarks.py -o results.json
+    python benchmarks/run_benchmarks.py --filter parse --compare baseline.json
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from blast_testgen import web_app
+from blast_testgen.classifier import InputClassifier
+from blast_testgen.code_parser import CodeAnalyzer, ParsedModule
+from blast_testgen.orchestrator import TestGenerator
+from blast_testgen.prompts import build_test_prompt
+from blast_testgen.response_parser import StreamingResponseParser
+
+from corpus import (
+    MODULE_SIZES, RESPONSE_SIZES, RESPONSE_STYLES, CLASSIFIER_INPUTS,
+    make_module, make_response
+)
+
+# Each timed sample runs the case in a loop for at least this long
+MIN_SAMPLE_SECONDS = 0.05
+DEFAULT_REPEAT = 5
+
+# Characters per streamed chunk, roughly one Ollama token
+STREAM_CHUNK_CHARS = 4
+
+
+def parse_stream(chunks):
+    """Feed a response to the streaming parser chunk by chunk."""
+    parser = StreamingResponseParser()
+    for chunk in chunks:
+        parser.feed(chunk)
+    return parser.finish()
+
+
+def build_cases(sizes):
+    """
+    Return (name, params, callable) for every benchmark.
+
+    Inputs are built up front so only the stage itself is timed.
+    """
+    cases = []
+    generator = TestGenerator.__new__(TestGenerator)
+    # Not classify_input, whose memo would turn every loop into a cache hit
+    classifier = InputClassifier()
+
+    for size in sizes:
+        code = make_module(size)
+        module = ParsedModule(code)
+        target = module.functions[len(module.functions) // 2]["name"]
+        params = {"size": size, "chars": len(code)}
+
+        # ParsedModule directly, so the memo in CodeAnalyzer.parse is bypassed
+        cases.append(("parse", params, lambda code=code: ParsedModule(code)))
+        cases.append(("parse_memoised", params, lambda code=code: CodeAnalyzer.parse(code)))
+        cases.append(("extract_functions", params,
+                      lambda m=module: CodeAnalyzer.extract_functions(m)))
+        cases.append(("extract_units", params,
+                      lambda m=module: CodeAnalyzer.extract_units(m)))
+        cases.append(("get_function_code", params,
+                      lambda m=module, t=target: m.get_function_code(t)))
+        cases.append(("unit_fingerprints", params, lambda m=module: m.unit_fingerprints()))
+        cases.append(("build_test_prompt", params, lambda code=code: build_test_prompt(code)))
+        cases.append(("build_test_prompt_target", params,
+                      lambda code=code, t=target: build_test_prompt(code, t)))
+
+    for size in RESPONSE_SIZES:
+        for style in RESPONSE_STYLES:
+            text = make_response(size, style)
+            params = {"size": size, "style": style, "chars": len(text)}
+            cases.append(("parse_combined_response", params,
+                          lambda text=text: web_app.parse_combined_response(text)))
+            chunks = [text[i:i + STREAM_CHUNK_CHARS]
+                      for i in range(0, len(text), STREAM_CHUNK_CHARS)]
+            cases.append(("parse_response_stream", params,
+                          lambda chunks=chunks: parse_stream(chunks)))
+            cases.append(("extract_code", params,
+                          lambda text=text: generator._extract_code(text)))
+
+    for kind, text in CLASSIFIER_INPUTS.items():
+        params = {"input": kind, "chars": len(text)}
+        cases.append(("classify", params, lambda text=text: classifier.classify(text)))
+
+    cases.append(("feature_test_payload", {"input": "feature"},
+                  lambda: web_app.feature_test_payload(CLASSIFIER_INPUTS["feature"])))
+    cases.append(("website_test_payload", {"input": "url"},
+                  lambda: web_app.website_test_payload(CLASSIFIER_INPUTS["url"])))
+    return cases
+
+
+def time_case(func, repeat: int) -> dict:
+    """Time func, calibrating the loop count to MIN_SAMPLE_SECONDS."""
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= MIN_SAMPLE_SECONDS or loops >= 1_000_000:
+            break
+        loops *= 10 if elapsed < MIN_SAMPLE_SECONDS / 10 else 2
+
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        samples.append((time.perf_counter() - started) / loops * 1e6)
+    return {
+        "loops": loops,
+        "repeat": repeat,
+        "min_us": round(min(samples), 3),
+        "median_us": round(statistics.median(samples), 3),
+        "mean_us": round(statistics.mean(samples), 3),
+        "stdev_us": round(statistics.stdev(samples), 3) if len(samples) > 1 else 0.0
+    }
+
+
+def case_key(result: dict) -> str:
+    """Stable identifier of a benchmark across runs."""
+    params = ",".join(f"{k}={v}" for k, v in sorted(result["params"].items()) if k != "chars")
+    return f"{result['name']}[{params}]"
+
+
+def git_revision() -> str:
+    """Short commit hash of the checkout being measured."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results: list, baseline_path: str, threshold: float) -> list:
+    """
+    Print changes against a baseline; return regressed case keys.
+
+    Compares the fastest sample, which is the least affected by noise
+    from other processes.
+    """
+    baseline = {
+        case_key(r): r for r in json.loads(Path(baseline_path).read_text())["results"]
+    }
+    regressions = []
+    print(f"\n{'benchmark':<60} {'baseline':>12} {'current':>12} {'change':>8}")
+    for result in results:
+        key = case_key(result)
+        old = baseline.get(key)
+        if old is None:
+            print(f"{key:<60} {'-':>12} {result['min_us']:>12.1f} {'new':>8}")
+            continue
+        change = result["min_us"] / old["min_us"] - 1 if old["min_us"] else 0.0
+        flag = ""
+        if change > threshold:
+            regressions.append(key)
+            flag = "  <- slower"
+        print(f"{key:<60} {old['min_us']:>12.1f} {result['min_us']:>12.1f} "
+              f"{change:>+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the non-LLM pipeline stages")
+    parser.add_argument("-o", "--output", help="Write results as JSON to this path")
+    parser.add_argument("--filter", help="Only run benchmarks whose name contains this")
+    parser.add_argument(
+        "--sizes", default=",".join(MODULE_SIZES),
+        help=f"Module sizes to run (default: {','.join(MODULE_SIZES)})"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=DEFAULT_REPEAT,
+        help=f"Timed samples per benchmark (default: {DEFAULT_REPEAT})"
+    )
+    parser.add_argument("--compare", help="Baseline JSON from an earlier run")
+    parser.add_argument(
+        "--threshold", type=float, default=0.10,
+        help="With --compare, exit 1 when a benchmark is this much slower (default: 0.10)"
+    )
+    args = parser.parse_args()
+
+    sizes = [s.strip() for s in args.sizes.split(",") if s.strip()]
+    unknown = [s for s in sizes if s not in MODULE_SIZES]
+    if unknown:
+        parser.error(f"unknown size(s): {', '.join(unknown)}")
+
+    results = []
+    for name, params, func in build_cases(sizes):
+        if args.filter and args.filter not in name:
+            continue
+        timing = time_case(func, args.repeat)
+        result = {"name": name, "params": params, **timing}
+        results.append(result)
+        print(f"{case_key(result):<60} {timing['median_us']:>12.1f} us")
+
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "min_sample_seconds": MIN_SAMPLE_SECONDS
+        },
+        "results": results
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        print(f"\nResults: {args.output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) slower than {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
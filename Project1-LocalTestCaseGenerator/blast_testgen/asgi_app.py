@@ -0,0 +1,623 @@
+"""ASGI serving path for the Testcase Generator.
+
+Serves the same health, generate and static routes as web_app.py, but
+waits on Ollama through AsyncOllamaClient, so open requests cost
+coroutines instead of server threads. Run with run_web.py --asgi
+(requires the optional 'httpx' and 'uvicorn' packages).
+"""
+
+import asyncio
+import json
+import mimetypes
+import os
+from urllib.parse import parse_qs
+
+from . import web_app
+from .async_ollama_client import AsyncOllamaClient
+from .cache import GenerationCache
+from .classifier import classify_input, URL, TEXT
+from .jobs import AsyncJobManager
+from .metrics import response_timings
+from .response_parser import StreamingResponseParser, parse_json_answer, parse_model_response
+from .structured import empty_answer, invalid_fields, repair_answer_async
+from .validator import TestValidator
+from .ollama_client import keep_alive_seconds, parse_keep_alive
+from .ollama_pool import parse_hosts
+from .prompts import build_test_prompt, FIELD_SCHEMAS
+from .scheduler import AsyncRequestScheduler, QueueFullError
+
+STATIC_DIR = os.path.join(os.path.dirname(__file__), 'static')
+
+# Timings land in the same registry web_app's /api/metrics reads
+client = AsyncOllamaClient(cache=GenerationCache(), metrics=web_app.metrics)
+scheduler = AsyncRequestScheduler()
+jobs = AsyncJobManager()
+
+_CORS_HEADERS = [
+    (b'access-control-allow-origin', b'*'),
+    (b'access-control-allow-headers', b'Content-Type'),
+    (b'access-control-allow-methods', b'GET, POST, OPTIONS'),
+]
+
+_template_html = None
+
+# Set by run_asgi_app; the lifespan handler warms the model when True
+WARM_UP = True
+
+
+async def _send_bytes(send, status: int, body: bytes, content_type: str, headers=()):
+    """Send a complete HTTP response."""
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', content_type.encode()),
+            (b'content-length', str(len(body)).encode()),
+            *_CORS_HEADERS,
+            *headers
+        ]
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def _send_json(send, status: int, data: dict, headers=()):
+    """Send a JSON response."""
+    await _send_bytes(send, status, json.dumps(data).encode(), 'application/json', headers)
+
+
+async def _send_file(send, root: str, path: str):
+    """Send a file from root, or 404 if it is missing or outside root."""
+    root = os.path.realpath(root)
+    file_path = os.path.realpath(os.path.join(root, path))
+    if not file_path.startswith(root + os.sep) or not os.path.isfile(file_path):
+        await _send_json(send, 404, {'error': 'Not found'})
+        return
+    content_type = mimetypes.guess_type(file_path)[0] or 'application/octet-stream'
+    with open(file_path, 'rb') as f:
+        await _send_bytes(send, 200, f.read(), content_type)
+
+
+async def _read_body(receive) -> bytes:
+    """Read the full request body."""
+    body = b''
+    more = True
+    while more:
+        message = await receive()
+        body += message.get('body', b'')
+        more = message.get('more_body', False)
+    return body
+
+
+async def _wait_for_disconnect(receive) -> None:
+    """Return once the client has gone (call after the body was read)."""
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def _unless_disconnected(receive, awaitable):
+    """
+    Await awaitable, cancelling it if the client disconnects first.
+
+    Cancelling closes the connection to Ollama, so it stops generating
+    an answer nobody will read; the scheduler ticket is released on the
+    way out.
+
+    Returns:
+        Tuple of (finished, result); finished is False if the client left
+    """
+    task = asyncio.ensure_future(awaitable)
+    watcher = asyncio.ensure_future(_wait_for_disconnect(receive))
+    try:
+        await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
+    finally:
+        watcher.cancel()
+    if not task.done():
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        return False, None
+    return True, task.result()
+
+
+def _render_template_html() -> bytes:
+    """Render chat.html once through Flask's template engine."""
+    global _template_html
+    if _template_html is None:
+        with web_app.app.test_request_context('/'):
+            _template_html = web_app.render_template('chat.html').encode()
+    return _template_html
+
+
+async def _read_input(receive, send):
+    """
+    Validate the JSON body of a generate request.
+
+    Returns:
+        The user input, or None after an error response was sent
+    """
+    try:
+        data = json.loads(await _read_body(receive) or b'null')
+    except ValueError:
+        data = None
+
+    if not isinstance(data, dict) or 'code' not in data:
+        await _send_json(send, 400, {'error': 'No input provided'})
+        return None
+
+    user_input = data['code'].strip()
+
+    if len(user_input) < 2:
+        await _send_json(send, 400, {
+            'error': 'Input too short',
+            'hint': 'Please provide at least 2 characters'
+        })
+        return None
+
+    if not await client.is_available():
+        await _send_json(send, 503, {
+            'error': 'Ollama not available. Please start Ollama server.',
+            'hint': 'Run: ollama serve'
+        })
+        return None
+
+    return user_input
+
+
+async def _generate_payload(user_input: str, route: str = '/api/generate') -> dict:
+    """
+    Route an input the same way web_app.generate_tests does.
+
+    Raises:
+        QueueFullError: If the scheduler cannot take another LLM request
+    """
+    kind = classify_input(user_input).kind
+    if kind == URL:
+        return web_app.website_test_payload(user_input)
+
+    if kind == TEXT:
+        return web_app.feature_test_payload(user_input)
+
+    if client.circuit_open():
+        # Ollama keeps failing: answer in quick mode instead of queueing
+        return web_app.feature_test_payload(user_input, fallback=True)
+
+    ticket = scheduler.enqueue()
+    try:
+        async for _ in scheduler.wait(ticket):
+            pass
+        prompt = build_test_prompt(user_input)
+        response = await client.generate(
+            prompt=prompt,
+            temperature=0.2,
+            num_predict=1500,
+            route=route,
+            format=web_app.output_format()
+        )
+        generated_text = response.get('response', '')
+        parsed = repaired = None
+        if web_app.structured_output:
+            answer = parse_json_answer(generated_text)
+            parsed, repaired = await _structured_answer(
+                prompt, answer, answer or parse_model_response(generated_text)
+            )
+        payload = web_app.code_test_payload(
+            user_input,
+            generated_text,
+            model=client.model,
+            timings=response_timings(response),
+            parsed=parsed,
+            repaired=repaired
+        )
+        payload['queue'] = {'position': ticket.initial_position, 'wait_ms': ticket.wait_ms}
+    except Exception:
+        return web_app.feature_test_payload(user_input, fallback=True)
+    finally:
+        await scheduler.release(ticket)
+
+    await _validate(payload, user_input)
+    return payload
+
+
+async def _structured_answer(prompt: str, answer, fallback: dict):
+    """Async counterpart of web_app.structured_answer."""
+    answer = answer or empty_answer()
+    repaired = await repair_answer_async(client, prompt, answer)
+    if len(invalid_fields(answer)) == len(FIELD_SCHEMAS):
+        return fallback, repaired
+    return answer, repaired
+
+
+async def _validate(payload: dict, user_input: str) -> None:
+    """Run web_app.attach_validation on a worker thread."""
+    if web_app.validator:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, web_app.attach_validation, payload, user_input)
+
+
+async def _send_busy(send, error: QueueFullError):
+    """429 response telling the client when to retry."""
+    await _send_json(send, 429, {
+        'error': 'Server busy. Too many generations in progress.',
+        'hint': f'Please retry in about {error.retry_after} seconds',
+        'retry_after': error.retry_after
+    }, headers=[(b'retry-after', str(error.retry_after).encode())])
+
+
+async def health_check(send):
+    """Check if Ollama is available."""
+    snapshot = await client.health()
+    await _send_json(send, 200, {
+        'status': 'healthy' if snapshot['available'] else 'ollama_unavailable',
+        'ollama_connected': snapshot['available'],
+        'model': client.model,
+        'available_models': snapshot['models'],
+        'circuit_open': client.circuit_open(),
+        'cache': client.cache.stats() if client.cache else None,
+        'scheduler': scheduler.stats(),
+        'jobs': jobs.stats()
+    })
+
+
+async def metrics_endpoint(scope, send):
+    """Ollama timings in Prometheus text format (?format=json for a summary)."""
+    query = parse_qs(scope.get('query_string', b'').decode())
+    if query.get('format', [''])[0] == 'json':
+        await _send_json(send, 200, web_app.metrics.summary())
+        return
+    await _send_bytes(
+        send, 200,
+        web_app.metrics.render_prometheus().encode(),
+        'text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
+async def generate_tests(receive, send):
+    """Generate testcases from user input; stops if the client disconnects."""
+    user_input = await _read_input(receive, send)
+    if user_input is None:
+        return
+    try:
+        finished, payload = await _unless_disconnected(receive, _generate_payload(user_input))
+    except QueueFullError as e:
+        await _send_busy(send, e)
+        return
+    if finished:
+        await _send_json(send, 200, payload)
+
+
+async def _start_event_stream(send):
+    """Send the response head of a Server-Sent Events stream."""
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [
+            (b'content-type', b'text/event-stream'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+            *_CORS_HEADERS
+        ]
+    })
+
+
+async def _send_chunk(send, text: str, more: bool = True):
+    """Send one piece of a streaming body."""
+    await send({'type': 'http.response.body', 'body': text.encode(), 'more_body': more})
+
+
+def _admit(user_input: str):
+    """
+    Enqueue a scheduler ticket when the input will reach the LLM.
+
+    Raises:
+        QueueFullError: If the scheduler cannot take another LLM request
+    """
+    if classify_input(user_input).is_code and not client.circuit_open():
+        return scheduler.enqueue()
+    return None
+
+
+async def _generation_events(user_input: str, ticket=None, route=None):
+    """Async counterpart of web_app._generation_events."""
+    if ticket is None:
+        yield 'result', await _generate_payload(user_input, route)
+        return
+
+    try:
+        async for position in scheduler.wait(ticket):
+            yield 'queued', {'position': position}
+
+        prompt = build_test_prompt(user_input)
+        parser = StreamingResponseParser()
+        timings = None
+        async for chunk in client.generate_stream(
+            prompt=prompt,
+            temperature=0.2,
+            num_predict=1500,
+            route=route,
+            format=web_app.output_format()
+        ):
+            text = chunk.get('response', '')
+            if text:
+                yield 'token', {'text': text}
+                for case in parser.feed(text):
+                    yield 'test_case', {'test_case': case}
+            if chunk.get('done'):
+                timings = response_timings(chunk)
+        parsed = parser.finish()
+        repaired = None
+        if web_app.structured_output:
+            parsed, repaired = await _structured_answer(
+                prompt, parsed if parser.structured else None, parsed
+            )
+            if 'manual_test_cases' in repaired:
+                for case in parsed['manual_test_cases']:
+                    yield 'test_case', {'test_case': case}
+        payload = web_app.code_test_payload(
+            user_input, None, model=client.model, timings=timings,
+            parsed=parsed, repaired=repaired
+        )
+        payload['queue'] = {'position': ticket.initial_position, 'wait_ms': ticket.wait_ms}
+        generated = True
+    except Exception:
+        payload = web_app.feature_test_payload(user_input, fallback=True)
+        generated = False
+    finally:
+        await scheduler.release(ticket)
+
+    if web_app.validator and generated:
+        yield 'validating', {}
+        await _validate(payload, user_input)
+
+    yield 'result', payload
+
+
+async def generate_tests_stream(receive, send):
+    """Stream testcase generation as Server-Sent Events."""
+    user_input = await _read_input(receive, send)
+    if user_input is None:
+        return
+
+    try:
+        ticket = _admit(user_input)
+    except QueueFullError as e:
+        await _send_busy(send, e)
+        return
+
+    events = _generation_events(user_input, ticket, route='/api/generate/stream')
+    try:
+        await _start_event_stream(send)
+        finished, _ = await _unless_disconnected(receive, _send_events(send, events))
+    finally:
+        # Releases the ticket if the client left mid-stream
+        await events.aclose()
+    if finished:
+        await _send_chunk(send, '', more=False)
+
+
+async def _send_events(send, events):
+    """Send each (event, data) pair as a Server-Sent Event."""
+    async for event, data in events:
+        await _send_chunk(send, web_app._sse(event, data))
+
+
+async def create_job(receive, send):
+    """Start a generation in the background and return its id immediately."""
+    user_input = await _read_input(receive, send)
+    if user_input is None:
+        return
+
+    try:
+        ticket = _admit(user_input)
+    except QueueFullError as e:
+        await _send_busy(send, e)
+        return
+
+    job = jobs.submit(_generation_events(user_input, ticket, route='/api/jobs'))
+    await _send_json(send, 202, job.to_dict(), headers=[
+        (b'location', f'/api/jobs/{job.id}'.encode())
+    ])
+
+
+async def _send_job_not_found(send):
+    await _send_json(send, 404, {
+        'error': 'Job not found',
+        'hint': 'Finished jobs expire after a while'
+    })
+
+
+async def get_job(send, job_id: str):
+    """Return a job's status, and its result once finished."""
+    job = jobs.get(job_id)
+    if job is None:
+        await _send_job_not_found(send)
+        return
+    await _send_json(send, 200, job.to_dict())
+
+
+async def cancel_job(send, job_id: str):
+    """Stop a job and the Ollama generation behind it."""
+    job = jobs.cancel(job_id)
+    if job is None:
+        await _send_job_not_found(send)
+        return
+    await _send_json(send, 200 if job.finished else 202, job.to_dict())
+
+
+async def job_events(scope, send, job_id: str):
+    """Stream a job's events, resuming after ?after=<n> or Last-Event-ID."""
+    job = jobs.get(job_id)
+    if job is None:
+        await _send_job_not_found(send)
+        return
+
+    query = parse_qs(scope.get('query_string', b'').decode())
+    headers = dict(scope.get('headers', []))
+    start = query.get('after', [None])[0]
+    if start is None and b'last-event-id' in headers:
+        start = headers[b'last-event-id'].decode()
+    try:
+        start = int(start) + 1 if start is not None else 0
+    except ValueError:
+        start = 0
+
+    await _start_event_stream(send)
+    async for item in jobs.follow(job, start):
+        if item is None:
+            await _send_chunk(send, ': keep-alive\n\n')
+            continue
+        index, event, data = item
+        await _send_chunk(send, f"id: {index}\n" + web_app._sse(event, data))
+    await _send_chunk(send, '', more=False)
+
+
+async def serve_static(send, path: str):
+    """Serve the React build, or the Flask template UI and its assets."""
+    if web_app.USE_REACT:
+        root = web_app.REACT_BUILD_DIR
+        if path and os.path.isfile(os.path.join(root, path)):
+            await _send_file(send, root, path)
+        else:
+            await _send_file(send, root, 'index.html')
+        return
+
+    if path.startswith('static/'):
+        await _send_file(send, STATIC_DIR, path[len('static/'):])
+        return
+    await _send_bytes(send, 200, _render_template_html(), 'text/html; charset=utf-8')
+
+
+async def _refresh_keep_alive(interval: float):
+    """Re-send the warm-up request periodically while the server runs."""
+    while True:
+        await asyncio.sleep(interval)
+        if await client.is_available():
+            await client.warm_up()
+
+
+async def _lifespan(receive, send):
+    """Handle ASGI startup/shutdown."""
+    refresher = None
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            if WARM_UP:
+                result = await client.warm_up()
+                if result['loaded']:
+                    print(f"   Model loaded in {result['seconds']}s (keep_alive: {client.keep_alive})")
+                else:
+                    print(f"   Warm-up skipped: {result['error']}")
+            seconds = keep_alive_seconds(client.keep_alive)
+            if seconds:
+                refresher = asyncio.get_running_loop().create_task(
+                    _refresh_keep_alive(seconds / 2)
+                )
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            if refresher:
+                refresher.cancel()
+            await client.close()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    """ASGI entry point."""
+    if scope['type'] == 'lifespan':
+        await _lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    method = scope['method']
+    path = scope['path']
+
+    if method == 'OPTIONS':
+        await _send_bytes(send, 204, b'', 'text/plain')
+    elif path == '/api/health' and method == 'GET':
+        await health_check(send)
+    elif path == '/api/metrics' and method == 'GET':
+        await metrics_endpoint(scope, send)
+    elif path == '/api/generate' and method == 'POST':
+        await generate_tests(receive, send)
+    elif path == '/api/generate/stream' and method == 'POST':
+        await generate_tests_stream(receive, send)
+    elif path == '/api/jobs' and method == 'POST':
+        await create_job(receive, send)
+    elif path.startswith('/api/jobs/') and path.endswith('/cancel') and method == 'POST':
+        await cancel_job(send, path[len('/api/jobs/'):-len('/cancel')])
+    elif path.startswith('/api/jobs/') and method == 'GET':
+        job_id, _, rest = path[len('/api/jobs/'):].partition('/')
+        if not rest:
+            await get_job(send, job_id)
+        elif rest == 'events':
+            await job_events(scope, send, job_id)
+        else:
+            await _send_json(send, 404, {'error': 'Not found'})
+    elif path.startswith('/api/'):
+        await _send_json(send, 404, {'error': 'Not found'})
+    elif method == 'GET':
+        await serve_static(send, path.lstrip('/'))
+    else:
+        await _send_json(send, 405, {'error': 'Method not allowed'})
+
+
+def use_ollama_host(ollama_host):
+    """
+    Point the server at a different Ollama host.
+
+    The ASGI mode talks to a single host; OllamaPool has no asyncio
+    counterpart, so several comma-separated hosts raise ValueError
+    (serve them with the default WSGI mode instead).
+    """
+    global client
+    hosts = parse_hosts(ollama_host)
+    if len(hosts) > 1:
+        raise ValueError(
+            "The ASGI mode serves a single Ollama host; run without --asgi to "
+            "spread generations over several"
+        )
+    previous = client
+    client = AsyncOllamaClient(
+        host=hosts[0] if hosts else None,
+        model=previous.model,
+        cache=previous.cache,
+        keep_alive=previous.keep_alive,
+        metrics=previous.metrics
+    )
+    return client
+
+
+def run_asgi_app(host='127.0.0.1', port=5000, max_concurrent=None, max_queue=None,
+                 job_retention=None, keep_alive=None, warm_up=True, structured=None,
+                 validate=None, allow_remote_validation=False, ollama_host=None):
+    """Run the ASGI application with uvicorn."""
+    global WARM_UP
+    try:
+        import uvicorn
+    except ImportError:
+        raise ImportError(
+            "The async serving mode requires uvicorn. Install it with: pip install uvicorn"
+        )
+    if ollama_host:
+        use_ollama_host(ollama_host)
+    scheduler.configure(max_concurrent, max_queue)
+    jobs.configure(retention=job_retention)
+    WARM_UP = warm_up
+    if keep_alive is not None:
+        client.keep_alive = parse_keep_alive(keep_alive)
+    if structured is not None:
+        web_app.structured_output = structured
+    if validate is not None:
+        allowed = web_app.validation_allowed(validate, host, allow_remote_validation)
+        web_app.validator = TestValidator() if allowed else None
+    print(f"Starting Testcase Generator UI (ASGI)")
+    print(f"   URL: http://{host}:{port}")
+    print(f"   Model: {client.model}")
+    print(f"   Ollama: {client.host}")
+    print(f"   Press Ctrl+C to stop")
+    uvicorn.run(app, host=host, port=port, log_level='warning')
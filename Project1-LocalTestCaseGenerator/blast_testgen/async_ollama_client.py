@@ -0,0 +1,404 @@
+"""Asyncio Ollama API client for the ASGI serving path."""
+
+import asyncio
+import json
+import time
+from typing import Optional, Dict, Any, AsyncIterator, Union
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - optional dependency
+    httpx = None
+
+from .cache import GenerationCache
+from .metrics import OllamaMetrics
+from .ollama_client import OllamaClient, parse_keep_alive
+from .resilience import RetryPolicy, CircuitBreaker, CircuitOpenError, retry_after_seconds
+
+
+class AsyncOllamaClient:
+    """
+    Asyncio counterpart of OllamaClient with the same API surface.
+
+    Every method that talks to Ollama is a coroutine (generate_stream is an
+    async generator), so a request waiting on inference holds a coroutine
+    rather than an OS thread. Requires the optional 'httpx' package.
+    """
+
+    DEFAULT_HOST = OllamaClient.DEFAULT_HOST
+    DEFAULT_MODEL = OllamaClient.DEFAULT_MODEL
+    POOL_SIZE = OllamaClient.POOL_SIZE
+    HEALTH_TTL = OllamaClient.HEALTH_TTL
+    KEEP_ALIVE = OllamaClient.KEEP_ALIVE
+
+    def __init__(
+        self,
+        host: str = None,
+        model: str = None,
+        pool_size: int = None,
+        health_ttl: float = None,
+        cache: Optional[GenerationCache] = None,
+        keep_alive: Union[str, int, None] = None,
+        metrics: Optional[OllamaMetrics] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        breaker: Optional[CircuitBreaker] = None
+    ):
+        if httpx is None:
+            raise ImportError(
+                "AsyncOllamaClient requires httpx. Install it with: pip install httpx"
+            )
+        self.host = host or self.DEFAULT_HOST
+        self.model = model or self.DEFAULT_MODEL
+        self.api_url = f"{self.host}/api/generate"
+        self.health_ttl = self.HEALTH_TTL if health_ttl is None else health_ttl
+        self.cache = cache
+        self.keep_alive = self.KEEP_ALIVE if keep_alive is None else parse_keep_alive(keep_alive)
+        self.metrics = metrics
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+
+        pool_size = pool_size or self.POOL_SIZE
+        self.session = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=pool_size,
+                max_keepalive_connections=pool_size
+            ),
+            timeout=httpx.Timeout(
+                self.retry_policy.read_timeout, connect=self.retry_policy.connect_timeout
+            )
+        )
+
+        # Created on first use so it binds to the server's event loop
+        self._health_lock: Optional[asyncio.Lock] = None
+        self._health: Optional[Dict[str, Any]] = None
+
+    async def health(self, force: bool = False) -> Dict[str, Any]:
+        """
+        Return the cached health snapshot, probing /api/tags when it is stale.
+
+        Returns:
+            Dict with 'available', 'models', 'error' and 'checked_at'
+        """
+        if self._health_lock is None:
+            self._health_lock = asyncio.Lock()
+        async with self._health_lock:
+            snapshot = self._health
+            if (
+                not force
+                and snapshot is not None
+                and time.monotonic() - snapshot["checked_at"] < self.health_ttl
+            ):
+                return snapshot
+
+            snapshot = {
+                "available": False,
+                "models": [],
+                "error": None,
+                "checked_at": time.monotonic()
+            }
+            try:
+                response = await self.session.get(f"{self.host}/api/tags", timeout=5)
+                response.raise_for_status()
+                data = response.json()
+                snapshot["available"] = True
+                snapshot["models"] = [m["name"] for m in data.get("models", [])]
+            except (httpx.HTTPError, ValueError) as e:
+                snapshot["error"] = str(e)
+
+            self._health = snapshot
+            return snapshot
+
+    def invalidate_health(self) -> None:
+        """Drop the cached health snapshot so the next check probes again."""
+        self._health = None
+
+    async def is_available(self) -> bool:
+        """Check if Ollama server is running."""
+        return (await self.health())["available"]
+
+    def circuit_open(self) -> bool:
+        """True while the circuit breaker is refusing generations."""
+        return self.breaker.is_open()
+
+    def _build_payload(
+        self,
+        prompt: str,
+        temperature: float,
+        num_predict: int,
+        stream: bool,
+        format: Union[str, Dict[str, Any], None] = None
+    ) -> Dict[str, Any]:
+        """Build the /api/generate request body."""
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": stream,
+            "keep_alive": self.keep_alive,
+            "options": {
+                "temperature": temperature,
+                "num_predict": num_predict
+            }
+        }
+        if format is not None:
+            payload["format"] = format
+        return payload
+
+    async def warm_up(self) -> Dict[str, Any]:
+        """Load the model with an empty prompt (see OllamaClient.warm_up)."""
+        started = time.monotonic()
+        result = {"loaded": False, "seconds": 0.0, "error": None}
+        try:
+            response = await self.session.post(self.api_url, json={
+                "model": self.model,
+                "prompt": "",
+                "stream": False,
+                "keep_alive": self.keep_alive
+            })
+            response.raise_for_status()
+            result["loaded"] = True
+            self._observe(response.json(), "warm_up")
+        except httpx.TransportError as e:
+            self.invalidate_health()
+            result["error"] = str(e)
+        except (httpx.HTTPError, ValueError) as e:
+            result["error"] = str(e)
+        result["seconds"] = round(time.monotonic() - started, 2)
+        return result
+
+    # Metrics bookkeeping is identical to the sync client
+    _observe = OllamaClient._observe
+    _observe_error = OllamaClient._observe_error
+    _observe_cancelled = OllamaClient._observe_cancelled
+
+    def _cache_key(self, payload: Dict[str, Any]) -> Optional[str]:
+        """Return the cache key for a payload, or None when caching is off."""
+        if self.cache is None:
+            return None
+        return self.cache.make_key(
+            payload["model"], payload["prompt"], payload["options"],
+            output_format=payload.get("format")
+        )
+
+    async def _cache_get(self, key: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Look up the SQLite cache without blocking the event loop."""
+        if not key:
+            return None
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.cache.get, key)
+
+    async def _cache_put(self, key: Optional[str], value: Dict[str, Any]) -> None:
+        """Store into the SQLite cache without blocking the event loop."""
+        if key:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self.cache.put, key, value)
+
+    async def _ensure_available(self) -> None:
+        """Raise ConnectionError when the cached health snapshot is down."""
+        if not await self.is_available():
+            raise ConnectionError(
+                f"Ollama not available at {self.host}. "
+                "Make sure Ollama is running (ollama serve)"
+            )
+
+    async def generate(
+        self,
+        prompt: str,
+        temperature: float = 0.2,
+        num_predict: int = 2048,
+        stream: bool = False,
+        route: Optional[str] = None,
+        format: Union[str, Dict[str, Any], None] = None
+    ) -> Union[Dict[str, Any], AsyncIterator[Dict[str, Any]]]:
+        """
+        Generate text using Ollama API.
+
+        Cancelling the awaiting task closes the connection, which stops
+        the generation in Ollama.
+
+        Returns:
+            Dict containing 'response' and 'done' status, or an async
+            iterator of chunks when stream is True
+
+        Raises:
+            ConnectionError: If Ollama is not available or its circuit
+                breaker is open (CircuitOpenError)
+            RuntimeError: If generation fails after retries
+        """
+        if stream:
+            return self.generate_stream(prompt, temperature, num_predict, route, format)
+
+        payload = self._build_payload(prompt, temperature, num_predict, False, format)
+        key = self._cache_key(payload)
+        cached = await self._cache_get(key)
+        if cached is not None:
+            result = dict(cached, cached=True)
+            self._observe(result, route)
+            return result
+
+        try:
+            await self._ensure_available()
+            response = await self._post(payload)
+            result = response.json()
+        except asyncio.CancelledError:
+            self._observe_cancelled(route)
+            raise
+        except (ConnectionError, RuntimeError, ValueError):
+            self._observe_error(route)
+            raise
+        self._observe(result, route)
+        if result.get("done", True):
+            await self._cache_put(key, result)
+        return result
+
+    def _record(self, status: int) -> None:
+        """Report an HTTP status to the breaker (see OllamaClient._post)."""
+        if status >= 500 or status == 429:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+    async def _post(self, payload: Dict[str, Any], stream: bool = False) -> "httpx.Response":
+        """
+        POST to /api/generate under the retry policy (see OllamaClient._post).
+
+        With stream, the body is left unread; the caller must aclose() the
+        response.
+
+        Raises:
+            CircuitOpenError: If the breaker refuses the request
+            RuntimeError: If the request fails and may not be retried
+        """
+        policy = self.retry_policy
+        last_error = None
+        attempts = 0
+        while attempts < policy.max_attempts:
+            if not self.breaker.allow():
+                if last_error is None:
+                    raise CircuitOpenError(self.host, self.breaker.retry_in())
+                break
+            attempts += 1
+            retry_after = None
+            try:
+                request = self.session.build_request("POST", self.api_url, json=payload)
+                response = await self.session.send(request, stream=stream)
+            except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+                self.invalidate_health()
+                self.breaker.record_failure()
+                last_error = e
+                retryable = True
+            except httpx.TimeoutException as e:
+                # Read (or write/pool) timeout after the server took the work
+                self.breaker.record_failure()
+                last_error = e
+                retryable = policy.retry_read_timeouts
+            except httpx.TransportError as e:
+                self.invalidate_health()
+                self.breaker.record_failure()
+                last_error = e
+                retryable = True
+            else:
+                status = response.status_code
+                self._record(status)
+                if status < 400:
+                    return response
+                retryable = policy.retryable_status(status)
+                retry_after = retry_after_seconds(response.headers.get("Retry-After"))
+                try:
+                    await response.aread()
+                    last_error = f"HTTP {status}: {response.text[:200]}"
+                except httpx.HTTPError:
+                    last_error = f"HTTP {status}"
+                finally:
+                    await response.aclose()
+
+            if not retryable or attempts >= policy.max_attempts:
+                break
+            await asyncio.sleep(policy.delay(attempts - 1, retry_after))
+
+        raise RuntimeError(
+            f"Failed to generate after {attempts} attempt(s): {last_error}"
+        )
+
+    async def generate_stream(
+        self,
+        prompt: str,
+        temperature: float = 0.2,
+        num_predict: int = 2048,
+        route: Optional[str] = None,
+        format: Union[str, Dict[str, Any], None] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a generation as Ollama's NDJSON chunks.
+
+        Cancelling the consuming task closes the connection, which stops
+        the generation in Ollama.
+
+        The request goes through _post, so it is retried and reported to
+        the circuit breaker until the first chunk arrives; a stream that
+        breaks after that is not retried.
+
+        Raises:
+            ConnectionError: If Ollama is not available or its circuit
+                breaker is open (CircuitOpenError)
+            RuntimeError: If the request fails after retries or the stream
+                breaks
+        """
+        payload = self._build_payload(prompt, temperature, num_predict, True, format)
+        key = self._cache_key(payload)
+        cached = await self._cache_get(key)
+        if cached is not None:
+            chunk = dict(cached, done=True, cached=True)
+            self._observe(chunk, route)
+            yield chunk
+            return
+
+        parts = []
+        finished = cancelled = False
+        try:
+            await self._ensure_available()
+            response = await self._post(payload, stream=True)
+            try:
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    try:
+                        chunk = json.loads(line)
+                    except ValueError:
+                        continue
+                    if "error" in chunk:
+                        raise RuntimeError(f"Ollama error: {chunk['error']}")
+                    parts.append(chunk.get("response", ""))
+                    yield chunk
+                    if chunk.get("done"):
+                        finished = True
+                        self._observe(chunk, route)
+                        await self._cache_put(key, dict(chunk, response="".join(parts)))
+                        break
+            finally:
+                await response.aclose()
+        except httpx.TransportError as e:
+            self.invalidate_health()
+            self.breaker.record_failure()
+            raise RuntimeError(f"Stream interrupted: {e}")
+        except httpx.HTTPError as e:
+            raise RuntimeError(f"Stream failed: {e}")
+        except (asyncio.CancelledError, GeneratorExit):
+            # The task was cancelled or the caller closed the stream early
+            cancelled = True
+            raise
+        finally:
+            if cancelled:
+                self._observe_cancelled(route)
+            elif not finished:
+                self._observe_error(route)
+
+    async def list_models(self) -> list:
+        """List available models in Ollama."""
+        snapshot = await self.health()
+        if not snapshot["available"]:
+            raise ConnectionError(f"Cannot list models: {snapshot['error']}")
+        return list(snapshot["models"])
+
+    async def close(self) -> None:
+        """Close pooled connections."""
+        await self.session.aclose()
@@ -0,0 +1,177 @@
+"""Batch test generation over directories and glob patterns."""
+
+import glob
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Callable
+
+from .orchestrator import TestGenerator, merge_compaction
+from .validator import summarize_validations
+
+
+SKIP_DIRS = {"__pycache__", "venv", ".venv", "env", "node_modules", "build", "dist"}
+
+
+def is_glob(target: str) -> bool:
+    """Check if a CLI source argument is a glob pattern."""
+    return any(ch in target for ch in "*?[")
+
+
+def _is_candidate(path: Path) -> bool:
+    """Check if a file is a module we should generate tests for."""
+    name = path.name
+    return (
+        path.suffix == ".py"
+        and not name.startswith("test_")
+        and not name.endswith("_test.py")
+        and name not in ("conftest.py", "setup.py")
+    )
+
+
+def discover_sources(target: str) -> List[Path]:
+    """
+    Find Python modules under a directory or matching a glob pattern.
+
+    Test modules, conftest.py, hidden directories and virtualenv/build
+    folders are skipped.
+
+    Returns:
+        Sorted list of module paths
+    """
+    if is_glob(target):
+        paths = [Path(p) for p in glob.glob(target, recursive=True)]
+        return sorted(p for p in paths if p.is_file() and _is_candidate(p))
+
+    root = Path(target)
+    if root.is_file():
+        return [root]
+
+    sources = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(
+            d for d in dirnames
+            if d not in SKIP_DIRS and not d.startswith(".") and not d.endswith(".egg-info")
+        )
+        for filename in filenames:
+            path = Path(dirpath) / filename
+            if _is_candidate(path):
+                sources.append(path)
+    return sorted(sources)
+
+
+class BatchRunner:
+    """Runs the generation pipeline for many files on a bounded worker pool."""
+
+    DEFAULT_WORKERS = 2
+
+    def __init__(
+        self,
+        generator: TestGenerator,
+        workers: int = None,
+        output_dir: Optional[str] = None,
+        target_function: Optional[str] = None,
+        split: bool = False,
+        unit_workers: Optional[int] = None,
+        incremental: bool = False,
+        progress: Optional[Callable[[str], None]] = print
+    ):
+        self.generator = generator
+        self.workers = max(1, workers or self.DEFAULT_WORKERS)
+        self.output_dir = Path(output_dir) if output_dir else None
+        self.target_function = target_function
+        self.split = split
+        self.unit_workers = unit_workers
+        self.incremental = incremental
+        self.progress = progress
+
+    def _output_path(self, source: Path, root: Path) -> Optional[Path]:
+        """Mirror the source tree under output_dir, or None for the default."""
+        if not self.output_dir:
+            return None
+        relative = source.parent.resolve().relative_to(root)
+        target_dir = self.output_dir / relative
+        target_dir.mkdir(parents=True, exist_ok=True)
+        return target_dir / f"test_{source.name}"
+
+    def _run_one(self, source: Path, root: Path) -> Dict[str, Any]:
+        """Generate tests for one file and time it."""
+        started = time.perf_counter()
+        try:
+            output_path = self._output_path(source, root)
+            result = self.generator.generate_tests(
+                source_path=str(source),
+                target_function=self.target_function,
+                output_path=str(output_path) if output_path else None,
+                split=self.split,
+                max_workers=self.unit_workers,
+                incremental=self.incremental
+            )
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+        result["source"] = str(source)
+        result["seconds"] = round(time.perf_counter() - started, 3)
+        result.pop("test_content", None)
+        return result
+
+    def run(self, sources: List[Path]) -> Dict[str, Any]:
+        """
+        Generate tests for every source and return a summary report.
+
+        Returns:
+            Dict with counts, total wall time and per-file results
+        """
+        started = time.perf_counter()
+        total = len(sources)
+        results = []
+        if not sources:
+            root = Path.cwd()
+        else:
+            root = Path(os.path.commonpath([str(s.parent.resolve()) for s in sources]))
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {pool.submit(self._run_one, s, root): s for s in sources}
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                if self.progress:
+                    if result["success"]:
+                        mark = "✅"
+                    else:
+                        mark = "⏭️" if result.get("skipped") else "❌"
+                    line = f"[{len(results)}/{total}] {mark} {result['source']} ({result['seconds']}s)"
+                    validation = result.get("validation")
+                    if validation:
+                        line += f" - tests: {validation['passed']} passed, {validation['failed']} failed"
+                        if validation["status"] in ("error", "timeout"):
+                            line += f", {validation['status']}"
+                    coverage = result.get("coverage")
+                    if coverage and coverage["percent"] is not None:
+                        line += f", coverage {coverage['percent']}%"
+                    if not result["success"]:
+                        line += f" - {result.get('error', 'Unknown error')}"
+                    self.progress(line)
+
+        results.sort(key=lambda r: r["source"])
+        succeeded = sum(1 for r in results if r["success"])
+        skipped = sum(1 for r in results if r.get("skipped"))
+        return {
+            "total": total,
+            "succeeded": succeeded,
+            "skipped": skipped,
+            "failed": total - succeeded - skipped,
+            "workers": self.workers,
+            "wall_seconds": round(time.perf_counter() - started, 3),
+            "compaction": merge_compaction(
+                [r["compaction"] for r in results if r.get("compaction")]
+            ),
+            "validation": summarize_validations([r.get("validation") for r in results]),
+            "results": results
+        }
+
+    @staticmethod
+    def write_report(summary: Dict[str, Any], report_path: str) -> None:
+        """Write a summary report as JSON."""
+        Path(report_path).write_text(json.dumps(summary, indent=2), encoding="utf-8")
@@ -0,0 +1,151 @@
+"""Content-addressed on-disk cache for LLM generations."""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any
+
+from .prompts import PROMPT_VERSION
+
+
+class GenerationCache:
+    """
+    SQLite-backed cache of Ollama responses with size-bounded LRU eviction.
+
+    Entries are keyed on a hash of (model, prompt template version, prompt,
+    options), so any change to the inputs is a different entry. The file can
+    be shared by several processes; SQLite serialises the writes.
+    """
+
+    DEFAULT_DIR = "~/.cache/blast_testgen"
+    DEFAULT_FILENAME = "generations.sqlite3"
+    DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+    def __init__(self, path: str = None, max_bytes: int = None):
+        if path is None:
+            cache_dir = os.environ.get("BLAST_TESTGEN_CACHE_DIR", self.DEFAULT_DIR)
+            path = Path(cache_dir).expanduser() / self.DEFAULT_FILENAME
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes or self.DEFAULT_MAX_BYTES
+
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.path), timeout=30, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS entries_lru ON entries (last_access)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(
+        model: str,
+        prompt: str,
+        options: Dict[str, Any],
+        template_version: str = PROMPT_VERSION,
+        output_format: Any = None
+    ) -> str:
+        """Hash the generation inputs (and any structured-output format) into a cache key."""
+        material = {
+            "model": model,
+            "template_version": template_version,
+            "prompt": prompt,
+            "options": options
+        }
+        if output_format is not None:
+            material["format"] = output_format
+        material = json.dumps(material, sort_keys=True)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached response for key, or None on a miss."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE entries SET last_access = ? WHERE key = ?",
+                (time.time(), key)
+            )
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        """Store a response and evict least-recently-used entries over budget."""
+        data = json.dumps(value)
+        size = len(data.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                (key, data, size, time.time())
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        """Delete oldest entries until the total size fits max_bytes."""
+        total = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute(
+            "SELECT key, size FROM entries ORDER BY last_access ASC"
+        )
+        stale = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", stale)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters for this process and on-disk totals."""
+        with self._lock:
+            entries, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "entries": entries,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "path": str(self.path)
+        }
+
+    def clear(self) -> None:
+        """Remove every cached entry."""
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
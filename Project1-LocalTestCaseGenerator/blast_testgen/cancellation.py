@@ -0,0 +1,53 @@
+"""Stopping Ollama generations whose caller no longer wants the answer."""
+
+import threading
+from typing import Optional, Callable
+
+
+class GenerationCancelled(Exception):
+    """
+    Raised out of a generation whose CancellationToken was cancelled.
+
+    Not a ConnectionError or RuntimeError, so OllamaPool does not fail
+    over to another host and the web app does not fall back to quick mode.
+    """
+
+
+class CancellationToken:
+    """
+    Tells a running generation to stop.
+
+    cancel() is called by whoever gave up on the answer (the job cancel
+    endpoint). poll, when given, is asked each time the token is checked
+    and cancels it once it returns True; the web app passes waitress's
+    client_disconnected here. OllamaClient checks the token before each
+    attempt and between streamed chunks, and closes its connection to
+    Ollama when it fires, which is what makes Ollama stop decoding.
+    Thread-safe.
+    """
+
+    def __init__(self, poll: Optional[Callable[[], bool]] = None):
+        self._poll = poll
+        self._event = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        if self._event.is_set():
+            return True
+        if self._poll is not None and self._poll():
+            self._event.set()
+            return True
+        return False
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    def raise_if_cancelled(self) -> None:
+        """Raise GenerationCancelled once the token has fired."""
+        if self.cancelled:
+            raise GenerationCancelled("Generation cancelled")
+
+    def sleep(self, seconds: float) -> None:
+        """Wait up to seconds, returning early (and raising) on cancel()."""
+        self._event.wait(seconds)
+        self.raise_if_cancelled()
@@ -0,0 +1,298 @@
+"""Decide whether a generate request holds code, a URL or a written requirement."""
+
+import ast
+import ipaddress
+import math
+import re
+from functools import lru_cache
+from typing import Optional, Dict, Any, Tuple
+
+CODE = "code"
+URL = "url"
+TEXT = "text"
+
+# Bare domains (no scheme or www.) must end in one of these. Common file
+# extensions that are also TLDs (.py, .js, .sh, .md, .rs, .pl ...) are
+# left out so file names and dotted attribute access are not websites.
+WEB_TLDS = frozenset("""
+    com org net io app co in dev ai edu gov info biz me us uk de fr es it nl
+    ru jp cn br au ca ch se no fi dk be at ie nz za mx ar kr tw sg hk id vn
+    tech site online store shop xyz cloud page blog news tv fm ly gg eu
+""".split())
+
+_SCHEME_URL = re.compile(r"^(?:https?|ftp)://[^\s/?#]+\S*$", re.IGNORECASE)
+_WWW_URL = re.compile(r"^www\.[^\s/?#.]+\.[^\s/?#]+\S*$", re.IGNORECASE)
+_DOMAIN = re.compile(
+    r"^(?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+([a-z]{2,24})\.?(?::\d{1,5})?(?:[/?#]\S*)?$",
+    re.IGNORECASE
+)
+# A development server: localhost, or an IP address with a port
+_LOCAL_HOST = re.compile(r"^(localhost)(?::\d{1,5})?(?:[/?#]\S*)?$", re.IGNORECASE)
+_IP_HOST = re.compile(
+    r"^(\d{1,3}(?:\.\d{1,3}){3}|\[[0-9a-f:]+\]):\d{1,5}(?:[/?#]\S*)?$",
+    re.IGNORECASE
+)
+
+# A line of SQL. Keywords must be upper case, so sentences that start with
+# "Select" or "Update" are not queries
+_SQL_LINE = (
+    r"^[ \t]*(?:(?:SELECT[ \t]+.+[ \t]+FROM|INSERT[ \t]+INTO|UPDATE[ \t]+\w+[ \t]+SET|"
+    r"DELETE[ \t]+FROM|CREATE[ \t]+(?:TABLE|INDEX|VIEW)|(?:GROUP|ORDER)[ \t]+BY)\b"
+    r"|WHERE[ \t]+\w+[ \t]*(?:[=<>!]|(?:IN|LIKE|IS)\b)"
+    r"|FROM[ \t]+[\w.]+(?:[ \t]+\w+)?[ \t]*(?:;|$|(?:WHERE|JOIN|LEFT|INNER|GROUP|ORDER|LIMIT)\b))"
+)
+
+# Lines typical of one language; hits vote for the language and count as
+# strong evidence of code
+_LANGUAGE_PATTERNS = {
+    "python": [
+        r"^[ \t]*(?:async[ \t]+)?def[ \t]+\w+[ \t]*\(.*\)[ \t]*(?:->[^:\n]+)?:",
+        r"^[ \t]*class[ \t]+\w+[ \t]*(?:\([^)\n]*\))?[ \t]*:[ \t]*(?:#.*)?$",
+        r"^[ \t]*from[ \t]+\.*[\w.]*[ \t]+import[ \t]+[\w*(]",
+        r"^[ \t]*import[ \t]+[\w.]+(?:[ \t]+as[ \t]+\w+)?(?:[ \t]*,[ \t]*[\w.]+)*[ \t]*$",
+        r"^[ \t]*(?:elif|while|for|with|except)\b[^\n]*:[ \t]*(?:#.*)?$",
+        r"^[ \t]*(?:else|try|finally)[ \t]*:[ \t]*(?:#.*)?$",
+        r"^[ \t]*@[\w.]+(?:\(.*\))?[ \t]*$",
+        r"\bself\.\w+",
+    ],
+    "javascript": [
+        r"\bfunction[ \t]*\*?[ \t]*[\w$]*[ \t]*\([^)\n]*\)[ \t]*\{",
+        r"^[ \t]*(?:export[ \t]+)?(?:const|let|var)[ \t]+[\w${}\[\], \t]+=",
+        r"\)[ \t]*=>|[(=,][ \t]*[\w$]+[ \t]*=>",
+        r"\bconsole\.\w+\(",
+        r"^[ \t]*import[ \t]+.+[ \t]+from[ \t]+['\"]",
+        r"\brequire\([ \t]*['\"]",
+    ],
+    "java": [
+        r"^[ \t]*(?:public|private|protected)[ \t]+(?:static[ \t]+)?(?:final[ \t]+)?"
+        r"[\w<>\[\], \t]+[ \t]+\w+[ \t]*\([^)\n]*\)",
+        r"^[ \t]*(?:public[ \t]+)?(?:abstract[ \t]+)?(?:class|interface|enum)[ \t]+\w+"
+        r"[^:\n]*\{[ \t]*$",
+        r"\bSystem\.out\.print",
+    ],
+    "c": [
+        r"^[ \t]*#[ \t]*include[ \t]*[<\"]",
+        r"\bint[ \t]+main[ \t]*\(",
+        r"\b(?:printf|scanf|malloc|free|sizeof)[ \t]*\(",
+        r"\bstd::\w+",
+    ],
+    "go": [
+        r"^[ \t]*package[ \t]+\w+[ \t]*$",
+        r"^[ \t]*func[ \t]+(?:\([^)\n]*\)[ \t]*)?\w+[ \t]*\(",
+        r"\w[ \t]*:=[ \t]*\S",
+    ],
+    "sql": [_SQL_LINE],
+}
+_LANGUAGES = {
+    name: re.compile("|".join(f"(?:{p})" for p in patterns), re.MULTILINE)
+    for name, patterns in _LANGUAGE_PATTERNS.items()
+}
+
+# A line that is a statement in most languages
+_CODE_LINE = re.compile(
+    r"[;{}][ \t]*(?://.*)?$"                                   # terminators, braces
+    r"|^[ \t]*(?:return|raise|throw|yield|break|continue|pass)\b(?![^\n]*[.!?][ \t]*$)"
+    r"|^[ \t]*[A-Za-z_$][\w.$]*(?:\[[^\]\n]*\])?[ \t]*(?:[-+*/%|&^]|//|\*\*)?=(?![=>])[ \t]*\S"
+    r"|^[ \t]*[\w.$]+\([^()\n]*\)[ \t]*;?[ \t]*$"              # bare call
+    r"|^[ \t]*(?:if|for|while)[ \t]*\(.*\)"                     # C-style condition
+    r"|" + _SQL_LINE
+)
+# Comments (and markdown headings) say nothing either way
+_COMMENT_LINE = re.compile(r"^[ \t]*(?:#|//|/\*|\*|--)")
+# Arrows are left out: requirements use them for flows (Login -> Home)
+_OPERATORS = re.compile(r"==|!=|<=|>=|&&|\|\||\+=|-=|::|\*\*|//")
+_SYMBOLS = re.compile(r"[(){}\[\]=;]")
+# A word of running text, possibly quoted, bracketed or followed by punctuation
+_WORD = re.compile(
+    r"^[(\[{\"'\u201c]*"
+    r"(?:[^\W\d_]+(?:['\u2019-][^\W\d_]+)*|\d+)"
+    r"[)\]}\"'\u201d]*[,.;:!?]?[)\]}\"'\u201d]*$"
+)
+
+# Statements that a sentence can also parse as, so they prove nothing
+_WEAK_EXPRESSIONS = (ast.Name, ast.Constant, ast.BoolOp, ast.UnaryOp, ast.Compare, ast.Attribute)
+
+
+class Classification:
+    """
+    What an input is, and how sure the classifier is.
+
+    kind is CODE, URL or TEXT. confidence is the probability of that kind
+    (0.5 to 1.0). language is the best guess for code ('python',
+    'javascript', 'java', 'c', 'go', 'sql'), None otherwise. signals holds
+    the features the decision was made on, for debugging.
+    """
+
+    def __init__(self, kind: str, confidence: float, language: Optional[str] = None,
+                 signals: Optional[Dict[str, float]] = None):
+        self.kind = kind
+        self.confidence = confidence
+        self.language = language
+        self.signals = signals or {}
+
+    @property
+    def is_code(self) -> bool:
+        return self.kind == CODE
+
+    @property
+    def is_url(self) -> bool:
+        return self.kind == URL
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "confidence": round(self.confidence, 3),
+            "language": self.language
+        }
+
+    def __repr__(self) -> str:
+        return f"Classification({self.kind!r}, {self.confidence:.3f}, language={self.language!r})"
+
+
+class InputClassifier:
+    """
+    Route inputs to website mode, quick mode or the LLM.
+
+    A single token that is a URL, www. address, bare domain with a known
+    TLD, or localhost / IP address with a port is a URL. Anything else is
+    scored as code or prose by a small logistic model over cheap features:
+    whether it parses as Python with real statements, how many lines match
+    precompiled per-language patterns, what fraction of lines are
+    statements or sentences (in any language written with spaces, or in
+    scripts such as CJK), and the density of code symbols. Only the first
+    MAX_LINES lines, and the first MAX_LINE_CHARS characters of each, are
+    examined, so a pasted essay costs no more than a page.
+    """
+
+    MAX_LINES = 400
+    MAX_LINE_CHARS = 300
+    # Above this Python is not parsed; the line features decide alone
+    MAX_PARSE_CHARS = 200_000
+
+    # Logistic model weights; bias keeps empty-feature input on the prose side
+    BIAS = -1.5
+    WEIGHTS = {
+        "parses": 2.5,
+        "language_hits": 3.0,
+        "code_lines": 4.0,
+        "prose_lines": -4.0,
+        "operators": 1.5,
+        "symbols": 6.0,
+    }
+
+    def __init__(self, threshold: float = 0.5):
+        self.threshold = threshold
+
+    def classify(self, text: str) -> Classification:
+        """Classify one input."""
+        text = text.strip()
+        if not text:
+            return Classification(TEXT, 1.0)
+
+        url_confidence = self.url_confidence(text)
+        if url_confidence:
+            return Classification(URL, url_confidence)
+
+        signals, language = self.features(text)
+        score = self.BIAS + sum(self.WEIGHTS[name] * value for name, value in signals.items())
+        probability = 1.0 / (1.0 + math.exp(-score))
+        if probability >= self.threshold:
+            return Classification(CODE, probability, language, signals)
+        return Classification(TEXT, 1.0 - probability, None, signals)
+
+    @staticmethod
+    def url_confidence(text: str) -> float:
+        """How sure we are that text is a single URL (0.0 when it is not)."""
+        if any(c.isspace() for c in text):
+            return 0.0
+        if _SCHEME_URL.match(text):
+            return 0.99
+        if _WWW_URL.match(text):
+            return 0.97
+        match = _DOMAIN.match(text)
+        if match and match.group(1).lower() in WEB_TLDS:
+            return 0.9
+        if _LOCAL_HOST.match(text):
+            return 0.95
+        match = _IP_HOST.match(text)
+        if match:
+            try:
+                ipaddress.ip_address(match.group(1).strip("[]"))
+                return 0.95
+            except ValueError:
+                pass
+        return 0.0
+
+    def features(self, text: str) -> Tuple[Dict[str, float], Optional[str]]:
+        """Model features in [0, 1], and the most likely programming language."""
+        lines = [
+            line[:self.MAX_LINE_CHARS]
+            for line in text.splitlines()[:self.MAX_LINES] if line.strip()
+        ]
+        sample = "\n".join(lines)
+
+        hits = {name: len(pattern.findall(sample)) for name, pattern in _LANGUAGES.items()}
+        parses = self._parses_as_python(text)
+        if parses:
+            hits["python"] += 1
+        total_hits = sum(hits.values())
+        language = max(hits, key=hits.get) if total_hits else None
+
+        counted = code = prose = 0
+        for line in lines:
+            if _COMMENT_LINE.match(line):
+                continue
+            counted += 1
+            if _CODE_LINE.search(line):
+                code += 1
+            elif _is_prose(line):
+                prose += 1
+
+        chars = sum(len(line.strip()) for line in lines) or 1
+        signals = {
+            "parses": 1.0 if parses else 0.0,
+            # Saturates: three distinctive lines are as good as thirty
+            "language_hits": min(total_hits, 3) / 3,
+            "code_lines": code / counted if counted else 0.0,
+            "prose_lines": prose / counted if counted else 0.0,
+            "operators": min(len(_OPERATORS.findall(sample)) / len(lines), 1.0),
+            # Prose has a few brackets too; count only density above that
+            "symbols": min(max(len(_SYMBOLS.findall(sample)) / chars - 0.02, 0.0) * 8, 1.0),
+        }
+        return signals, language
+
+    def _parses_as_python(self, text: str) -> bool:
+        """True when text is Python with at least one statement a sentence could not be."""
+        if len(text) > self.MAX_PARSE_CHARS:
+            return False
+        try:
+            tree = ast.parse(text)
+        except (SyntaxError, ValueError, MemoryError, RecursionError):
+            return False
+        return any(
+            not (isinstance(node, ast.Expr) and isinstance(node.value, _WEAK_EXPRESSIONS))
+            for node in tree.body
+        )
+
+
+def _is_prose(line: str) -> bool:
+    """Whether a line reads like a sentence rather than code."""
+    # Arrows, dashes and bullets between words say nothing
+    words = [word for word in line.split() if any(c.isalnum() for c in word)]
+    if len(words) >= 4:
+        plain = [word for word in words if _WORD.match(word)]
+        # Short names like x and i are code; sentences have real words
+        long_words = sum(1 for word in plain if sum(c.isalpha() for c in word) >= 3)
+        return len(plain) / len(words) >= 0.75 and long_words >= 2
+    # Scripts without spaces (CJK): letters outside ASCII never make up code
+    letters = [c for c in line if c.isalpha()]
+    return len(letters) >= 4 and sum(1 for c in letters if ord(c) > 127) / len(letters) > 0.5
+
+
+_default = InputClassifier()
+
+
+@lru_cache(maxsize=256)
+def classify_input(text: str) -> Classification:
+    """Classify text with the default classifier (memoised per input)."""
+    return _default.classify(text)
@@ -1,11 +1,20 @@
 """Command-line interface for blast_testgen."""
 
 import sys
+import json
+import atexit
 import argparse
 from pathlib import Path
 
 from .orchestrator import TestGenerator
-from .ollama_client import OllamaClient
+from .ollama_client import OllamaClient, KeepAliveRefresher
+from .ollama_pool import create_client
+from .cache import GenerationCache
+from .metrics import OllamaMetrics
+from .batch import BatchRunner, discover_sources, is_glob
+from .compaction import DEFAULT_TOKEN_BUDGET
+from .slicer import DEFAULT_MAX_DEPTH
+from .validator import TestValidator, WarmTestValidator
 
 
 def create_parser() -> argparse.ArgumentParser:
@@ -17,23 +26,25 @@ def create_parser() -> argparse.ArgumentParser:
     
     parser.add_argument(
         "source",
-        help="Path to Python source file"
+        help="Python source file, directory or glob pattern (e.g. 'src/**/*.py')"
     )
     
     parser.add_argument(
         "-o", "--output",
-        help="Output path for generated tests (default: test_<source>.py)"
+        help="Output path for generated tests (default: test_<source>.py); "
+             "an output directory in directory/glob mode"
     )
     
     parser.add_argument(
         "-f", "--function",
-        help="Generate tests for specific function only"
+        help="Generate tests for specific function only (a name, or Class.method)"
     )
     
     parser.add_argument(
         "--host",
         default="http://localhost:11434",
-        help="Ollama server URL (default: http://localhost:11434)"
+        help="Ollama server URL, or comma-separated URLs to spread work over "
+             "several hosts (default: http://localhost:11434)"
     )
     
     parser.add_argument(
@@ -42,6 +53,145 @@ def create_parser() -> argparse.ArgumentParser:
         help="Model to use (default: codellama)"
     )
     
+    parser.add_argument(
+        "-j", "--workers",
+        type=int,
+        default=BatchRunner.DEFAULT_WORKERS,
+        help="Concurrent generations in directory/glob mode "
+             f"(default: {BatchRunner.DEFAULT_WORKERS}; match OLLAMA_NUM_PARALLEL)"
+    )
+    
+    parser.add_argument(
+        "--split",
+        action="store_true",
+        help="Prompt once per top-level function/class and merge the results"
+    )
+    
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Like --split, but only regenerate units whose code changed "
+             "since the last run (tracked in test_<source>.manifest.json); "
+             "not with -f"
+    )
+    
+    parser.add_argument(
+        "--unit-workers",
+        type=int,
+        default=TestGenerator.DEFAULT_UNIT_WORKERS,
+        help="Concurrent unit generations per file with --split "
+             f"(default: {TestGenerator.DEFAULT_UNIT_WORKERS})"
+    )
+    
+    parser.add_argument(
+        "--report",
+        help="Write a JSON summary report in directory/glob mode"
+    )
+    
+    parser.add_argument(
+        "--token-budget",
+        type=int,
+        default=None,
+        help="Estimated source tokens allowed per prompt; larger inputs are "
+             f"compacted (default: {DEFAULT_TOKEN_BUDGET})"
+    )
+    
+    parser.add_argument(
+        "--slice-depth",
+        type=int,
+        default=None,
+        help="With -f, how many reference hops from the target keep their "
+             f"full source; the next ring is stubbed (default: {DEFAULT_MAX_DEPTH})"
+    )
+    
+    parser.add_argument(
+        "--structured",
+        action="store_true",
+        help="Constrain answers to a JSON schema and re-ask only for invalid "
+             "pytest code (requires Ollama 0.5+)"
+    )
+    
+    parser.add_argument(
+        "--validate",
+        action="store_true",
+        help="Run each generated test file against its source in a subprocess "
+             "and report per-test results. Executes the code: only use it on "
+             "code you trust"
+    )
+    
+    parser.add_argument(
+        "--validate-timeout",
+        type=float,
+        default=None,
+        help="Seconds a test run may take with --validate "
+             f"(default: {TestValidator.DEFAULT_TIMEOUT:g})"
+    )
+    
+    parser.add_argument(
+        "--validate-preload",
+        default="",
+        metavar="MODULE[,MODULE]",
+        help="Modules the warm test workers import once up front, "
+             "typically the package under test"
+    )
+    
+    parser.add_argument(
+        "--validate-cold",
+        action="store_true",
+        help="Start a fresh interpreter for every test run instead of "
+             "reusing warm pytest workers"
+    )
+    
+    parser.add_argument(
+        "--coverage-target",
+        type=float,
+        default=None,
+        metavar="PERCENT",
+        help="Measure line and branch coverage of the generated tests and "
+             "re-prompt for uncovered functions until this percentage "
+             "(implies --validate; needs coverage.py)"
+    )
+    
+    parser.add_argument(
+        "--coverage-budget",
+        type=int,
+        default=None,
+        metavar="TOKENS",
+        help="Tokens coverage re-prompting may spend per file "
+             f"(default: {TestGenerator.DEFAULT_COVERAGE_TOKEN_BUDGET})"
+    )
+    
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always call the model, bypassing the generation cache"
+    )
+    
+    parser.add_argument(
+        "--cache-dir",
+        help="Generation cache directory (default: ~/.cache/blast_testgen)"
+    )
+    
+    parser.add_argument(
+        "--keep-alive",
+        default=None,
+        help="How long Ollama keeps the model loaded after a request, "
+             "e.g. 30m, 1h or -1 for always (default: 30m)"
+    )
+    
+    parser.add_argument(
+        "--no-warm-up",
+        action="store_true",
+        help="Skip loading the model before generating"
+    )
+    
+    parser.add_argument(
+        "--metrics",
+        metavar="PATH",
+        help="Write Ollama timings (load, prompt eval, decode) as JSON to "
+             "PATH, or '-' for stdout"
+    )
+    
     parser.add_argument(
         "--check",
         action="store_true",
@@ -61,13 +211,29 @@ def main():
     """Main entry point."""
     parser = create_parser()
     args = parser.parse_args()
+    if args.incremental and args.function:
+        parser.error("--incremental tracks whole modules and cannot be combined with -f/--function")
     
     # Initialize client
-    client = OllamaClient(host=args.host, model=args.model)
+    cache = None
+    if not args.no_cache:
+        cache_path = None
+        if args.cache_dir:
+            cache_path = Path(args.cache_dir) / GenerationCache.DEFAULT_FILENAME
+        cache = GenerationCache(path=cache_path)
+    metrics = OllamaMetrics()
+    client = create_client(
+        args.host,
+        model=args.model,
+        pool_size=max(OllamaClient.POOL_SIZE, args.workers * args.unit_workers),
+        cache=cache,
+        keep_alive=args.keep_alive,
+        metrics=metrics
+    )
     
     # Handle check command
     if args.check:
-        if client.is_available():
+        if client.health(force=True)["available"]:
             print(f"✅ Ollama is running at {args.host}")
             sys.exit(0)
         else:
@@ -87,8 +253,26 @@ def main():
             print(f"Error: {e}")
             sys.exit(1)
     
-    # Generate tests
-    generator = TestGenerator(ollama_host=args.host, model=args.model)
+    # Load the model once up front instead of in the first worker's request
+    if not args.no_warm_up and client.is_available():
+        result = client.warm_up()
+        if result["loaded"]:
+            print(f"🔥 Model {client.model} loaded in {result['seconds']}s")
+    KeepAliveRefresher(client).start()
+    
+    # Generate tests (reuse the client so its health snapshot and pool are shared)
+    generator = TestGenerator(
+        client=client,
+        token_budget=args.token_budget,
+        slice_depth=args.slice_depth,
+        structured=args.structured,
+        validator=create_validator(args),
+        coverage_target=args.coverage_target,
+        coverage_token_budget=args.coverage_budget
+    )
+    
+    if is_glob(args.source) or Path(args.source).is_dir():
+        run_batch(args, generator, cache, metrics)
     
     print(f"🚀 Generating tests for: {args.source}")
     if args.function:
@@ -97,17 +281,147 @@ def main():
     result = generator.generate_tests(
         source_path=args.source,
         target_function=args.function,
-        output_path=args.output
+        output_path=args.output,
+        split=args.split,
+        max_workers=args.unit_workers,
+        incremental=args.incremental
     )
     
     if result["success"]:
         print(f"✅ Tests generated successfully!")
         print(f"   File: {result['test_file_path']}")
         print(f"   Functions tested: {', '.join(result['functions_tested'])}")
+        units = result.get("units") or []
+        reused = [u["name"] for u in units if u.get("reused")]
+        if args.incremental and units:
+            print(f"   Units regenerated: {len(units) - len(reused)}, "
+                  f"reused: {len(reused)}")
+        failed_units = [u["name"] for u in units if not u["success"]]
+        if failed_units:
+            print(f"   ⚠️ Units without tests: {', '.join(failed_units)}")
+        if result.get("slice"):
+            print(f"   Context: {len(result['slice']['included'])} definition(s) in full, "
+                  f"{len(result['slice']['stubbed'])} stubbed")
+        print_compaction(result.get("compaction"))
+        print_coverage(result.get("coverage"))
+        print_validation(result.get("validation"))
+        if cache:
+            stats = cache.stats()
+            print(f"   Cache: {stats['hits']} hit(s), {stats['misses']} miss(es)")
+        write_metrics(args.metrics, metrics)
         sys.exit(0)
     else:
         print(f"❌ Generation failed: {result.get('error', 'Unknown error')}")
+        write_metrics(args.metrics, metrics)
+        sys.exit(1)
+
+
+def create_validator(args):
+    """TestValidator for --validate: warm pytest workers unless --validate-cold."""
+    if not (args.validate or args.coverage_target):
+        return None
+    if args.validate_cold:
+        return TestValidator(timeout=args.validate_timeout)
+    preload = [name.strip() for name in args.validate_preload.split(",") if name.strip()]
+    validator = WarmTestValidator(timeout=args.validate_timeout, preload=preload)
+    atexit.register(validator.close)
+    return validator
+
+
+def print_compaction(compaction) -> None:
+    """Print how much prompt compaction shrank the source."""
+    if compaction:
+        print(f"   Prompt source: {compaction['original_tokens']} -> "
+              f"{compaction['tokens']} tokens (ratio {compaction['ratio']})")
+
+
+def print_coverage(coverage) -> None:
+    """Print the coverage re-prompting rounds for one file."""
+    if not coverage:
+        return
+    if coverage["percent"] is None:
+        print(f"   ⚠️ Coverage: {coverage['error']}")
+        return
+    kept = sum(1 for r in coverage["rounds"] if r["accepted"])
+    print(f"   Coverage: {coverage['initial_percent']}% -> {coverage['percent']}% "
+          f"(target {coverage['target']:g}%) after {kept}/{len(coverage['rounds'])} "
+          f"re-prompt(s), ~{coverage['tokens']} tokens")
+    if coverage.get("error"):
+        print(f"      {coverage['error']}")
+
+
+def print_validation(validation) -> None:
+    """Print the test run of one generated test file."""
+    if not validation:
+        return
+    mark = "✅" if validation["status"] == "passed" else "⚠️"
+    print(f"   {mark} Validation: {validation['passed']} passed, {validation['failed']} failed, "
+          f"{validation['errors']} error(s) in {validation['seconds']}s")
+    for test in validation["tests"]:
+        if test["outcome"] in ("failed", "error"):
+            message = test["message"].splitlines()[0] if test["message"] else ""
+            print(f"      {test['outcome'].upper()} {test['name']}: {message}")
+    if validation["error"] and validation["status"] != "failed":
+        print(f"      {validation['error'].splitlines()[0]}")
+
+
+def write_metrics(path, metrics: OllamaMetrics) -> None:
+    """Write the Ollama timing summary as JSON ('-' prints it)."""
+    if not path:
+        return
+    text = json.dumps(metrics.summary(), indent=2)
+    if path == "-":
+        print(text)
+    else:
+        Path(path).write_text(text + "\n", encoding="utf-8")
+        print(f"   Metrics: {path}")
+
+
+def run_batch(args, generator: TestGenerator, cache, metrics: OllamaMetrics) -> None:
+    """Generate tests for every module under a directory or glob, then exit."""
+    sources = discover_sources(args.source)
+    if not sources:
+        print(f"❌ No Python modules found in: {args.source}")
+        sys.exit(1)
+    
+    # One health check for the whole batch
+    if not generator.client.health(force=True)["available"]:
+        print(f"❌ Ollama not available at {args.host}")
+        print("   Run: ollama serve")
         sys.exit(1)
+    
+    print(f"🚀 Generating tests for {len(sources)} module(s) with {args.workers} worker(s)")
+    runner = BatchRunner(
+        generator,
+        workers=args.workers,
+        output_dir=args.output,
+        target_function=args.function,
+        split=args.split,
+        unit_workers=args.unit_workers,
+        incremental=args.incremental
+    )
+    summary = runner.run(sources)
+    
+    if cache:
+        summary["cache"] = cache.stats()
+    summary["metrics"] = metrics.summary()
+    if args.report:
+        runner.write_report(summary, args.report)
+    
+    print(f"\n{'✅' if not summary['failed'] else '⚠️'} "
+          f"{summary['succeeded']}/{summary['total']} succeeded, "
+          f"{summary['skipped']} skipped, {summary['failed']} failed "
+          f"in {summary['wall_seconds']}s")
+    print_compaction(summary["compaction"])
+    validation = summary["validation"]
+    if validation:
+        print(f"   Validation: {validation['modules_passed']}/{validation['modules']} module(s) "
+              f"passed; {validation['passed']} test(s) passed, {validation['failed']} failed, "
+              f"{validation['errors']} error(s)")
+    if args.report:
+        print(f"   Report: {args.report}")
+    write_metrics(args.metrics, metrics)
+    sys.exit(0 if not summary["failed"] else 1)
 
 
 if __name__ == "__main__":
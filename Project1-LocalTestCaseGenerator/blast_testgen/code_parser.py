@@ -1,83 +1,214 @@
 """Code parsing and analysis utilities."""
 
 import ast
+import copy
+import hashlib
 import re
-from typing import List, Dict, Optional, Tuple
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, List, Dict, Mapping, Optional, Tuple, Union
 from pathlib import Path
 
 
+class ParsedModule:
+    """
+    A Python module parsed once, with its lookup tables precomputed.
+
+    Holds the AST, the split source lines and the function/class/unit
+    tables, so callers can ask several questions about the same source
+    without re-running ast.parse or splitlines(). Instances are shared
+    through the parse cache, so the tables are read-only: tuples of
+    read-only mappings.
+
+    Raises:
+        SyntaxError: If the code is not valid Python
+    """
+
+    def __init__(self, code: str):
+        self.code = code
+        self.tree = ast.parse(code)
+        self.lines: Tuple[str, ...] = tuple(code.splitlines())
+
+        functions = []
+        classes = []
+        self._function_nodes: Dict[str, ast.AST] = {}
+        for node in ast.walk(self.tree):
+            if isinstance(node, ast.FunctionDef):
+                functions.append(MappingProxyType({
+                    "name": node.name,
+                    "args": tuple(arg.arg for arg in node.args.args),
+                    "docstring": ast.get_docstring(node),
+                    "lineno": node.lineno,
+                    "source": self.get_source(node)
+                }))
+                self._function_nodes.setdefault(node.name, node)
+            elif isinstance(node, ast.ClassDef):
+                classes.append(MappingProxyType({
+                    "name": node.name,
+                    "methods": tuple(
+                        n.name for n in node.body
+                        if isinstance(n, ast.FunctionDef)
+                    ),
+                    "docstring": ast.get_docstring(node),
+                    "lineno": node.lineno
+                }))
+        self.functions: Tuple[Mapping[str, Any], ...] = tuple(functions)
+        self.classes: Tuple[Mapping[str, Any], ...] = tuple(classes)
+
+        units = []
+        self._unit_nodes: Dict[str, ast.AST] = {}
+        import_nodes = []
+        for node in self.tree.body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                self._unit_nodes[node.name] = node
+                units.append(MappingProxyType({
+                    "name": node.name,
+                    "kind": "class" if isinstance(node, ast.ClassDef) else "function",
+                    "lineno": node.lineno,
+                    "source": self.get_source(node)
+                }))
+            elif isinstance(node, (ast.Import, ast.ImportFrom)):
+                import_nodes.append(node)
+        self.units: Tuple[Mapping[str, Any], ...] = tuple(units)
+        self.imports = "\n".join(self.get_source(node) for node in import_nodes)
+
+    def get_source(self, node: ast.AST) -> str:
+        """Extract source text for an AST node."""
+        start_line = node.lineno - 1
+        end_line = getattr(node, 'end_lineno', start_line + 1)
+        if end_line:
+            return "\n".join(self.lines[start_line:end_line])
+        return self.lines[start_line]
+
+    def get_function_code(self, function_name: str) -> Optional[str]:
+        """Extract source code for a specific function."""
+        node = self._function_nodes.get(function_name)
+        return self.get_source(node) if node is not None else None
+
+    def unit_fingerprints(self) -> Dict[str, str]:
+        """
+        Hash each top-level unit's normalized AST.
+
+        Line numbers, formatting, comments and docstrings do not affect the
+        hash, so only changes to what the code does trigger regeneration.
+
+        Returns:
+            Dict mapping unit name to a hex digest
+        """
+        return {
+            name: hashlib.sha256(_normalized_dump(node).encode("utf-8")).hexdigest()
+            for name, node in self._unit_nodes.items()
+        }
+
+
+class _DocstringStripper(ast.NodeTransformer):
+    """Remove docstrings from function and class bodies."""
+
+    def generic_visit(self, node):
+        super().generic_visit(node)
+        body = getattr(node, "body", None)
+        if (
+            isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))
+            and body
+            and isinstance(body[0], ast.Expr)
+            and isinstance(body[0].value, ast.Constant)
+            and isinstance(body[0].value.value, str)
+        ):
+            node.body = body[1:] or [ast.Pass()]
+        return node
+
+
+def _normalized_dump(node: ast.AST) -> str:
+    """Dump an AST without positions or docstrings."""
+    # Work on a copy so the shared tree keeps its docstrings
+    clone = _DocstringStripper().visit(copy.deepcopy(node))
+    return ast.dump(clone, include_attributes=False)
+
+
+def _copy_entries(entries: Tuple[Mapping[str, Any], ...]) -> List[Dict[str, Any]]:
+    """Copy read-only table entries into plain dicts the caller may modify."""
+    return [
+        {key: list(value) if isinstance(value, tuple) else value for key, value in entry.items()}
+        for entry in entries
+    ]
+
+
+@lru_cache(maxsize=16)
+def _parse_cached(code: str) -> ParsedModule:
+    return ParsedModule(code)
+
+
 class CodeAnalyzer:
     """Analyzes Python code to extract functions and classes."""
-    
+
     @staticmethod
-    def extract_functions(code: str) -> List[Dict[str, any]]:
+    def parse(code: Union[str, ParsedModule]) -> ParsedModule:
         """
-        Extract function definitions from code.
-        
-        Returns:
-            List of dicts with 'name', 'args', 'docstring', 'lineno'
+        Parse code once and return the shared ParsedModule.
+
+        Recently parsed sources are memoised, so calling several
+        CodeAnalyzer methods on the same string only parses it once.
+
+        Raises:
+            SyntaxError: If the code is not valid Python
         """
-        functions = []
+        if isinstance(code, ParsedModule):
+            return code
+        return _parse_cached(code)
+
+    @staticmethod
+    def _parse_or_raise(code: Union[str, ParsedModule]) -> ParsedModule:
+        """Parse code, converting SyntaxError to ValueError."""
         try:
-            tree = ast.parse(code)
-            for node in ast.walk(tree):
-                if isinstance(node, ast.FunctionDef):
-                    func_info = {
-                        "name": node.name,
-                        "args": [arg.arg for arg in node.args.args],
-                        "docstring": ast.get_docstring(node),
-                        "lineno": node.lineno,
-                        "source": CodeAnalyzer._get_node_source(code, node)
-                    }
-                    functions.append(func_info)
+            return CodeAnalyzer.parse(code)
         except SyntaxError as e:
             raise ValueError(f"Invalid Python syntax: {e}")
-        return functions
-    
+
+    @staticmethod
+    def extract_functions(code: Union[str, ParsedModule]) -> List[Dict[str, any]]:
+        """
+        Extract function definitions from code.
+
+        Returns:
+            List of dicts with 'name', 'args', 'docstring', 'lineno'
+        """
+        return _copy_entries(CodeAnalyzer._parse_or_raise(code).functions)
+
     @staticmethod
-    def extract_classes(code: str) -> List[Dict[str, any]]:
+    def extract_classes(code: Union[str, ParsedModule]) -> List[Dict[str, any]]:
         """Extract class definitions from code."""
-        classes = []
+        return _copy_entries(CodeAnalyzer._parse_or_raise(code).classes)
+
+    @staticmethod
+    def extract_units(code: Union[str, ParsedModule]) -> List[Dict[str, any]]:
+        """
+        Split a module into independently testable units.
+
+        Each top-level function and each top-level class (with its methods)
+        is one unit.
+
+        Returns:
+            List of dicts with 'name', 'kind', 'lineno', 'source'
+        """
+        return _copy_entries(CodeAnalyzer._parse_or_raise(code).units)
+
+    @staticmethod
+    def extract_imports(code: Union[str, ParsedModule]) -> str:
+        """Return the module's top-level import statements as source."""
         try:
-            tree = ast.parse(code)
-            for node in ast.walk(tree):
-                if isinstance(node, ast.ClassDef):
-                    class_info = {
-                        "name": node.name,
-                        "methods": [
-                            n.name for n in node.body 
-                            if isinstance(n, ast.FunctionDef)
-                        ],
-                        "docstring": ast.get_docstring(node),
-                        "lineno": node.lineno
-                    }
-                    classes.append(class_info)
-        except SyntaxError as e:
-            raise ValueError(f"Invalid Python syntax: {e}")
-        return classes
-    
+            return CodeAnalyzer.parse(code).imports
+        except SyntaxError:
+            return ""
+
     @staticmethod
-    def get_function_code(code: str, function_name: str) -> Optional[str]:
+    def get_function_code(code: Union[str, ParsedModule], function_name: str) -> Optional[str]:
         """Extract source code for a specific function."""
         try:
-            tree = ast.parse(code)
-            for node in ast.walk(tree):
-                if isinstance(node, ast.FunctionDef) and node.name == function_name:
-                    return CodeAnalyzer._get_node_source(code, node)
+            return CodeAnalyzer.parse(code).get_function_code(function_name)
         except SyntaxError:
             pass
         return None
-    
-    @staticmethod
-    def _get_node_source(code: str, node: ast.AST) -> str:
-        """Extract source text for an AST node."""
-        lines = code.splitlines()
-        start_line = node.lineno - 1
-        end_line = getattr(node, 'end_lineno', start_line + 1)
-        if end_line:
-            return "\n".join(lines[start_line:end_line])
-        return lines[start_line]
-    
+
     @staticmethod
     def read_file(file_path: str) -> str:
         """Read code from file."""
@@ -85,17 +216,17 @@ class CodeAnalyzer:
         if not path.exists():
             raise FileNotFoundError(f"File not found: {file_path}")
         return path.read_text(encoding="utf-8")
-    
+
     @staticmethod
-    def validate_python(code: str) -> Tuple[bool, Optional[str]]:
+    def validate_python(code: Union[str, ParsedModule]) -> Tuple[bool, Optional[str]]:
         """
         Validate if code is valid Python.
-        
+
         Returns:
             Tuple of (is_valid, error_message)
         """
         try:
-            ast.parse(code)
+            CodeAnalyzer.parse(code)
             return True, None
         except SyntaxError as e:
             return False, str(e)
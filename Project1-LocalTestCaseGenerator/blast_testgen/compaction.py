@@ -0,0 +1,320 @@
+"""Shrink Python source so prompts stay within a token budget."""
+
+import ast
+import io
+import tokenize
+from typing import Optional, Dict, Any, List, Set, Tuple
+
+
+# Rough size of a token for code with a llama-family tokenizer
+CHARS_PER_TOKEN = 4
+
+# Tokens of source code allowed into a single prompt
+DEFAULT_TOKEN_BUDGET = 2048
+
+# Longest docstring line kept when docstrings are shortened
+DOCSTRING_CHARS = 80
+
+_FUNCTION_TYPES = (ast.FunctionDef, ast.AsyncFunctionDef)
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate how many tokens the model will see for text."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _offsets(code: str):
+    """Map (line, col) ast positions in code to string offsets."""
+    lines = code.splitlines(keepends=True)
+    starts = [0]
+    for line in lines:
+        starts.append(starts[-1] + len(line))
+
+    def offset(line: int, col: int) -> int:
+        # ast columns count UTF-8 bytes
+        prefix = lines[line - 1].encode("utf-8")[:col].decode("utf-8", "ignore")
+        return starts[line - 1] + len(prefix)
+
+    return offset
+
+
+def _replace_spans(code: str, edits: List[Tuple[int, int, int, int, str]]) -> str:
+    """
+    Apply (start_line, start_col, end_line, end_col, text) replacements.
+
+    Lines are 1-based and columns 0-based, as in the ast module. Edits
+    must not overlap.
+    """
+    offset = _offsets(code)
+    pieces = []
+    end = len(code)
+    for start_line, start_col, end_line, end_col, text in sorted(edits, reverse=True):
+        start = offset(start_line, start_col)
+        pieces.append(code[offset(end_line, end_col):end])
+        pieces.append(text)
+        end = start
+    pieces.append(code[:end])
+    return "".join(reversed(pieces))
+
+
+def strip_comments(code: str) -> str:
+    """Remove comments and collapse the blank lines they leave behind."""
+    comments = []
+    try:
+        for token in tokenize.generate_tokens(io.StringIO(code).readline):
+            if token.type == tokenize.COMMENT:
+                comments.append(token.start)
+    except (tokenize.TokenError, IndentationError, SyntaxError):
+        return code
+
+    if not comments:
+        return code
+
+    lines = code.splitlines()
+    dropped = set()
+    for row, col in comments:
+        lines[row - 1] = lines[row - 1][:col].rstrip()
+        if not lines[row - 1]:
+            dropped.add(row - 1)
+
+    compact = []
+    for index, line in enumerate(lines):
+        if index in dropped:
+            continue
+        if not line.strip() and compact and not compact[-1].strip():
+            continue
+        compact.append(line)
+    return "\n".join(compact).strip("\n") + "\n"
+
+
+def _docstring_node(node: ast.AST) -> Optional[ast.Expr]:
+    """Return the docstring expression of a module, class or function."""
+    body = getattr(node, "body", None)
+    if (
+        body
+        and isinstance(body[0], ast.Expr)
+        and isinstance(body[0].value, ast.Constant)
+        and isinstance(body[0].value.value, str)
+    ):
+        return body[0]
+    return None
+
+
+def _docstring_literal(text: str) -> str:
+    """A string literal for a one-line docstring, triple-quoted when that is safe."""
+    if '"' in text:
+        # A quote next to the delimiters would end the literal early
+        return repr(text)
+    return '"""' + text.replace("\\", "\\\\") + '"""'
+
+
+def shorten_docstrings(code: str) -> str:
+    """Cut every docstring down to its first line."""
+    tree = ast.parse(code)
+    edits = []
+    for node in ast.walk(tree):
+        if not isinstance(node, (ast.Module, ast.ClassDef) + _FUNCTION_TYPES):
+            continue
+        doc = _docstring_node(node)
+        if doc is None:
+            continue
+        text = (ast.get_docstring(node) or "").strip()
+        first = text.splitlines()[0].strip() if text else ""
+        if len(first) > DOCSTRING_CHARS:
+            first = first[:DOCSTRING_CHARS - 3].rstrip() + "..."
+        short = _docstring_literal(first)
+        if doc.lineno == doc.end_lineno and len(text) == len(first):
+            continue
+        edits.append((doc.lineno, doc.col_offset, doc.end_lineno, doc.end_col_offset, short))
+    return _replace_spans(code, edits)
+
+
+def _stub_edit(node: ast.AST) -> Optional[Tuple[int, int, int, int, str]]:
+    """Edit that replaces a function body (after its docstring) with '...'."""
+    body = node.body[1:] if _docstring_node(node) else node.body
+    if not body:
+        return None
+    only = body[0]
+    if (
+        len(body) == 1
+        and isinstance(only, ast.Expr)
+        and isinstance(only.value, ast.Constant)
+        and only.value.value is Ellipsis
+    ):
+        # Already a stub
+        return None
+    first, last = body[0], body[-1]
+    return (first.lineno, first.col_offset, last.end_lineno, last.end_col_offset, "...")
+
+
+def _functions_outside(tree: ast.AST, keep: set) -> List[ast.AST]:
+    """
+    Outermost functions that are not in keep and not inside a kept node.
+
+    Methods count as functions; classes are descended into so their
+    methods can be stubbed individually.
+    """
+    found = []
+
+    def visit(node):
+        for child in ast.iter_child_nodes(node):
+            name = getattr(child, "name", None)
+            if name in keep and isinstance(child, (ast.ClassDef,) + _FUNCTION_TYPES):
+                continue
+            if isinstance(child, _FUNCTION_TYPES):
+                found.append(child)
+            elif isinstance(child, ast.ClassDef):
+                visit(child)
+
+    visit(tree)
+    return found
+
+
+def stub_functions(code: str, keep: set, limit: Optional[int] = None) -> str:
+    """
+    Reduce functions not named in keep to their signature and docstring.
+
+    Args:
+        keep: Names of functions/classes whose bodies stay intact
+        limit: Only stub this many functions, largest first
+    """
+    tree = ast.parse(code)
+    candidates = [
+        (node, edit) for node in _functions_outside(tree, keep)
+        for edit in [_stub_edit(node)] if edit
+    ]
+    if limit is not None:
+        candidates.sort(key=lambda item: item[0].end_lineno - item[0].lineno, reverse=True)
+        candidates = candidates[:limit]
+    return _replace_spans(code, [edit for _, edit in candidates])
+
+
+def stub_largest(code: str, keep: set, chars: int) -> str:
+    """
+    Stub the largest function bodies outside keep until chars are saved.
+
+    One parse for the whole batch: bodies are ranked by length and taken
+    in order until their combined length (less the '...' left behind)
+    reaches chars, or every body is stubbed.
+    """
+    tree = ast.parse(code)
+    offset = _offsets(code)
+    sized = []
+    for node in _functions_outside(tree, keep):
+        edit = _stub_edit(node)
+        if edit:
+            saved = offset(edit[2], edit[3]) - offset(edit[0], edit[1]) - len(edit[4])
+            sized.append((saved, edit))
+    sized.sort(key=lambda item: item[0], reverse=True)
+
+    edits = []
+    for saved, edit in sized:
+        if chars <= 0:
+            break
+        edits.append(edit)
+        chars -= saved
+    return _replace_spans(code, edits)
+
+
+def _truncate(code: str, budget: int) -> str:
+    """Cut code to the budget at a line boundary."""
+    marker = "# ... truncated to fit the prompt budget\n"
+    cut = code[:max(0, budget * CHARS_PER_TOKEN - len(marker))]
+    if "\n" in cut:
+        cut = cut[:cut.rindex("\n") + 1]
+    return cut + marker
+
+
+def _compact_python(
+    code: str,
+    target_function: Optional[str],
+    budget: int,
+    keep: Optional[Set[str]],
+    steps: List[str]
+) -> str:
+    """The structural steps of compact_source, recording each in steps."""
+    def over() -> bool:
+        return estimate_tokens(code) > budget
+
+    stripped = strip_comments(code)
+    if stripped != code:
+        code = stripped
+        steps.append("comments")
+
+    keep = set(keep or ()) | ({target_function} if target_function else set())
+    if target_function:
+        stubbed = stub_functions(code, keep)
+        if stubbed != code:
+            code = stubbed
+            steps.append("non_target_stubs")
+
+    if over():
+        shortened = shorten_docstrings(code)
+        if shortened != code:
+            code = shortened
+            steps.append("docstrings")
+
+    # Stub the biggest bodies in batches sized to what the estimate is over
+    while over():
+        stubbed = stub_largest(code, keep, len(code) - budget * CHARS_PER_TOKEN)
+        if stubbed == code:
+            break
+        code = stubbed
+        if "large_stubs" not in steps:
+            steps.append("large_stubs")
+    return code
+
+
+def compact_source(
+    code: str,
+    target_function: Optional[str] = None,
+    token_budget: Optional[int] = None,
+    keep: Optional[Set[str]] = None
+) -> Dict[str, Any]:
+    """
+    Compact source code for a prompt.
+
+    Comments are always dropped, and when a target is given every other
+    function is reduced to its signature, except those named in keep
+    (e.g. dependencies a slice chose to show in full). While the estimate
+    is still over the budget, docstrings are cut to one line, then the
+    largest remaining function bodies are stubbed, and as a last resort
+    the text is truncated. Input that is not valid Python is only
+    truncated, and so is Python whose compacted form fails to parse.
+
+    Returns:
+        Dict with 'code', 'original_tokens', 'tokens', 'ratio'
+        (compacted/original) and the 'steps' applied
+    """
+    budget = token_budget or DEFAULT_TOKEN_BUDGET
+    original = code
+    original_tokens = estimate_tokens(code)
+    steps = []
+
+    try:
+        ast.parse(code)
+        is_python = True
+    except (SyntaxError, ValueError):
+        is_python = False
+
+    if is_python:
+        try:
+            code = _compact_python(code, target_function, budget, keep, steps)
+            ast.parse(code)
+        except (SyntaxError, ValueError, RecursionError):
+            # Never send the model broken code; use the source as given
+            code = original
+            steps.clear()
+
+    if estimate_tokens(code) > budget:
+        code = _truncate(code, budget)
+        steps.append("truncated")
+
+    tokens = estimate_tokens(code)
+    return {
+        "code": code,
+        "original_tokens": original_tokens,
+        "tokens": tokens,
+        "ratio": round(tokens / original_tokens, 3) if original_tokens else 1.0,
+        "steps": steps
+    }
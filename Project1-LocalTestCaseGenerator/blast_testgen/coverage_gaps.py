@@ -0,0 +1,114 @@
+"""Locate code the generated tests leave unexecuted, for targeted re-prompting."""
+
+import ast
+from typing import Dict, Any, List, Optional, Iterable
+
+from .code_parser import ParsedModule
+from .compaction import estimate_tokens
+from .slicer import find_target
+
+# Appended to every source line the tests never executed
+UNCOVERED_MARK = "# NOT COVERED"
+
+_UNIT_TYPES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+
+
+def _describe_line(module: ParsedModule, number: int) -> str:
+    if number <= 0:
+        return "leaving the function"
+    return f"line {number} `{module.lines[number - 1].strip()}`"
+
+
+def _annotate(
+    module: ParsedModule,
+    start: int,
+    end: int,
+    lines: List[int],
+    branches: List[List[int]]
+) -> str:
+    """Unit source with missing lines marked and untaken branches listed."""
+    missing = set(lines)
+    out = []
+    for number in range(start, end + 1):
+        text = module.lines[number - 1]
+        out.append(f"{text}  {UNCOVERED_MARK}" if number in missing else text)
+    for source_line, target in branches:
+        out.append(
+            f"# Branch never taken: from {_describe_line(module, source_line)} "
+            f"to {_describe_line(module, target)}"
+        )
+    return "\n".join(out)
+
+
+def find_gaps(
+    module: ParsedModule,
+    coverage: Dict[str, Any],
+    names: Optional[Iterable[str]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Functions and classes with unexecuted lines or branches.
+
+    Args:
+        module: The parsed source the coverage was measured on
+        coverage: Coverage of that source (see validator.read_coverage)
+        names: Only consider these units, resolved like -f targets (a
+            method, or Class.method, is its own unit); default: every
+            top-level function and class
+
+    Returns:
+        List of dicts with 'name', 'missing_lines', 'missing_branches' and
+        'source' (the unit with each missing line marked and the branches
+        never taken listed below it), most uncovered first
+    """
+    if names is None:
+        units = [(node.name, node) for node in module.tree.body if isinstance(node, _UNIT_TYPES)]
+    else:
+        units = [
+            (name, node) for name in names
+            for node in [find_target(module.tree, name)[1]] if node is not None
+        ]
+    gaps = []
+    for name, node in units:
+        start = min([node.lineno] + [d.lineno for d in node.decorator_list])
+        end = getattr(node, "end_lineno", None) or node.lineno
+        lines = [n for n in coverage["missing_lines"] if start <= n <= end]
+        # A branch from a line that never ran says nothing the mark does not
+        branches = [
+            b for b in coverage["missing_branches"]
+            if start <= b[0] <= end and b[0] not in lines
+        ]
+        if not lines and not branches:
+            continue
+        gaps.append({
+            "name": name,
+            "missing_lines": lines,
+            "missing_branches": branches,
+            "source": _annotate(module, start, end, lines, branches)
+        })
+    gaps.sort(key=lambda g: len(g["missing_lines"]) + len(g["missing_branches"]), reverse=True)
+    return gaps
+
+
+def select_gaps(gaps: List[Dict[str, Any]], token_budget: int) -> List[Dict[str, Any]]:
+    """The most uncovered gaps whose sources fit token_budget (at least one)."""
+    selected = []
+    used = 0
+    for gap in gaps:
+        tokens = estimate_tokens(gap["source"])
+        if selected and used + tokens > token_budget:
+            break
+        selected.append(gap)
+        used += tokens
+    return selected
+
+
+def existing_test_names(test_code: str) -> List[str]:
+    """Names of the test functions and classes already in a test module."""
+    try:
+        tree = ast.parse(test_code)
+    except SyntaxError:
+        return []
+    return [
+        node.name for node in tree.body
+        if isinstance(node, _UNIT_TYPES) and node.name.lower().startswith("test")
+    ]
@@ -0,0 +1,347 @@
+"""Background generation jobs that outlive the request that started them."""
+
+import asyncio
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Tuple, Iterator, AsyncIterator
+
+from .cancellation import CancellationToken
+
+
+class Job:
+    """
+    One generation running in the background.
+
+    Records every progress event in order, so a client can poll the status
+    or replay the event stream from any index after reconnecting.
+    cancellation is the token its generation checks (thread jobs only).
+    """
+
+    def __init__(self, cancellation: Optional[CancellationToken] = None):
+        self.id = uuid.uuid4().hex
+        self.status = "queued"
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.events: List[Tuple[str, Dict[str, Any]]] = []
+        self.queue_position = 0
+        self.tokens = 0
+        self.test_cases = 0
+        self.cancellation = cancellation
+        self.cancel_requested = False
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed", "cancelled")
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Status view returned by GET /api/jobs/<id>."""
+        return {
+            "id": self.id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "queue_position": self.queue_position,
+            "tokens": self.tokens,
+            "test_cases": self.test_cases,
+            "events": len(self.events),
+            "result": self.result,
+            "error": self.error
+        }
+
+
+class _JobManagerBase:
+    """Shared bookkeeping for the thread and asyncio job managers."""
+
+    # Finished jobs are kept this long so a reloaded page can still fetch them
+    DEFAULT_RETENTION = 3600.0
+    # Idle seconds before an event stream sends a keep-alive
+    HEARTBEAT = 15.0
+
+    def __init__(self, retention: float = None):
+        self.retention = self.DEFAULT_RETENTION if retention is None else retention
+        self._jobs: Dict[str, Job] = {}
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Look up a job, or None if it is unknown or has expired."""
+        self._purge()
+        return self._jobs.get(job_id)
+
+    def _purge(self) -> None:
+        """Drop finished jobs older than the retention window."""
+        cutoff = time.time() - self.retention
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def _new_job(self, cancellation: Optional[CancellationToken] = None) -> Job:
+        self._purge()
+        job = Job(cancellation)
+        self._jobs[job.id] = job
+        return job
+
+    def _start(self, job: Job) -> None:
+        job.status = "running"
+        job.started_at = time.time()
+
+    def _record(self, job: Job, event: str, data: Dict[str, Any]) -> None:
+        """Apply one progress event to the job."""
+        job.events.append((event, data))
+        if event == "queued":
+            job.queue_position = data.get("position", 0)
+        elif event == "token":
+            job.queue_position = 0
+            job.tokens += 1
+        elif event == "test_case":
+            job.test_cases += 1
+        elif event == "result":
+            job.result = data
+
+    def _fail(self, job: Job, error: Exception) -> None:
+        job.error = str(error) or type(error).__name__
+        job.events.append(("error", {"error": job.error}))
+
+    def _request_cancel(self, job: Job) -> bool:
+        """Mark an unfinished job for cancellation; False if it already ended."""
+        if job.finished:
+            return False
+        job.cancel_requested = True
+        if job.cancellation is not None:
+            job.cancellation.cancel()
+        return True
+
+    def _finish(self, job: Job) -> None:
+        if job.result is None and job.error is None and job.cancel_requested:
+            job.events.append(("cancelled", {}))
+            job.status = "cancelled"
+        else:
+            if job.result is None and job.error is None:
+                self._fail(job, RuntimeError("Job ended without a result"))
+            job.status = "done" if job.error is None else "failed"
+        job.finished_at = time.time()
+
+    def _pending(self, job: Job, start: int) -> List[Tuple[int, str, Dict[str, Any]]]:
+        return [
+            (index, event, data)
+            for index, (event, data) in enumerate(job.events[start:], start)
+        ]
+
+    def stats(self) -> Dict[str, int]:
+        """Number of retained jobs by status."""
+        counts = {"queued": 0, "running": 0, "done": 0, "failed": 0, "cancelled": 0}
+        for job in list(self._jobs.values()):
+            counts[job.status] += 1
+        return counts
+
+
+class JobManager(_JobManagerBase):
+    """
+    Runs generations on background threads and keeps their results.
+
+    submit() takes an iterator of (event, data) pairs - the same events the
+    stream endpoint sends - and drains it on a worker thread. A 'result'
+    event becomes the job's result; an exception marks the job failed.
+    cancel() fires the job's CancellationToken; a job that then ends
+    without a result is marked cancelled.
+    """
+
+    DEFAULT_WORKERS = 4
+
+    def __init__(self, workers: int = None, retention: float = None):
+        super().__init__(retention)
+        self.workers = workers or self.DEFAULT_WORKERS
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._cond = threading.Condition()
+
+    def configure(self, workers: int = None, retention: float = None) -> None:
+        """Change limits; the worker count only applies before the first job."""
+        if workers and self._executor is None:
+            self.workers = workers
+        if retention is not None:
+            self.retention = retention
+
+    def submit(
+        self,
+        events: Iterator[Tuple[str, Dict[str, Any]]],
+        cancellation: Optional[CancellationToken] = None
+    ) -> Job:
+        """
+        Start draining events in the background and return the new job.
+
+        cancellation should be the token the events' generation checks,
+        so cancel() can stop it.
+        """
+        with self._cond:
+            job = self._new_job(cancellation)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="blast-job"
+                )
+        self._executor.submit(self._run, job, events)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._cond:
+            return super().get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        Ask a job to stop; returns it, or None if it is unknown.
+
+        The job is marked cancelled once its generation notices the token.
+        A job that already finished is left as it is.
+        """
+        with self._cond:
+            job = super().get(job_id)
+            if job is not None:
+                self._request_cancel(job)
+            return job
+
+    def _run(self, job: Job, events: Iterator[Tuple[str, Dict[str, Any]]]) -> None:
+        with self._cond:
+            self._start(job)
+            self._cond.notify_all()
+        try:
+            for event, data in events:
+                with self._cond:
+                    self._record(job, event, data)
+                    self._cond.notify_all()
+                    if job.cancel_requested:
+                        break
+        except Exception as e:
+            with self._cond:
+                self._fail(job, e)
+        finally:
+            close = getattr(events, "close", None)
+            if close:
+                close()
+            with self._cond:
+                self._finish(job)
+                self._cond.notify_all()
+
+    def follow(self, job: Job, start: int = 0) -> Iterator[Optional[Tuple[int, str, Dict[str, Any]]]]:
+        """
+        Yield (index, event, data) from index start until the job finishes.
+
+        Yields None after HEARTBEAT idle seconds so callers can keep the
+        connection alive while the job waits in the queue.
+        """
+        while True:
+            with self._cond:
+                pending = self._pending(job, start)
+                if not pending:
+                    if job.finished:
+                        return
+                    self._cond.wait(self.HEARTBEAT)
+                    pending = self._pending(job, start)
+            if not pending:
+                yield None
+            for item in pending:
+                yield item
+            start += len(pending)
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return super().stats()
+
+
+class AsyncJobManager(_JobManagerBase):
+    """asyncio counterpart of JobManager for the ASGI serving path."""
+
+    def __init__(self, retention: float = None):
+        super().__init__(retention)
+        self._cond: Optional[asyncio.Condition] = None
+        # Hold task references so running jobs are not garbage collected
+        self._tasks = set()
+        # Tasks whose generation has started and may be cancelled, by job id
+        self._running: Dict[str, asyncio.Task] = {}
+
+    def _condition(self) -> asyncio.Condition:
+        # Created on first use so it binds to the server's event loop
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        return self._cond
+
+    def configure(self, workers: int = None, retention: float = None) -> None:
+        """Change the retention window; jobs run as tasks, not workers."""
+        if retention is not None:
+            self.retention = retention
+
+    def submit(self, events: AsyncIterator[Tuple[str, Dict[str, Any]]]) -> Job:
+        """Start draining events in a task and return the new job."""
+        job = self._new_job()
+        task = asyncio.get_running_loop().create_task(self._run(job, events))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        Cancel a job's task; returns the job, or None if it is unknown.
+
+        Cancelling the task closes its connection to Ollama. A job whose
+        task has not run yet stops after its first event instead, since a
+        generation that never started could not release its scheduler
+        ticket. A job that already finished is left as it is.
+        """
+        job = self.get(job_id)
+        if job is not None and self._request_cancel(job):
+            task = self._running.get(job_id)
+            if task is not None:
+                task.cancel()
+        return job
+
+    async def _notify(self) -> None:
+        cond = self._condition()
+        async with cond:
+            cond.notify_all()
+
+    async def _run(self, job: Job, events: AsyncIterator[Tuple[str, Dict[str, Any]]]) -> None:
+        self._start(job)
+        # No await before the generation starts, so a cancel can never
+        # land between registering the task and entering the generator
+        self._running[job.id] = asyncio.current_task()
+        try:
+            async for event, data in events:
+                self._record(job, event, data)
+                await self._notify()
+                if job.cancel_requested:
+                    break
+        except asyncio.CancelledError:
+            if not job.cancel_requested:
+                raise
+        except Exception as e:
+            self._fail(job, e)
+        finally:
+            self._running.pop(job.id, None)
+            await events.aclose()
+            self._finish(job)
+            await self._notify()
+
+    async def follow(self, job: Job, start: int = 0) -> AsyncIterator[Optional[Tuple[int, str, Dict[str, Any]]]]:
+        """Async-iterate (index, event, data) like JobManager.follow."""
+        cond = self._condition()
+        while True:
+            async with cond:
+                pending = self._pending(job, start)
+                if not pending:
+                    if job.finished:
+                        return
+                    try:
+                        await asyncio.wait_for(cond.wait(), self.HEARTBEAT)
+                    except asyncio.TimeoutError:
+                        pass
+                    pending = self._pending(job, start)
+            if not pending:
+                yield None
+            for item in pending:
+                yield item
+            start += len(pending)
@@ -0,0 +1,88 @@
+"""Manifest of per-unit fingerprints stored next to generated tests."""
+
+import json
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+
+from .prompts import PROMPT_VERSION
+
+
+class TestManifest:
+    """
+    Records, for one generated test file, the fingerprint of every source
+    unit and the test code generated for it, plus the tests that coverage
+    re-prompting added with the fingerprints of the units they target.
+
+    Incremental runs compare fresh fingerprints against this record and
+    only re-prompt for units whose code changed.
+    """
+
+    VERSION = 1
+    SUFFIX = ".manifest.json"
+
+    def __init__(
+        self,
+        model: str,
+        units: Optional[Dict[str, Dict[str, Any]]] = None,
+        coverage: Optional[List[Dict[str, Any]]] = None
+    ):
+        self.model = model
+        self.units: Dict[str, Dict[str, Any]] = units or {}
+        # [{'fingerprints': {unit: fingerprint}, 'test_code': ...}]
+        self.coverage: List[Dict[str, Any]] = coverage or []
+
+    @classmethod
+    def path_for(cls, test_file: Path) -> Path:
+        """Manifest location for a generated test file."""
+        test_file = Path(test_file)
+        return test_file.with_name(test_file.stem + cls.SUFFIX)
+
+    @classmethod
+    def load(cls, test_file: Path, model: str) -> "TestManifest":
+        """
+        Load the manifest for a test file.
+
+        Returns an empty manifest when there is none, when it is unreadable,
+        or when it was produced by a different model, manifest version or
+        prompt template version, since none of its entries can be reused.
+        """
+        path = cls.path_for(test_file)
+        if not path.exists() or not Path(test_file).exists():
+            return cls(model)
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return cls(model)
+        if (
+            data.get("version") != cls.VERSION
+            or data.get("prompt_version") != PROMPT_VERSION
+            or data.get("model") != model
+        ):
+            return cls(model)
+        return cls(model, data.get("units", {}), data.get("coverage", []))
+
+    def save(self, test_file: Path) -> None:
+        """Write the manifest next to the test file."""
+        data = {
+            "version": self.VERSION,
+            "prompt_version": PROMPT_VERSION,
+            "model": self.model,
+            "units": self.units,
+            "coverage": self.coverage
+        }
+        self.path_for(test_file).write_text(json.dumps(data, indent=2), encoding="utf-8")
+
+    def is_current(self, name: str, fingerprint: str) -> bool:
+        """Check if a unit's recorded tests are still valid for this code."""
+        entry = self.units.get(name)
+        return bool(entry and entry.get("fingerprint") == fingerprint and entry.get("test_code"))
+
+    def current_coverage(self, fingerprints: Dict[str, str]) -> List[Dict[str, Any]]:
+        """Coverage tests whose target units have not changed since."""
+        return [
+            entry for entry in self.coverage
+            if entry.get("test_code") and entry.get("fingerprints") and all(
+                fingerprints.get(name) == fingerprint
+                for name, fingerprint in entry["fingerprints"].items()
+            )
+        ]
@@ -0,0 +1,83 @@
+"""Merge several generated pytest modules into one."""
+
+import ast
+from typing import List, Dict, Any
+
+
+def _segment(lines: List[str], node: ast.AST) -> str:
+    """Source text of a top-level node, including its decorators."""
+    start = node.lineno
+    decorators = getattr(node, "decorator_list", [])
+    if decorators:
+        start = min(d.lineno for d in decorators)
+    end = getattr(node, "end_lineno", None) or node.lineno
+    return "\n".join(lines[start - 1:end])
+
+
+def merge_test_modules(parts: List[str]) -> Dict[str, Any]:
+    """
+    Merge generated test modules into a single deduplicated module.
+
+    Imports from every part are hoisted to the top and deduplicated.
+    Identical definitions are kept once; a different definition reusing a
+    name is renamed with a numeric suffix so it does not shadow the first.
+    Parts that are not valid Python are dropped and reported.
+
+    Returns:
+        Dict with 'code' (merged source) and 'rejected' (indexes of
+        parts that failed to parse)
+    """
+    imports: List[str] = []
+    body: List[str] = []
+    seen_imports = set()
+    seen_blocks = set()
+    definitions: Dict[str, str] = {}
+    rejected = []
+
+    for index, part in enumerate(parts):
+        try:
+            tree = ast.parse(part)
+        except SyntaxError:
+            rejected.append(index)
+            continue
+
+        lines = part.splitlines()
+        for node in tree.body:
+            text = _segment(lines, node)
+
+            if isinstance(node, (ast.Import, ast.ImportFrom)):
+                if text not in seen_imports:
+                    seen_imports.add(text)
+                    imports.append(text)
+                continue
+
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                name = node.name
+                if name in definitions:
+                    if definitions[name] == text:
+                        continue
+                    suffix = 2
+                    while f"{name}_{suffix}" in definitions:
+                        suffix += 1
+                    new_name = f"{name}_{suffix}"
+                    text = text.replace(f"def {name}(", f"def {new_name}(", 1)
+                    text = text.replace(f"class {name}", f"class {new_name}", 1)
+                    name = new_name
+                definitions[name] = text
+                body.append(text)
+                continue
+
+            # Module docstrings from individual parts are noise once merged
+            if isinstance(node, ast.Expr) and isinstance(getattr(node, "value", None), ast.Constant):
+                continue
+
+            if text not in seen_blocks:
+                seen_blocks.add(text)
+                body.append(text)
+
+    sections = []
+    if imports:
+        sections.append("\n".join(imports))
+    sections.extend(body)
+    code = "\n\n\n".join(sections)
+    return {"code": code + "\n" if code else "", "rejected": rejected}
@@ -0,0 +1,223 @@
+"""Aggregate Ollama's per-response timing counters."""
+
+import threading
+from typing import Optional, Dict, Any, List, Tuple
+
+
+# Ollama reports durations in nanoseconds
+NANOSECONDS = 1e9
+
+# Response field -> metric name; durations are exported in seconds
+DURATION_FIELDS = {
+    "total_duration": "total_seconds",
+    "load_duration": "load_seconds",
+    "prompt_eval_duration": "prompt_eval_seconds",
+    "eval_duration": "eval_seconds"
+}
+COUNT_FIELDS = {
+    "prompt_eval_count": "prompt_tokens",
+    "eval_count": "eval_tokens"
+}
+
+SECONDS_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+TOKEN_BUCKETS = (16, 64, 256, 512, 1024, 2048, 4096, 8192)
+
+# Label used when a caller does not name its route
+DEFAULT_ROUTE = "default"
+
+_HELP = {
+    "total_seconds": "Wall time Ollama spent on the request",
+    "load_seconds": "Time spent loading the model",
+    "prompt_eval_seconds": "Time spent evaluating the prompt",
+    "eval_seconds": "Time spent generating the response",
+    "prompt_tokens": "Prompt tokens evaluated",
+    "eval_tokens": "Response tokens generated"
+}
+
+
+def response_timings(response: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Convert the counters of a final Ollama response to seconds and tokens.
+
+    Returns:
+        Dict keyed by metric name (see DURATION_FIELDS and COUNT_FIELDS)
+        plus 'tokens_per_second', or None when the response has no counters
+        (e.g. a cache hit)
+    """
+    if response.get("cached"):
+        return None
+    timings = {}
+    for field, name in DURATION_FIELDS.items():
+        if field in response:
+            timings[name] = round(response[field] / NANOSECONDS, 4)
+    for field, name in COUNT_FIELDS.items():
+        if field in response:
+            timings[name] = response[field]
+    if not timings:
+        return None
+    if timings.get("eval_seconds") and "eval_tokens" in timings:
+        timings["tokens_per_second"] = round(timings["eval_tokens"] / timings["eval_seconds"], 2)
+    return timings
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style."""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def copy(self) -> "Histogram":
+        copy = Histogram(self.buckets)
+        copy.counts = list(self.counts)
+        copy.count = self.count
+        copy.sum = self.sum
+        copy.max = self.max
+        return copy
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 4),
+            "mean": round(self.sum / self.count, 4) if self.count else 0.0,
+            "max": round(self.max, 4)
+        }
+
+
+class OllamaMetrics:
+    """
+    Thread-safe registry of Ollama timings, labelled by model and route.
+
+    Clients call observe() with each final response (or error()) so the
+    split between model loading, prompt evaluation and decoding is visible
+    per route, from the web app's /api/metrics or the CLI's --metrics.
+    """
+
+    OUTCOMES = ("ok", "cached", "error", "cancelled")
+
+    def __init__(self, namespace: str = "blast_ollama"):
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._requests: Dict[Tuple[str, str, str], int] = {}
+        self._histograms: Dict[Tuple[str, str, str], Histogram] = {}
+
+    def _count(self, model: str, route: Optional[str], outcome: str) -> None:
+        key = (model, route or DEFAULT_ROUTE, outcome)
+        self._requests[key] = self._requests.get(key, 0) + 1
+
+    def observe(self, response: Dict[str, Any], model: str, route: Optional[str] = None) -> None:
+        """Record a finished generation's counters."""
+        timings = response_timings(response)
+        route = route or DEFAULT_ROUTE
+        with self._lock:
+            self._count(model, route, "cached" if response.get("cached") else "ok")
+            for name, value in (timings or {}).items():
+                if name not in _HELP:
+                    continue
+                key = (name, model, route)
+                if key not in self._histograms:
+                    buckets = TOKEN_BUCKETS if name in COUNT_FIELDS.values() else SECONDS_BUCKETS
+                    self._histograms[key] = Histogram(buckets)
+                self._histograms[key].observe(value)
+
+    def error(self, model: str, route: Optional[str] = None) -> None:
+        """Record a generation that failed."""
+        with self._lock:
+            self._count(model, route, "error")
+
+    def cancelled(self, model: str, route: Optional[str] = None) -> None:
+        """Record a generation stopped because nobody wanted the answer."""
+        with self._lock:
+            self._count(model, route, "cancelled")
+
+    def reset(self) -> None:
+        """Drop every recorded sample."""
+        with self._lock:
+            self._requests.clear()
+            self._histograms.clear()
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        JSON-friendly view: {model: {route: {...}}}.
+
+        Each route has request counts by outcome, a count/sum/mean/max per
+        metric and the mean decode rate in 'tokens_per_second'.
+        """
+        with self._lock:
+            requests = dict(self._requests)
+            histograms = {key: h.summary() for key, h in self._histograms.items()}
+
+        models: Dict[str, Dict[str, Any]] = {}
+        for (model, route, outcome), count in sorted(requests.items()):
+            entry = models.setdefault(model, {}).setdefault(
+                route, {"requests": {o: 0 for o in self.OUTCOMES}}
+            )
+            entry["requests"][outcome] = count
+        for (name, model, route), stats in sorted(histograms.items()):
+            models.setdefault(model, {}).setdefault(
+                route, {"requests": {o: 0 for o in self.OUTCOMES}}
+            )[name] = stats
+        for routes in models.values():
+            for entry in routes.values():
+                seconds = entry.get("eval_seconds", {}).get("sum")
+                tokens = entry.get("eval_tokens", {}).get("sum")
+                if seconds and tokens:
+                    entry["tokens_per_second"] = round(tokens / seconds, 2)
+        return {"models": models}
+
+    def render_prometheus(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        with self._lock:
+            requests = sorted(self._requests.items())
+            histograms = [(key, h.copy()) for key, h in sorted(self._histograms.items())]
+
+        lines: List[str] = []
+        name = f"{self.namespace}_requests_total"
+        lines.append(f"# HELP {name} Generations by model, route and outcome")
+        lines.append(f"# TYPE {name} counter")
+        for (model, route, outcome), count in requests:
+            labels = _labels(model=model, route=route, outcome=outcome)
+            lines.append(f"{name}{labels} {count}")
+
+        for metric in _HELP:
+            name = f"{self.namespace}_{metric}"
+            series = [(key, h) for key, h in histograms if key[0] == metric]
+            if not series:
+                continue
+            lines.append(f"# HELP {name} {_HELP[metric]}")
+            lines.append(f"# TYPE {name} histogram")
+            for (_, model, route), histogram in series:
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    labels = _labels(model=model, route=route, le=_number(bound))
+                    lines.append(f"{name}_bucket{labels} {count}")
+                labels = _labels(model=model, route=route, le="+Inf")
+                lines.append(f"{name}_bucket{labels} {histogram.count}")
+                labels = _labels(model=model, route=route)
+                lines.append(f"{name}_sum{labels} {_number(histogram.sum)}")
+                lines.append(f"{name}_count{labels} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _number(value: float) -> str:
+    """Format a sample value without a trailing '.0' on integers."""
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _labels(**labels: str) -> str:
+    """Format a label set, escaping values as the exposition format requires."""
+    pairs = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{key}="{value}"')
+    return "{" + ",".join(pairs) + "}"
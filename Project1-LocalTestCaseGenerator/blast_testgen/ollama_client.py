@@ -1,95 +1,516 @@
 """Ollama API client for local LLM communication."""
 
+import json
+import re
 import requests
+import threading
 import time
-from typing import Optional, Dict, Any
+from requests.adapters import HTTPAdapter
+from typing import Optional, Dict, Any, Iterator, Union
+
+from .cache import GenerationCache
+from .cancellation import CancellationToken, GenerationCancelled
+from .metrics import OllamaMetrics
+from .resilience import RetryPolicy, CircuitBreaker, CircuitOpenError, retry_after_seconds
 
 
 class OllamaClient:
     """Client for interacting with Ollama local LLM server."""
-    
+
     DEFAULT_HOST = "http://localhost:11434"
     DEFAULT_MODEL = "llama3.2"
-    MAX_RETRIES = 3
-    RETRY_DELAY = 2
-    
-    def __init__(self, host: str = None, model: str = None):
+    POOL_SIZE = 10
+    HEALTH_TTL = 10.0
+    # How long Ollama keeps the model loaded after each request
+    KEEP_ALIVE = "30m"
+
+    def __init__(
+        self,
+        host: str = None,
+        model: str = None,
+        pool_size: int = None,
+        health_ttl: float = None,
+        cache: Optional[GenerationCache] = None,
+        keep_alive: Union[str, int, None] = None,
+        metrics: Optional[OllamaMetrics] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        breaker: Optional[CircuitBreaker] = None
+    ):
         self.host = host or self.DEFAULT_HOST
         self.model = model or self.DEFAULT_MODEL
         self.api_url = f"{self.host}/api/generate"
-    
-    def is_available(self) -> bool:
-        """Check if Ollama server is running."""
-        try:
-            response = requests.get(f"{self.host}/api/tags", timeout=5)
-            return response.status_code == 200
-        except requests.RequestException:
-            return False
-    
-    def generate(
-        self, 
-        prompt: str, 
-        temperature: float = 0.2,
-        num_predict: int = 2048,
-        stream: bool = False
-    ) -> Dict[str, Any]:
+        self.health_ttl = self.HEALTH_TTL if health_ttl is None else health_ttl
+        self.cache = cache
+        self.keep_alive = self.KEEP_ALIVE if keep_alive is None else parse_keep_alive(keep_alive)
+        # Receives every response's timing counters when set
+        self.metrics = metrics
+        # Timeouts and retries for /api/generate, and fail-fast while it is down
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+
+        # One keep-alive session shared by every call on this client
+        pool_size = pool_size or self.POOL_SIZE
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._health_lock = threading.Lock()
+        self._health: Optional[Dict[str, Any]] = None
+
+    def health(self, force: bool = False) -> Dict[str, Any]:
         """
-        Generate text using Ollama API.
-        
+        Return the cached health snapshot, probing /api/tags when it is stale.
+
         Args:
-            prompt: The prompt text
-            temperature: Creativity level (0.0 to 1.0)
-            num_predict: Max tokens to generate
-            stream: Whether to stream response
-            
+            force: Ignore the TTL and probe the server now
+
         Returns:
-            Dict containing 'response' and 'done' status
-            
-        Raises:
-            ConnectionError: If Ollama is not available
-            RuntimeError: If generation fails after retries
+            Dict with 'available', 'models', 'error' and 'checked_at'
         """
-        if not self.is_available():
-            raise ConnectionError(
-                f"Ollama not available at {self.host}. "
-                "Make sure Ollama is running (ollama serve)"
-            )
-        
+        with self._health_lock:
+            snapshot = self._health
+            if (
+                not force
+                and snapshot is not None
+                and time.monotonic() - snapshot["checked_at"] < self.health_ttl
+            ):
+                return snapshot
+
+            snapshot = {
+                "available": False,
+                "models": [],
+                "error": None,
+                "checked_at": time.monotonic()
+            }
+            try:
+                response = self.session.get(f"{self.host}/api/tags", timeout=5)
+                response.raise_for_status()
+                data = response.json()
+                snapshot["available"] = True
+                snapshot["models"] = [m["name"] for m in data.get("models", [])]
+            except (requests.RequestException, ValueError) as e:
+                snapshot["error"] = str(e)
+
+            self._health = snapshot
+            return snapshot
+
+    def invalidate_health(self) -> None:
+        """Drop the cached health snapshot so the next check probes again."""
+        with self._health_lock:
+            self._health = None
+
+    def is_available(self) -> bool:
+        """Check if Ollama server is running."""
+        return self.health()["available"]
+
+    def circuit_open(self) -> bool:
+        """True while the circuit breaker is refusing generations."""
+        return self.breaker.is_open()
+
+    def _build_payload(
+        self,
+        prompt: str,
+        temperature: float,
+        num_predict: int,
+        stream: bool,
+        format: Union[str, Dict[str, Any], None] = None
+    ) -> Dict[str, Any]:
+        """Build the /api/generate request body."""
         payload = {
             "model": self.model,
             "prompt": prompt,
             "stream": stream,
+            "keep_alive": self.keep_alive,
             "options": {
                 "temperature": temperature,
                 "num_predict": num_predict
             }
         }
-        
+        if format is not None:
+            payload["format"] = format
+        return payload
+
+    def warm_up(self) -> Dict[str, Any]:
+        """
+        Load the model into memory with an empty prompt.
+
+        Ollama loads the model and returns without generating, so the first
+        real request does not pay the load time. Also renews keep_alive.
+
+        Returns:
+            Dict with 'loaded', 'seconds' and 'error'
+        """
+        started = time.monotonic()
+        result = {"loaded": False, "seconds": 0.0, "error": None}
+        try:
+            response = self.session.post(
+                self.api_url,
+                json={
+                    "model": self.model,
+                    "prompt": "",
+                    "stream": False,
+                    "keep_alive": self.keep_alive
+                },
+                timeout=self.retry_policy.timeout
+            )
+            response.raise_for_status()
+            result["loaded"] = True
+            self._observe(response.json(), "warm_up")
+        except requests.ConnectionError as e:
+            self.invalidate_health()
+            result["error"] = str(e)
+        except (requests.RequestException, ValueError) as e:
+            result["error"] = str(e)
+        result["seconds"] = round(time.monotonic() - started, 2)
+        return result
+
+    def _observe(self, response: Dict[str, Any], route: Optional[str]) -> None:
+        """Hand a final response's counters to the metrics registry."""
+        if self.metrics is not None:
+            self.metrics.observe(response, self.model, route)
+
+    def _observe_error(self, route: Optional[str]) -> None:
+        if self.metrics is not None:
+            self.metrics.error(self.model, route)
+
+    def _observe_cancelled(self, route: Optional[str]) -> None:
+        if self.metrics is not None:
+            self.metrics.cancelled(self.model, route)
+
+    def _cache_key(self, payload: Dict[str, Any]) -> Optional[str]:
+        """Return the cache key for a payload, or None when caching is off."""
+        if self.cache is None:
+            return None
+        return self.cache.make_key(
+            payload["model"], payload["prompt"], payload["options"],
+            output_format=payload.get("format")
+        )
+
+    def _ensure_available(self) -> None:
+        """Raise ConnectionError when the cached health snapshot is down."""
+        if not self.is_available():
+            raise ConnectionError(
+                f"Ollama not available at {self.host}. "
+                "Make sure Ollama is running (ollama serve)"
+            )
+
+    def _post(
+        self,
+        payload: Dict[str, Any],
+        stream: bool = False,
+        cancel: Optional[CancellationToken] = None
+    ) -> requests.Response:
+        """
+        POST to /api/generate under the retry policy; returns the raw response.
+
+        Every outcome is reported to the circuit breaker: connection
+        errors, timeouts, 5xx and 429 count as failures, anything else as
+        success (a 4xx means the server is up but rejected this request).
+
+        Raises:
+            CircuitOpenError: If the breaker refuses the request
+            GenerationCancelled: If cancel fires before an attempt or
+                during the wait between attempts
+            RuntimeError: If the request fails and may not be retried
+        """
+        policy = self.retry_policy
         last_error = None
-        for attempt in range(self.MAX_RETRIES):
+        attempts = 0
+        while attempts < policy.max_attempts:
+            if cancel is not None:
+                cancel.raise_if_cancelled()
+            if not self.breaker.allow():
+                if last_error is None:
+                    raise CircuitOpenError(self.host, self.breaker.retry_in())
+                break
+            attempts += 1
+            retry_after = None
             try:
-                response = requests.post(
+                response = self.session.post(
                     self.api_url,
                     json=payload,
-                    timeout=300
+                    timeout=policy.timeout,
+                    stream=stream
                 )
-                response.raise_for_status()
-                return response.json()
+            except requests.ConnectionError as e:
+                # Includes connect timeouts; make the next health check re-probe
+                self.invalidate_health()
+                self.breaker.record_failure()
+                last_error = e
+                retryable = True
+            except requests.Timeout as e:
+                # Read timeout: the server took the work but did not finish it
+                self.breaker.record_failure()
+                last_error = e
+                retryable = policy.retry_read_timeouts
             except requests.RequestException as e:
+                self.breaker.record_failure()
                 last_error = e
-                if attempt < self.MAX_RETRIES - 1:
-                    time.sleep(self.RETRY_DELAY * (attempt + 1))
-        
+                retryable = True
+            else:
+                status = response.status_code
+                if status < 400:
+                    self.breaker.record_success()
+                    return response
+                if status >= 500 or status == 429:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+                retryable = policy.retryable_status(status)
+                retry_after = retry_after_seconds(response.headers.get("Retry-After"))
+                last_error = f"HTTP {status}: {response.text[:200]}"
+                response.close()
+
+            if not retryable or attempts >= policy.max_attempts:
+                break
+            delay = policy.delay(attempts - 1, retry_after)
+            if cancel is not None:
+                cancel.sleep(delay)
+            else:
+                time.sleep(delay)
+
         raise RuntimeError(
-            f"Failed to generate after {self.MAX_RETRIES} attempts: {last_error}"
+            f"Failed to generate after {attempts} attempt(s): {last_error}"
         )
-    
+
+    def generate(
+        self,
+        prompt: str,
+        temperature: float = 0.2,
+        num_predict: int = 2048,
+        stream: bool = False,
+        route: Optional[str] = None,
+        format: Union[str, Dict[str, Any], None] = None,
+        cancel: Optional[CancellationToken] = None
+    ) -> Union[Dict[str, Any], Iterator[Dict[str, Any]]]:
+        """
+        Generate text using Ollama API.
+
+        Args:
+            prompt: The prompt text
+            temperature: Creativity level (0.0 to 1.0)
+            num_predict: Max tokens to generate
+            stream: Return an iterator of chunks instead (see generate_stream)
+            route: Label for the caller in metrics (e.g. '/api/generate')
+            format: Ollama structured output, 'json' or a JSON schema such
+                as prompts.COMBINED_OUTPUT_SCHEMA the answer must match
+            cancel: Stop when this token fires; the answer is then
+                streamed internally so the check can run between chunks
+
+        Returns:
+            Dict containing 'response' and 'done' status
+
+        Raises:
+            ConnectionError: If Ollama is not available or its circuit
+                breaker is open (CircuitOpenError)
+            GenerationCancelled: If cancel fired before the answer finished
+            RuntimeError: If generation fails after retries
+        """
+        if stream:
+            return self.generate_stream(prompt, temperature, num_predict, route, format, cancel)
+        if cancel is not None:
+            return collect_stream(
+                self.generate_stream(prompt, temperature, num_predict, route, format, cancel)
+            )
+
+        payload = self._build_payload(prompt, temperature, num_predict, False, format)
+        key = self._cache_key(payload)
+        if key:
+            cached = self.cache.get(key)
+            if cached is not None:
+                result = dict(cached, cached=True)
+                self._observe(result, route)
+                return result
+
+        try:
+            self._ensure_available()
+            result = self._post(payload).json()
+        except (ConnectionError, RuntimeError, ValueError):
+            self._observe_error(route)
+            raise
+        self._observe(result, route)
+        if key and result.get("done", True):
+            self.cache.put(key, result)
+        return result
+
+    def generate_stream(
+        self,
+        prompt: str,
+        temperature: float = 0.2,
+        num_predict: int = 2048,
+        route: Optional[str] = None,
+        format: Union[str, Dict[str, Any], None] = None,
+        cancel: Optional[CancellationToken] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Stream a generation as Ollama's NDJSON chunks.
+
+        Each yielded dict carries a partial 'response' string; the last one
+        has 'done' set to True along with Ollama's timing counters. Retries
+        only happen before the first chunk arrives.
+
+        cancel is checked as each chunk arrives. Once it fires, or the
+        caller stops iterating, the connection is closed and Ollama stops
+        generating. Ollama sends nothing before the first token, so a
+        cancel during model loading or prompt evaluation is noticed then.
+
+        Raises:
+            ConnectionError: If Ollama is not available or its circuit
+                breaker is open (CircuitOpenError)
+            GenerationCancelled: If cancel fired before the answer finished
+            RuntimeError: If the request fails after retries or mid-stream
+        """
+        payload = self._build_payload(prompt, temperature, num_predict, True, format)
+        key = self._cache_key(payload)
+        if key:
+            cached = self.cache.get(key)
+            if cached is not None:
+                # Replay the whole answer as a single final chunk
+                chunk = dict(cached, done=True, cached=True)
+                self._observe(chunk, route)
+                yield chunk
+                return
+
+        try:
+            self._ensure_available()
+            response = self._post(payload, stream=True, cancel=cancel)
+        except GenerationCancelled:
+            self._observe_cancelled(route)
+            raise
+        except (ConnectionError, RuntimeError):
+            self._observe_error(route)
+            raise
+        parts = []
+        finished = cancelled = False
+        try:
+            for line in response.iter_lines():
+                if cancel is not None and cancel.cancelled:
+                    cancelled = True
+                    raise GenerationCancelled("Generation cancelled")
+                if not line:
+                    continue
+                try:
+                    chunk = json.loads(line)
+                except ValueError:
+                    continue
+                if "error" in chunk:
+                    raise RuntimeError(f"Ollama error: {chunk['error']}")
+                parts.append(chunk.get("response", ""))
+                yield chunk
+                if chunk.get("done"):
+                    finished = True
+                    self._observe(chunk, route)
+                    if key:
+                        self.cache.put(key, dict(chunk, response="".join(parts)))
+                    break
+        except requests.RequestException as e:
+            self.breaker.record_failure()
+            raise RuntimeError(f"Stream interrupted: {e}")
+        except GeneratorExit:
+            # The caller stopped iterating (e.g. its client disconnected)
+            cancelled = True
+            raise
+        finally:
+            # Closing mid-answer drops the connection, which cancels the work in Ollama
+            response.close()
+            if cancelled:
+                self._observe_cancelled(route)
+            elif not finished:
+                self._observe_error(route)
+
     def list_models(self) -> list:
         """List available models in Ollama."""
+        snapshot = self.health()
+        if not snapshot["available"]:
+            raise ConnectionError(f"Cannot list models: {snapshot['error']}")
+        return list(snapshot["models"])
+
+    def close(self) -> None:
+        """Close pooled connections."""
+        self.session.close()
+
+
+def collect_stream(chunks: Iterator[Dict[str, Any]]) -> Dict[str, Any]:
+    """Join streamed chunks into the single response generate() returns."""
+    parts = []
+    final: Dict[str, Any] = {}
+    for chunk in chunks:
+        parts.append(chunk.get("response", ""))
+        final = chunk
+    return dict(final, response="".join(parts))
+
+
+def parse_keep_alive(keep_alive: Union[str, int, None]) -> Union[str, int, None]:
+    """
+    Normalise a keep_alive setting for the Ollama API.
+
+    Ollama reads a number as seconds but rejects a numeric string, which
+    has no duration unit, so "300" and "-1" (from the command line)
+    become ints. Durations such as "30m" are passed through unchanged.
+    """
+    if isinstance(keep_alive, str) and re.fullmatch(r"-?\d+", keep_alive.strip()):
+        return int(keep_alive)
+    return keep_alive
+
+
+def keep_alive_seconds(keep_alive: Union[str, int, float, None]) -> Optional[float]:
+    """
+    Convert an Ollama keep_alive value ("30m", "1h", 300, "-1") to seconds.
+
+    Returns:
+        Seconds, or None when the model stays loaded indefinitely or the
+        value cannot be parsed
+    """
+    if keep_alive is None:
+        return None
+    if isinstance(keep_alive, (int, float)):
+        seconds = float(keep_alive)
+    else:
+        text = keep_alive.strip()
         try:
-            response = requests.get(f"{self.host}/api/tags", timeout=5)
-            response.raise_for_status()
-            data = response.json()
-            return [m["name"] for m in data.get("models", [])]
-        except requests.RequestException as e:
-            raise ConnectionError(f"Cannot list models: {e}")
+            seconds = float(text)
+        except ValueError:
+            parts = re.findall(r"(-?\d+(?:\.\d+)?)(ms|h|m|s)", text)
+            if not parts or "".join(n + u for n, u in parts) != text:
+                return None
+            units = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+            seconds = sum(float(n) * units[u] for n, u in parts)
+    return seconds if seconds > 0 else None
+
+
+class KeepAliveRefresher:
+    """
+    Re-sends the warm-up request on an interval while a server is idle.
+
+    Every request already renews keep_alive; this covers quiet periods so
+    the model is still loaded when the next request arrives.
+    """
+
+    def __init__(self, client, interval: Optional[float] = None):
+        self.client = client
+        if interval is None:
+            seconds = keep_alive_seconds(client.keep_alive)
+            # Renew halfway through the window; nothing to do if it never expires
+            interval = seconds / 2 if seconds else None
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "KeepAliveRefresher":
+        """Start the background thread (no-op without an interval)."""
+        if self.interval and self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="blast-keep-alive", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            if self.client.is_available():
+                self.client.warm_up()
+
+    def stop(self) -> None:
+        """Stop refreshing."""
+        self._stop.set()
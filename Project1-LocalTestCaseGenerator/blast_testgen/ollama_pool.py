@@ -0,0 +1,322 @@
+"""Route generations across several Ollama hosts."""
+
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, Iterator, List, Union
+
+from .cache import GenerationCache
+from .cancellation import CancellationToken
+from .metrics import OllamaMetrics
+from .ollama_client import OllamaClient
+from .resilience import RetryPolicy
+
+
+def parse_hosts(hosts: Union[str, List[str], None]) -> List[str]:
+    """Split a comma-separated host string (or list) into clean host URLs."""
+    if not hosts:
+        return []
+    if isinstance(hosts, str):
+        hosts = hosts.split(",")
+    return [host.strip().rstrip("/") for host in hosts if host.strip()]
+
+
+def create_client(
+    hosts: Union[str, List[str], None] = None,
+    model: str = None,
+    pool_size: int = None,
+    cache: Optional[GenerationCache] = None,
+    keep_alive: Union[str, int, None] = None,
+    metrics: Optional[OllamaMetrics] = None,
+    retry_policy: Optional[RetryPolicy] = None
+) -> Union[OllamaClient, "OllamaPool"]:
+    """
+    Build a client for one host, or a pool when several are given.
+
+    Args:
+        hosts: Host URL, comma-separated host URLs, or a list of them
+        retry_policy: Timeouts and retries (see resilience.RetryPolicy)
+    """
+    hosts = parse_hosts(hosts)
+    if len(hosts) > 1:
+        return OllamaPool(
+            hosts,
+            model=model,
+            pool_size=pool_size,
+            cache=cache,
+            keep_alive=keep_alive,
+            metrics=metrics,
+            retry_policy=retry_policy
+        )
+    return OllamaClient(
+        host=hosts[0] if hosts else None,
+        model=model,
+        pool_size=pool_size,
+        cache=cache,
+        keep_alive=keep_alive,
+        metrics=metrics,
+        retry_policy=retry_policy
+    )
+
+
+class OllamaPool:
+    """
+    A set of Ollama hosts behind the OllamaClient API.
+
+    Each request goes to the healthy host with the fewest requests in
+    flight that has the model pulled (per its /api/tags). A host whose
+    health check fails, or whose circuit breaker is open, is skipped
+    until it recovers, and a request that fails on one host is retried on
+    the next candidate.
+    """
+
+    def __init__(
+        self,
+        hosts: List[str],
+        model: str = None,
+        pool_size: int = None,
+        health_ttl: float = None,
+        cache: Optional[GenerationCache] = None,
+        keep_alive: Union[str, int, None] = None,
+        metrics: Optional[OllamaMetrics] = None,
+        retry_policy: Optional[RetryPolicy] = None
+    ):
+        hosts = parse_hosts(hosts)
+        if not hosts:
+            raise ValueError("OllamaPool needs at least one host")
+        self.clients = [
+            OllamaClient(
+                host=host,
+                model=model,
+                pool_size=pool_size,
+                health_ttl=health_ttl,
+                cache=cache,
+                keep_alive=keep_alive,
+                metrics=metrics,
+                # Fail over to another host instead of retrying a dead one
+                retry_policy=(retry_policy or RetryPolicy()).with_attempts(1)
+            )
+            for host in hosts
+        ]
+        self.model = self.clients[0].model
+        self.cache = cache
+        self.metrics = metrics
+        self.host = ",".join(hosts)
+
+        self._lock = threading.Lock()
+        self._outstanding = {client.host: 0 for client in self.clients}
+        self._served = {client.host: 0 for client in self.clients}
+        # Rotates the tie-break so equally loaded hosts share the work
+        self._turn = itertools.count()
+
+    @property
+    def keep_alive(self) -> Union[str, int]:
+        return self.clients[0].keep_alive
+
+    @keep_alive.setter
+    def keep_alive(self, value: Union[str, int]) -> None:
+        for client in self.clients:
+            client.keep_alive = value
+
+    def warm_up(self) -> Dict[str, Any]:
+        """
+        Load the model on every healthy host in parallel.
+
+        Returns:
+            Dict with 'loaded' (any host), 'seconds' (slowest host), 'error'
+            and per-host results under 'hosts'
+        """
+        healthy = [c for c in self.clients if c.health()["available"]]
+        with ThreadPoolExecutor(max_workers=max(1, len(healthy))) as executor:
+            results = list(executor.map(lambda c: c.warm_up(), healthy))
+        hosts = [dict(result, host=c.host) for c, result in zip(healthy, results)]
+        loaded = [h for h in hosts if h["loaded"]]
+        return {
+            "loaded": bool(loaded),
+            "seconds": max((h["seconds"] for h in hosts), default=0.0),
+            "error": None if loaded else (
+                "; ".join(f"{h['host']}: {h['error']}" for h in hosts)
+                or "No Ollama host available"
+            ),
+            "hosts": hosts
+        }
+
+    def _has_model(self, snapshot: Dict[str, Any]) -> bool:
+        """Check a host's /api/tags snapshot for the pool's model."""
+        wanted = self.model if ":" in self.model else f"{self.model}:latest"
+        return any(name in (self.model, wanted) for name in snapshot["models"])
+
+    def _candidates(self) -> List[OllamaClient]:
+        """
+        Healthy hosts ordered by preference.
+
+        Hosts with the model come before hosts without it, then fewer
+        in-flight requests first. Falls back to every host when none is
+        healthy, so cached answers are still served and errors still
+        name a host.
+        """
+        healthy = []
+        for client in self.clients:
+            snapshot = client.health()
+            if snapshot["available"] and not client.circuit_open():
+                healthy.append((client, self._has_model(snapshot)))
+        if not healthy:
+            return list(self.clients)
+
+        turn = next(self._turn)
+        count = len(self.clients)
+        with self._lock:
+            ranked = sorted(
+                healthy,
+                key=lambda item: (
+                    not item[1],
+                    self._outstanding[item[0].host],
+                    (self.clients.index(item[0]) - turn) % count
+                )
+            )
+        return [client for client, _ in ranked]
+
+    def _acquire(self, client: OllamaClient) -> None:
+        with self._lock:
+            self._outstanding[client.host] += 1
+            self._served[client.host] += 1
+
+    def _release(self, client: OllamaClient) -> None:
+        with self._lock:
+            self._outstanding[client.host] -= 1
+
+    def health(self, force: bool = False) -> Dict[str, Any]:
+        """
+        Aggregate health of every host.
+
+        Returns:
+            Dict with the same keys as OllamaClient.health() - the pool is
+            available when any host is, and 'models' is the union - plus
+            'hosts' with each host's snapshot and load
+        """
+        hosts = []
+        for client in self.clients:
+            snapshot = client.health(force=force)
+            with self._lock:
+                outstanding = self._outstanding[client.host]
+                served = self._served[client.host]
+            hosts.append({
+                "host": client.host,
+                "available": snapshot["available"],
+                "models": snapshot["models"],
+                "error": snapshot["error"],
+                "outstanding": outstanding,
+                "served": served,
+                "circuit": client.breaker.snapshot()
+            })
+
+        available = [h for h in hosts if h["available"]]
+        models = sorted({m for h in available for m in h["models"]})
+        return {
+            "available": bool(available),
+            "models": models,
+            "error": None if available else "; ".join(
+                f"{h['host']}: {h['error']}" for h in hosts
+            ),
+            "checked_at": time.monotonic(),
+            "hosts": hosts
+        }
+
+    def invalidate_health(self) -> None:
+        """Make every host re-probe on its next health check."""
+        for client in self.clients:
+            client.invalidate_health()
+
+    def is_available(self) -> bool:
+        """Check if any Ollama host is running."""
+        return any(client.health()["available"] for client in self.clients)
+
+    def circuit_open(self) -> bool:
+        """True while every host's circuit breaker is refusing generations."""
+        return all(client.circuit_open() for client in self.clients)
+
+    def generate(
+        self,
+        prompt: str,
+        temperature: float = 0.2,
+        num_predict: int = 2048,
+        stream: bool = False,
+        route: Optional[str] = None,
+        format: Union[str, Dict[str, Any], None] = None,
+        cancel: Optional[CancellationToken] = None
+    ) -> Union[Dict[str, Any], Iterator[Dict[str, Any]]]:
+        """
+        Generate text on the least-loaded healthy host.
+
+        Raises:
+            ConnectionError: If no host is available
+            GenerationCancelled: If cancel fired (no other host is tried)
+            RuntimeError: If generation fails on every host
+        """
+        if stream:
+            return self.generate_stream(prompt, temperature, num_predict, route, format, cancel)
+
+        last_error = None
+        for client in self._candidates():
+            self._acquire(client)
+            try:
+                return client.generate(
+                    prompt, temperature, num_predict, route=route, format=format,
+                    cancel=cancel
+                )
+            except (ConnectionError, RuntimeError) as e:
+                last_error = e
+            finally:
+                self._release(client)
+        raise last_error
+
+    def generate_stream(
+        self,
+        prompt: str,
+        temperature: float = 0.2,
+        num_predict: int = 2048,
+        route: Optional[str] = None,
+        format: Union[str, Dict[str, Any], None] = None,
+        cancel: Optional[CancellationToken] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Stream a generation from the least-loaded healthy host.
+
+        Fails over to the next host only before the first chunk arrives.
+
+        Raises:
+            ConnectionError: If no host is available
+            GenerationCancelled: If cancel fired (no other host is tried)
+            RuntimeError: If the request fails on every host or mid-stream
+        """
+        last_error = None
+        for client in self._candidates():
+            started = False
+            self._acquire(client)
+            try:
+                for chunk in client.generate_stream(
+                    prompt, temperature, num_predict, route, format, cancel
+                ):
+                    started = True
+                    yield chunk
+                return
+            except (ConnectionError, RuntimeError) as e:
+                if started:
+                    raise
+                last_error = e
+            finally:
+                self._release(client)
+        raise last_error
+
+    def list_models(self) -> list:
+        """List models available on any healthy host."""
+        snapshot = self.health()
+        if not snapshot["available"]:
+            raise ConnectionError(f"Cannot list models: {snapshot['error']}")
+        return list(snapshot["models"])
+
+    def close(self) -> None:
+        """Close every host's pooled connections."""
+        for client in self.clients:
+            client.close()
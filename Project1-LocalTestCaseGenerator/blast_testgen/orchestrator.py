@@ -1,26 +1,86 @@
 """Test generation orchestrator - coordinates parsing, prompting, and output."""
 
 import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 from .ollama_client import OllamaClient
+from .ollama_pool import create_client
+from .cache import GenerationCache
 from .code_parser import CodeAnalyzer
-from .prompts import build_test_prompt
+from .prompts import (
+    compact_test_prompt, build_coverage_prompt, field_schema, COMBINED_OUTPUT_SCHEMA
+)
+from .slicer import slice_for_target
+from .compaction import estimate_tokens, DEFAULT_TOKEN_BUDGET
+from .coverage_gaps import find_gaps, select_gaps, existing_test_names
+from .response_parser import parse_json_answer
+from .structured import empty_answer, repair_answer
+from .merger import merge_test_modules
+from .manifest import TestManifest
+from .validator import TestValidator
+
+
+def merge_compaction(stats: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Combine per-prompt compaction stats into one total, or None if empty."""
+    if not stats:
+        return None
+    original = sum(s["original_tokens"] for s in stats)
+    tokens = sum(s["tokens"] for s in stats)
+    return {
+        "original_tokens": original,
+        "tokens": tokens,
+        "ratio": round(tokens / original, 3) if original else 1.0,
+        "prompts": sum(s.get("prompts", 1) for s in stats)
+    }
 
 
 class TestGenerator:
     """Main orchestrator for test generation workflow."""
     
-    def __init__(self, ollama_host: Optional[str] = None, model: Optional[str] = None):
-        self.client = OllamaClient(host=ollama_host, model=model)
+    DEFAULT_UNIT_WORKERS = 2
+    DEFAULT_COVERAGE_TOKEN_BUDGET = 8000
+    MAX_COVERAGE_ROUNDS = 5
+    
+    def __init__(
+        self,
+        ollama_host: Optional[str] = None,
+        model: Optional[str] = None,
+        client: Optional[OllamaClient] = None,
+        cache: Optional[GenerationCache] = None,
+        token_budget: Optional[int] = None,
+        slice_depth: Optional[int] = None,
+        structured: bool = False,
+        validator: Optional[TestValidator] = None,
+        coverage_target: Optional[float] = None,
+        coverage_token_budget: Optional[int] = None
+    ):
+        # A comma-separated ollama_host spreads work over an OllamaPool
+        self.client = client or create_client(
+            ollama_host, model=model, cache=cache
+        )
         self.analyzer = CodeAnalyzer()
+        # Source tokens allowed per prompt (see compaction.compact_source)
+        self.token_budget = token_budget
+        # Reference hops kept in full around a target (see slicer)
+        self.slice_depth = slice_depth
+        # Schema-constrained answers with pytest_code repair (see structured)
+        self.structured = structured
+        # Runs each generated test file against its source when set
+        self.validator = validator or (TestValidator() if coverage_target else None)
+        # Percent coverage to re-prompt for, and the tokens it may spend
+        self.coverage_target = coverage_target
+        self.coverage_token_budget = coverage_token_budget or self.DEFAULT_COVERAGE_TOKEN_BUDGET
     
     def generate_tests(
         self,
         source_path: str,
         target_function: Optional[str] = None,
-        output_path: Optional[str] = None
+        output_path: Optional[str] = None,
+        split: bool = False,
+        max_workers: Optional[int] = None,
+        incremental: bool = False
     ) -> Dict[str, Any]:
         """
         Generate tests for a source file.
@@ -29,9 +89,17 @@ class TestGenerator:
             source_path: Path to source code file
             target_function: Specific function to test (optional)
             output_path: Where to save tests (optional)
+            split: Prompt once per top-level function/class and merge
+            max_workers: Concurrent unit generations in split mode
+            incremental: Split mode that only re-prompts for units whose
+                AST fingerprint changed since the last run
             
         Returns:
-            Dict with test_file_path, test_content, functions_tested, success
+            Dict with test_file_path, test_content, functions_tested, success,
+            prompt 'compaction' stats (plus per-unit 'units' results in
+            split mode, the dependency 'slice' for a target function, the
+            subprocess test run as 'validation' when a validator is set, and
+            the re-prompting rounds as 'coverage' with a coverage_target)
         """
         # Read source code
         try:
@@ -39,62 +107,356 @@ class TestGenerator:
         except FileNotFoundError as e:
             return {"success": False, "error": str(e)}
         
-        # Validate Python syntax
-        is_valid, error = self.analyzer.validate_python(code)
-        if not is_valid:
+        # Validate Python syntax (the parse is reused for everything below)
+        try:
+            module = self.analyzer.parse(code)
+        except SyntaxError as error:
             return {"success": False, "error": f"Invalid syntax: {error}"}
         
         # Determine what to test
+        sliced = None
         if target_function:
-            test_code = self.analyzer.get_function_code(code, target_function)
-            if not test_code:
+            # The target plus the helpers, classes and constants it uses
+            sliced = slice_for_target(
+                module, target_function, self.slice_depth, self.token_budget
+            )
+            if not sliced:
                 return {
                     "success": False, 
                     "error": f"Function '{target_function}' not found"
                 }
+            test_code = sliced["code"]
             functions_to_test = [target_function]
         else:
             test_code = code
-            functions = self.analyzer.extract_functions(code)
+            functions = module.functions
             functions_to_test = [f["name"] for f in functions]
         
         if not functions_to_test:
-            return {"success": False, "error": "No functions found to test"}
-        
-        # Build prompt
-        prompt = build_test_prompt(test_code, target_function)
-        
-        # Generate tests via Ollama
-        try:
-            response = self.client.generate(prompt)
-            generated_code = self._extract_code(response.get("response", ""))
-        except Exception as e:
-            return {"success": False, "error": f"Generation failed: {e}"}
+            return {
+                "success": False,
+                "skipped": True,
+                "error": "No functions found to test"
+            }
         
         # Determine output path
         if not output_path:
             source = Path(source_path)
             output_path = source.parent / f"test_{source.name}"
+        output_path = Path(output_path)
+        
+        units = None
+        manifest = None
+        # Earlier coverage re-prompting tests that still apply (incremental)
+        kept_coverage = []
+        if (split or incremental) and not target_function:
+            fingerprints = module.unit_fingerprints()
+            if incremental:
+                manifest = TestManifest.load(output_path, self.client.model)
+            
+            pending = []
+            units = []
+            for unit in module.units:
+                name = unit["name"]
+                if manifest and manifest.is_current(name, fingerprints[name]):
+                    units.append({
+                        "name": name,
+                        "kind": unit["kind"],
+                        "success": True,
+                        "reused": True,
+                        "test_code": manifest.units[name]["test_code"]
+                    })
+                else:
+                    pending.append(unit)
+                    units.append(None)
+            
+            generated_units = iter(self._generate_units(module.imports, pending, max_workers))
+            units = [u if u is not None else next(generated_units) for u in units]
+            
+            generated = [u for u in units if u["success"]]
+            if not generated:
+                return {
+                    "success": False,
+                    "error": f"Generation failed for all {len(units)} unit(s)",
+                    "units": units
+                }
+            if manifest:
+                kept_coverage = manifest.current_coverage(fingerprints)
+            merged = merge_test_modules(
+                [u["test_code"] for u in generated] + [c["test_code"] for c in kept_coverage]
+            )
+            rejected = set(merged["rejected"])
+            for index in rejected:
+                if index < len(generated):
+                    generated[index].update(success=False, error="Generated code is not valid Python")
+            kept_coverage = [
+                c for index, c in enumerate(kept_coverage, len(generated))
+                if index not in rejected
+            ]
+            generated_code = merged["code"]
+            if not generated_code:
+                return {
+                    "success": False,
+                    "error": "No unit produced valid test code",
+                    "units": units
+                }
+        else:
+            # Build prompt
+            built = compact_test_prompt(
+                test_code,
+                target_function,
+                self.token_budget,
+                keep=set(sliced["keep"]) if sliced else None
+            )
+            compaction = built["compaction"]
+            
+            # Generate tests via Ollama
+            try:
+                generated_code = self._generate_code(built["prompt"], route="file")
+            except Exception as e:
+                return {"success": False, "error": f"Generation failed: {e}"}
+        
+        validation = None
+        coverage = None
+        if self.coverage_target:
+            improved = self._improve_coverage(
+                module, code, generated_code, source_path,
+                names=functions_to_test if target_function else None
+            )
+            generated_code = improved["code"]
+            validation = improved["validation"]
+            coverage = improved["coverage"]
+            if units is not None:
+                # Recorded against the units they target, so the next
+                # incremental run keeps them while those units are unchanged
+                kept_coverage = kept_coverage + [
+                    {
+                        "fingerprints": {
+                            name: fingerprints[name]
+                            for name in added["targets"] if name in fingerprints
+                        },
+                        "test_code": added["test_code"]
+                    }
+                    for added in improved["added"]
+                ]
         
         # Write test file
         try:
-            output_path = Path(output_path)
             output_path.write_text(generated_code, encoding="utf-8")
+            if incremental and units is not None:
+                TestManifest(self.client.model, {
+                    u["name"]: {
+                        "kind": u["kind"],
+                        "fingerprint": fingerprints[u["name"]],
+                        "test_code": u["test_code"]
+                    }
+                    for u in units if u["success"]
+                }, kept_coverage).save(output_path)
         except Exception as e:
             return {"success": False, "error": f"Failed to write file: {e}"}
         
-        return {
+        result = {
             "success": True,
             "test_file_path": str(output_path),
             "test_content": generated_code,
             "functions_tested": functions_to_test
         }
+        if units is not None:
+            for unit in units:
+                unit.pop("test_code", None)
+            result["units"] = units
+            compaction = merge_compaction(
+                [u["compaction"] for u in units if "compaction" in u]
+            )
+        result["compaction"] = compaction
+        if sliced:
+            result["slice"] = {
+                "included": sliced["included"],
+                "stubbed": sliced["stubbed"]
+            }
+        if coverage:
+            result["coverage"] = coverage
+        if validation is None and self.validator:
+            source = Path(source_path)
+            validation = self.validator.validate(
+                generated_code, code, module_name=source.stem, source_dir=str(source.parent)
+            )
+        if validation is not None:
+            result["validation"] = validation
+        return result
+    
+    def _improve_coverage(
+        self,
+        module,
+        code: str,
+        generated_code: str,
+        source_path: str,
+        names: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Re-prompt only for the code the generated tests leave unexecuted.
+        
+        Each round measures line and branch coverage, asks for tests of the
+        least-covered functions and classes (uncovered lines marked in the
+        prompt) and keeps the new tests if coverage rose without new
+        failures. Stops at coverage_target, once coverage_token_budget
+        (estimated prompt plus answer tokens) is spent, after a round that
+        was not kept, or after MAX_COVERAGE_ROUNDS.
+        
+        Returns:
+            Dict with the final test 'code', its 'validation', a
+            'coverage' report ('target', 'initial_percent', 'percent',
+            'tokens' spent and per-round 'rounds') and the tests each
+            accepted round 'added' with the units it 'targets'
+        """
+        source = Path(source_path)
+        
+        def measure(test_code: str) -> Dict[str, Any]:
+            return self.validator.validate(
+                test_code, code, module_name=source.stem,
+                source_dir=str(source.parent), coverage=True
+            )
+        
+        validation = measure(generated_code)
+        measured = validation.get("coverage")
+        report = {
+            "target": self.coverage_target,
+            "initial_percent": measured["percent"] if measured else None,
+            "percent": measured["percent"] if measured else None,
+            "tokens": 0,
+            "rounds": []
+        }
+        added = []
+        if not measured:
+            if not self.validator.coverage_available():
+                report["error"] = "coverage.py is not installed"
+            else:
+                report["error"] = validation["error"] or "Coverage could not be measured"
+            return {
+                "code": generated_code, "validation": validation, "coverage": report,
+                "added": added
+            }
+        
+        while (
+            measured["percent"] < self.coverage_target
+            and report["tokens"] < self.coverage_token_budget
+            and len(report["rounds"]) < self.MAX_COVERAGE_ROUNDS
+        ):
+            gaps = select_gaps(
+                find_gaps(module, measured, names), self.token_budget or DEFAULT_TOKEN_BUDGET
+            )
+            if not gaps:
+                break
+            prompt = build_coverage_prompt(
+                source.stem, gaps, existing_test_names(generated_code)
+            )
+            round_report = {
+                "targets": [gap["name"] for gap in gaps],
+                "accepted": False,
+                "percent": measured["percent"]
+            }
+            report["rounds"].append(round_report)
+            try:
+                new_code = self._generate_code(
+                    prompt, route="coverage", schema=field_schema("pytest_code")
+                )
+            except Exception as e:
+                report["error"] = f"Generation failed: {e}"
+                break
+            round_report["tokens"] = estimate_tokens(prompt) + estimate_tokens(new_code)
+            report["tokens"] += round_report["tokens"]
+            
+            merged = merge_test_modules([generated_code, new_code])
+            if 1 in merged["rejected"]:
+                break
+            candidate = measure(merged["code"])
+            covered = candidate.get("coverage")
+            new_failures = (candidate["failed"] + candidate["errors"]
+                            > validation["failed"] + validation["errors"])
+            if not covered or covered["percent"] <= measured["percent"] or new_failures:
+                break
+            generated_code, validation, measured = merged["code"], candidate, covered
+            round_report.update(accepted=True, percent=measured["percent"])
+            added.append({"targets": round_report["targets"], "test_code": new_code})
+        
+        report["percent"] = measured["percent"]
+        return {
+            "code": generated_code, "validation": validation, "coverage": report,
+            "added": added
+        }
+    
+    def _generate_units(
+        self,
+        imports: str,
+        units: List[Dict[str, Any]],
+        max_workers: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Generate tests for top-level function and class units concurrently.
+        
+        Every unit prompt carries the module's imports so the model sees
+        the names the unit depends on. A failing unit is reported but does
+        not abort the others.
+        
+        Returns:
+            List of dicts with 'name', 'kind', 'success' and either
+            'test_code' or 'error', in the order of units
+        """
+        if not units:
+            return []
+        
+        def run(unit: Dict[str, Any]) -> Dict[str, Any]:
+            result = {"name": unit["name"], "kind": unit["kind"]}
+            source = f"{imports}\n\n{unit['source']}" if imports else unit["source"]
+            try:
+                built = compact_test_prompt(source, unit["name"], self.token_budget)
+                result["compaction"] = built["compaction"]
+                result["test_code"] = self._generate_code(built["prompt"], route="unit")
+                result["success"] = True
+            except Exception as e:
+                result["success"] = False
+                result["error"] = f"Generation failed: {e}"
+            return result
+        
+        workers = max(1, max_workers or self.DEFAULT_UNIT_WORKERS)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(run, units))
+    
+    def _generate_code(
+        self,
+        prompt: str,
+        route: str,
+        schema: Dict[str, Any] = COMBINED_OUTPUT_SCHEMA
+    ) -> str:
+        """
+        Generate and extract pytest code for a prompt.
+        
+        In structured mode the answer is constrained to schema (the
+        combined one by default), and an invalid pytest_code is asked for
+        again on its own.
+        """
+        if not self.structured:
+            response = self.client.generate(prompt, route=route)
+            return self._extract_code(response.get("response", ""))
+        
+        response = self.client.generate(prompt, route=route, format=schema)
+        text = response.get("response", "")
+        answer = parse_json_answer(text) or empty_answer()
+        repair_answer(self.client, prompt, answer, fields=("pytest_code",))
+        if answer["pytest_code"]:
+            return answer["pytest_code"].strip()
+        return self._extract_code(text)
     
     def _extract_code(self, response: str) -> str:
         """
         Extract clean Python code from LLM response.
         Removes markdown code blocks if present.
         """
+        # The combined prompt asks for JSON; prefer its pytest_code field
+        answer = parse_json_answer(response)
+        if answer and answer["pytest_code"]:
+            return answer["pytest_code"].strip()
+        
         # Try to extract from markdown code block
         code_block_pattern = r"```python\n(.*?)\n```"
         match = re.search(code_block_pattern, response, re.DOTALL)
@@ -1,7 +1,14 @@
 """Prompt templates for test generation."""
 
-from typing import Optional
+import json
+from typing import Optional, Dict, Any, List, Set
 
+from .compaction import compact_source
+
+
+# Bump whenever a template (or how input is compacted) changes so cached
+# generations are not reused
+PROMPT_VERSION = "3"
 
 # Universal prompt for any input (code or text)
 COMBINED_TEST_GENERATION_PROMPT = """You are a QA Test Engineer. Generate test cases based on this input:
@@ -43,6 +50,142 @@ Rules:
 Return ONLY valid JSON. No markdown, no explanations."""
 
 
-def build_test_prompt(user_input: str, target_function: Optional[str] = None) -> str:
+# JSON schemas for Ollama structured outputs ("format"), matching the
+# output format COMBINED_TEST_GENERATION_PROMPT describes
+TEST_CASE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "id": {"type": "string"},
+        "title": {"type": "string"},
+        "type": {"type": "string", "enum": ["POSITIVE", "NEGATIVE"]},
+        "steps": {"type": "array", "items": {"type": "string"}},
+        "expected": {"type": "string"}
+    },
+    "required": ["id", "title", "type", "steps", "expected"]
+}
+
+FIELD_SCHEMAS = {
+    "manual_test_cases": {"type": "array", "items": TEST_CASE_SCHEMA, "minItems": 1},
+    "pytest_code": {"type": "string"}
+}
+
+COMBINED_OUTPUT_SCHEMA = {
+    "type": "object",
+    "properties": FIELD_SCHEMAS,
+    "required": list(FIELD_SCHEMAS)
+}
+
+# Appended to the original prompt when one field of the answer is unusable;
+# keeping the original as a prefix lets Ollama reuse its evaluated context
+REPAIR_PROMPT = """
+
+Your previous answer did not contain a valid "{field}" field.{context}
+
+Return ONLY a JSON object with the "{field}" field: {description}"""
+
+FIELD_DESCRIPTIONS = {
+    "manual_test_cases": "2-4 manual test cases, each with id, title, type "
+                         "(POSITIVE or NEGATIVE), steps and expected.",
+    "pytest_code": "simple, runnable pytest code as a single string."
+}
+
+
+def field_schema(field: str) -> Dict[str, Any]:
+    """Structured-output schema for a JSON object holding only field."""
+    return {
+        "type": "object",
+        "properties": {field: FIELD_SCHEMAS[field]},
+        "required": [field]
+    }
+
+
+def build_repair_prompt(prompt: str, field: str, answer: Dict[str, Any]) -> str:
+    """
+    Ask again for one field of a combined answer.
+
+    Args:
+        prompt: The prompt that produced the answer
+        field: 'manual_test_cases' or 'pytest_code'
+        answer: The parsed answer; its other, valid field is shown so the
+            replacement stays consistent with it
+    """
+    context = ""
+    other = "pytest_code" if field == "manual_test_cases" else "manual_test_cases"
+    if answer.get(other):
+        context = f" Keep it consistent with the {other} you already gave:\n" + json.dumps(
+            {other: answer[other]}, indent=2
+        )
+    return prompt + REPAIR_PROMPT.format(
+        field=field, context=context, description=FIELD_DESCRIPTIONS[field]
+    )
+
+
+# Follow-up prompt asking only for tests of code the existing tests miss
+COVERAGE_PROMPT = """You are a QA Test Engineer. The existing pytest tests for module `{module_name}` leave some of its code unexecuted.
+
+Lines marked `# NOT COVERED` never ran, and the branches never taken are listed after each definition:
+```
+{gaps}
+```
+
+Existing tests (do not repeat them): {test_names}
+
+Write NEW pytest tests that execute the marked lines and take the listed branches. Import what you need from `{module_name}`.
+
+Output format (STRICT JSON):
+{{
+  "pytest_code": "import pytest\\nfrom {module_name} import ...\\ndef test_...():\\n    ..."
+}}
+
+Return ONLY valid JSON. No markdown, no explanations."""
+
+
+def build_coverage_prompt(
+    module_name: str,
+    gaps: List[Dict[str, Any]],
+    test_names: List[str]
+) -> str:
+    """
+    Ask for tests of the uncovered code only.
+
+    Args:
+        module_name: Import name of the source under test
+        gaps: Annotated units from coverage_gaps.find_gaps
+        test_names: Tests the module already has
+    """
+    return COVERAGE_PROMPT.format(
+        module_name=module_name,
+        gaps="\n\n".join(gap["source"] for gap in gaps),
+        test_names=", ".join(test_names) or "none"
+    )
+
+
+def compact_test_prompt(
+    user_input: str,
+    target_function: Optional[str] = None,
+    token_budget: Optional[int] = None,
+    keep: Optional[Set[str]] = None
+) -> Dict[str, Any]:
+    """
+    Build a test-generation prompt from compacted input.
+
+    Args:
+        keep: Extra names (besides the target) compaction must not stub
+
+    Returns:
+        Dict with 'prompt' and 'compaction' (token counts, ratio and the
+        steps applied; see compact_source)
+    """
+    compaction = compact_source(user_input, target_function, token_budget, keep)
+    prompt = COMBINED_TEST_GENERATION_PROMPT.format(user_input=compaction.pop("code"))
+    return {"prompt": prompt, "compaction": compaction}
+
+
+def build_test_prompt(
+    user_input: str,
+    target_function: Optional[str] = None,
+    token_budget: Optional[int] = None,
+    keep: Optional[Set[str]] = None
+) -> str:
     """Build a prompt for test generation."""
-    return COMBINED_TEST_GENERATION_PROMPT.format(user_input=user_input)
+    return compact_test_prompt(user_input, target_function, token_budget, keep)["prompt"]
@@ -0,0 +1,149 @@
+"""
+Long-lived pytest process for WarmTestValidator.
+
+Started with ``python -c`` (so this package is not on its import path)
+and arguments: CPU seconds per run, memory limit in bytes, then modules
+to import up front. Reads one JSON request per line on stdin:
+{"dir": ..., "paths": [...], "args": [...]}, runs pytest in-process and
+answers with one JSON line: {"exit_code": ..., "output": ...}.
+
+Where os.fork exists each run happens in a forked child, so it starts
+from the warm parent's state and nothing it does outlives it; a child
+killed by its CPU or memory limit is answered with {"crashed": true}.
+Elsewhere runs happen in-process and everything a run can change that
+later runs would see is put back afterwards: modules imported during the
+run are dropped from sys.modules, and sys.path, the working directory,
+os.environ and the standard streams are restored.
+"""
+
+import importlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Characters of pytest output returned per run
+OUTPUT_TAIL_CHARS = 4000
+
+
+def _limit_cpu(seconds: int) -> None:
+    """Allow this run `seconds` more CPU time than used so far."""
+    if resource is None or seconds <= 0:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    used = int(usage.ru_utime + usage.ru_stime) + 1
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    resource.setrlimit(resource.RLIMIT_CPU, (used + seconds, hard))
+
+
+def run(request, baseline_modules, cpu_seconds):
+    """Run one pytest session; modules not in baseline_modules are dropped after."""
+    import pytest
+
+    saved_path = list(sys.path)
+    saved_env = dict(os.environ)
+    saved_cwd = os.getcwd()
+    saved_streams = sys.stdout, sys.stderr
+    output = io.StringIO()
+    exit_code = -1
+    try:
+        os.chdir(request["dir"])
+        sys.path[:0] = request["paths"]
+        os.environ.update(HOME=request["dir"], TMPDIR=request["dir"])
+        tempfile.tempdir = None
+        sys.stdout = sys.stderr = output
+        _limit_cpu(cpu_seconds)
+        exit_code = int(pytest.main(request["args"]))
+    except BaseException as e:
+        output.write(f"\n{type(e).__name__}: {e}\n")
+    finally:
+        sys.stdout, sys.stderr = saved_streams
+        os.chdir(saved_cwd)
+        sys.path[:] = saved_path
+        os.environ.clear()
+        os.environ.update(saved_env)
+        tempfile.tempdir = None
+        for name in set(sys.modules) - (baseline_modules or set(sys.modules)):
+            del sys.modules[name]
+        for path in request["paths"] + [request["dir"]]:
+            sys.path_importer_cache.pop(path, None)
+    return {"exit_code": exit_code, "output": output.getvalue()[-OUTPUT_TAIL_CHARS:]}
+
+
+def run_forked(request, baseline_modules, cpu_seconds):
+    """run() in a forked child; the parent only relays its reply."""
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_end)
+        try:
+            data = json.dumps(run(request, baseline_modules, cpu_seconds)).encode()
+            with os.fdopen(write_end, "wb") as f:
+                f.write(data)
+        finally:
+            os._exit(0)
+
+    os.close(write_end)
+    with os.fdopen(read_end, "rb") as f:
+        data = f.read()
+    os.waitpid(pid, 0)
+    if not data:
+        return {"crashed": True}
+    return json.loads(data)
+
+
+def _warm_up() -> None:
+    """Run a trivial test once so pytest's lazily imported plugins load now."""
+    warm_dir = tempfile.mkdtemp(prefix="blast_worker_")
+    try:
+        with open(os.path.join(warm_dir, "test_warm_up.py"), "w") as f:
+            f.write("def test_warm_up():\n    assert True\n")
+        run({
+            "dir": warm_dir,
+            "paths": [warm_dir],
+            "args": ["test_warm_up.py", "-q", "-p", "no:cacheprovider",
+                     "--junitxml=report.xml", "--rootdir", warm_dir]
+        }, None, 0)
+        sys.modules.pop("test_warm_up", None)
+    finally:
+        shutil.rmtree(warm_dir, ignore_errors=True)
+
+
+def main():
+    cpu_seconds, memory_bytes = int(sys.argv[1]), int(sys.argv[2])
+    # Replies go to a private copy of stdout; fd 1 itself is silenced so
+    # stray writes from tests (or their subprocesses) cannot corrupt them
+    protocol = os.fdopen(os.dup(1), "w", buffering=1)
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+
+    if resource is not None and memory_bytes > 0:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+
+    import pytest  # noqa: F401 - imported once, reused by every run
+    for name in sys.argv[3:]:
+        try:
+            importlib.import_module(name)
+        except Exception:
+            pass
+    _warm_up()
+    baseline_modules = set(sys.modules)
+
+    execute = run_forked if hasattr(os, "fork") else run
+    protocol.write(json.dumps({"ready": True, "pid": os.getpid()}) + "\n")
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        reply = execute(json.loads(line), baseline_modules, cpu_seconds)
+        protocol.write(json.dumps(reply) + "\n")
+
+
+if __name__ == "__main__":
+    main()
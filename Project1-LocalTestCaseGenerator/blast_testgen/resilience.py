@@ -0,0 +1,200 @@
+"""Retry policy and circuit breaker for calls to Ollama."""
+
+import random
+import threading
+import time
+from typing import Optional, Dict, Any, Callable, Iterable, Tuple
+
+# Statuses that mean "try again later" rather than "this request is wrong"
+RETRYABLE_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+
+
+class CircuitOpenError(ConnectionError):
+    """Raised instead of calling a backend whose circuit breaker is open."""
+
+    def __init__(self, host: str, retry_in: float):
+        super().__init__(
+            f"Ollama at {host} is failing; not sending requests for {retry_in:.0f}s"
+        )
+        self.retry_in = retry_in
+
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Parse a numeric Retry-After header (HTTP dates are ignored)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+class RetryPolicy:
+    """
+    How long to wait for Ollama and when to try a request again.
+
+    Connecting gets a short timeout and reading a long one, since a
+    generation can legitimately take minutes while a refused or hanging
+    connect means the server is down. Connection failures and retryable
+    statuses (RETRYABLE_STATUSES) are retried; other 4xx answers are not,
+    and neither are read timeouts unless retry_read_timeouts is set, as
+    the server already accepted that work. Waits grow exponentially with
+    full jitter, so callers that failed together do not retry together,
+    and a longer Retry-After from the server is honoured.
+    """
+
+    DEFAULT_MAX_ATTEMPTS = 3
+    DEFAULT_BASE_DELAY = 1.0
+    DEFAULT_MAX_DELAY = 30.0
+    DEFAULT_CONNECT_TIMEOUT = 5.0
+    DEFAULT_READ_TIMEOUT = 300.0
+
+    def __init__(
+        self,
+        max_attempts: int = None,
+        base_delay: float = None,
+        max_delay: float = None,
+        connect_timeout: float = None,
+        read_timeout: float = None,
+        retry_read_timeouts: bool = False,
+        retry_statuses: Iterable[int] = RETRYABLE_STATUSES,
+        rng: Optional[random.Random] = None
+    ):
+        self.max_attempts = max(1, max_attempts or self.DEFAULT_MAX_ATTEMPTS)
+        self.base_delay = self.DEFAULT_BASE_DELAY if base_delay is None else base_delay
+        self.max_delay = self.DEFAULT_MAX_DELAY if max_delay is None else max_delay
+        self.connect_timeout = connect_timeout or self.DEFAULT_CONNECT_TIMEOUT
+        self.read_timeout = read_timeout or self.DEFAULT_READ_TIMEOUT
+        self.retry_read_timeouts = retry_read_timeouts
+        self.retry_statuses = frozenset(retry_statuses)
+        self.rng = rng or random.Random()
+
+    @property
+    def timeout(self) -> Tuple[float, float]:
+        """(connect, read) timeout in the form requests accepts."""
+        return self.connect_timeout, self.read_timeout
+
+    def with_attempts(self, max_attempts: int) -> "RetryPolicy":
+        """A copy of this policy allowing max_attempts attempts."""
+        return RetryPolicy(
+            max_attempts, self.base_delay, self.max_delay, self.connect_timeout,
+            self.read_timeout, self.retry_read_timeouts, self.retry_statuses, self.rng
+        )
+
+    def retryable_status(self, status: int) -> bool:
+        return status in self.retry_statuses
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Seconds to sleep after failed attempt number attempt (0-based).
+
+        Full jitter: uniform between 0 and base_delay * 2**attempt, capped
+        at max_delay; never shorter than the server's Retry-After.
+        """
+        ceiling = min(self.max_delay, self.base_delay * (2 ** attempt))
+        delay = self.rng.uniform(0, ceiling)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+
+
+class CircuitBreaker:
+    """
+    Fail fast while a backend keeps failing.
+
+    Closed, requests flow and consecutive failures are counted. After
+    failure_threshold of them the breaker opens and allow() refuses every
+    request for reset_timeout seconds. It then lets a single trial request
+    through (half-open): success closes it, failure opens it again. A
+    trial whose outcome is never reported (its caller was cancelled)
+    stops blocking others after another reset_timeout. Thread-safe.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    DEFAULT_FAILURE_THRESHOLD = 5
+    DEFAULT_RESET_TIMEOUT = 30.0
+
+    def __init__(
+        self,
+        failure_threshold: int = None,
+        reset_timeout: float = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.failure_threshold = failure_threshold or self.DEFAULT_FAILURE_THRESHOLD
+        self.reset_timeout = reset_timeout or self.DEFAULT_RESET_TIMEOUT
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_started: Optional[float] = None
+        self._opened = 0
+
+    def _current_state(self) -> str:
+        if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self._state
+
+    def _retry_in(self) -> float:
+        if self._current_state() != self.OPEN:
+            return 0.0
+        return max(0.0, self.reset_timeout - (self._clock() - self._opened_at))
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def is_open(self) -> bool:
+        """True while requests are being refused (no trial is due yet)."""
+        return self.state == self.OPEN
+
+    def retry_in(self) -> float:
+        """Seconds until the next trial request is allowed (0 when closed)."""
+        with self._lock:
+            return self._retry_in()
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now; claims the half-open trial."""
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            now = self._clock()
+            if state == self.HALF_OPEN and (
+                self._trial_started is None
+                or now - self._trial_started >= self.reset_timeout
+            ):
+                self._state = self.HALF_OPEN
+                self._trial_started = now
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_started = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self._opened += 1
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+                self._trial_started = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """State, consecutive failures, seconds until a trial and times opened."""
+        with self._lock:
+            return {
+                "state": self._current_state(),
+                "failures": self._failures,
+                "retry_in": round(self._retry_in(), 1),
+                "opened": self._opened
+            }
@@ -0,0 +1,267 @@
+"""Incremental parser for the model's combined JSON answer."""
+
+import json
+import re
+from typing import Optional, Dict, Any, List
+
+# Top-level keys the model uses for each field (first is the canonical one)
+CASE_KEYS = ("manual_test_cases", "test_cases")
+CODE_KEYS = ("pytest_code", "python_code")
+
+# Characters the scanner has to look at; everything else is skipped in C
+_SIGNIFICANT = re.compile(r'[{}\[\]":,\\]')
+
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+_PYTHON_BLOCK = re.compile(r"```python\s*([\s\S]*?)\s*```")
+
+# Shown when the answer holds no usable JSON at all
+PLACEHOLDER_CASE = {
+    "id": "TC_001",
+    "title": "Generated Test",
+    "type": "INFO",
+    "steps": ["See generated pytest code below"],
+    "expected": "Code should execute successfully"
+}
+
+
+def _loads_lenient(text: str) -> Any:
+    """json.loads, retrying once without trailing commas."""
+    try:
+        return json.loads(text)
+    except ValueError:
+        return json.loads(_TRAILING_COMMA.sub(r"\1", text))
+
+
+class StreamingResponseParser:
+    """
+    Extract manual test cases and pytest code from streamed model output.
+
+    feed() takes chunks as they arrive and returns the manual test cases
+    whose objects closed in that chunk, so results can be shown before
+    the model finishes. Only structural characters are examined, and each
+    test case or code string is decoded once when it closes, so the
+    buffer is never rescanned. Prose or code fences around the JSON,
+    trailing text after it, and a single malformed case are tolerated;
+    finish() falls back to a ```python block or the raw text when the
+    answer holds no JSON.
+    """
+
+    def __init__(self):
+        self.test_cases: List[Dict[str, Any]] = []
+        self.pytest_code: Optional[str] = None
+        # Case entries that closed but did not decode
+        self.malformed = 0
+
+        self._chunks: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._done = False
+        # Key of the top-level member being read, once its ':' is seen
+        self._key: Optional[str] = None
+        self._last_string: Optional[str] = None
+        self._in_cases = False
+        # Pieces of the value being captured (a case object or a string)
+        self._capture: Optional[List[str]] = None
+        self._capture_from = 0
+        self._capture_kind: Optional[str] = None
+
+    @property
+    def structured(self) -> bool:
+        """True once any field has been read from JSON."""
+        return bool(self.test_cases) or self.pytest_code is not None
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """Consume a chunk; return the test cases completed by it."""
+        if not chunk:
+            return []
+        self._chunks.append(chunk)
+        if self._done:
+            return []
+
+        completed = []
+        self._capture_from = 0
+        skip_to = 0
+        if self._escaped:
+            # The previous chunk ended on a backslash
+            self._escaped = False
+            skip_to = 1
+
+        for match in _SIGNIFICANT.finditer(chunk):
+            index = match.start()
+            if index < skip_to:
+                continue
+            char = match.group()
+
+            if self._in_string:
+                if char == "\\":
+                    skip_to = index + 2
+                    if skip_to > len(chunk):
+                        self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._capture_kind in ("string", "code"):
+                        self._end_capture(chunk, index)
+                continue
+
+            if self._depth == 0 and char != "{":
+                # Prose before the answer object, quotes and all
+                continue
+
+            if char == '"':
+                self._in_string = True
+                if self._depth == 1 and self._capture is None:
+                    # Top-level keys and string values are worth keeping
+                    self._start_capture(index, "code" if self._key in CODE_KEYS else "string")
+            elif char in "{[":
+                self._depth += 1
+                if self._depth == 2 and char == "[" and self._key in CASE_KEYS:
+                    self._in_cases = True
+                elif self._depth == 3 and char == "{" and self._in_cases:
+                    self._start_capture(index, "case")
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 2 and char == "}" and self._capture_kind == "case":
+                    case = self._end_capture(chunk, index)
+                    if case is not None:
+                        completed.append(case)
+                elif self._depth == 1 and self._in_cases:
+                    self._in_cases = False
+                elif self._depth == 0:
+                    self._key = None
+                    if self.structured:
+                        # Anything after the answer object is prose
+                        self._done = True
+                        break
+            elif self._depth == 1:
+                if char == ":":
+                    self._key = self._last_string
+                elif char == ",":
+                    self._key = None
+
+        if self._capture is not None and not self._done:
+            self._capture.append(chunk[self._capture_from:])
+        return completed
+
+    def _start_capture(self, index: int, kind: str) -> None:
+        self._capture = []
+        self._capture_from = index
+        self._capture_kind = kind
+
+    def _end_capture(self, chunk: str, index: int) -> Optional[Dict[str, Any]]:
+        """Decode the captured value that ends at chunk[index]."""
+        self._capture.append(chunk[self._capture_from:index + 1])
+        text = "".join(self._capture)
+        kind = self._capture_kind
+        self._capture = None
+        self._capture_kind = None
+
+        try:
+            value = _loads_lenient(text)
+        except ValueError:
+            if kind == "case":
+                self.malformed += 1
+            return None
+
+        if kind == "case":
+            if isinstance(value, dict):
+                self.test_cases.append(value)
+                return value
+            self.malformed += 1
+        elif kind == "code":
+            if self.pytest_code is None and isinstance(value, str):
+                self.pytest_code = value
+        else:
+            self._last_string = value
+        return None
+
+    def _partial_code(self) -> Optional[str]:
+        """Best-effort decode of a pytest_code string cut off mid-stream."""
+        if self._capture_kind != "code" or self._capture is None:
+            return None
+        text = "".join(self._capture).rstrip("\\")
+        try:
+            return json.loads(text + '"')
+        except ValueError:
+            return None
+
+    def finish(self) -> Dict[str, Any]:
+        """
+        Return the parsed answer.
+
+        Returns:
+            Dict with 'manual_test_cases' and 'pytest_code', in the shape
+            web_app.parse_combined_response has always returned
+        """
+        if self.pytest_code is None:
+            self.pytest_code = self._partial_code()
+        if self.structured:
+            return {
+                "manual_test_cases": list(self.test_cases),
+                "pytest_code": self.pytest_code or ""
+            }
+
+        # No JSON: fall back to a python block or the raw text
+        text = "".join(self._chunks)
+        code_match = _PYTHON_BLOCK.search(text)
+        return {
+            "manual_test_cases": [dict(PLACEHOLDER_CASE)],
+            "pytest_code": code_match.group(1) if code_match else text
+        }
+
+
+def _first_value(data: Dict[str, Any], keys) -> Any:
+    for key in keys:
+        if key in data:
+            return data[key]
+    return None
+
+
+def parse_json_answer(text: str) -> Optional[Dict[str, Any]]:
+    """
+    Read the JSON fields of a complete model answer.
+
+    Well-formed answers are decoded with a single json.loads over the
+    outermost braces; anything else goes through StreamingResponseParser,
+    which recovers what it can entry by entry.
+
+    Returns:
+        Dict with 'manual_test_cases' and 'pytest_code', or None when the
+        answer holds no JSON fields
+    """
+    start = text.find("{")
+    if start == -1:
+        return None
+    end = text.rfind("}")
+    if end > start:
+        try:
+            data = _loads_lenient(text[start:end + 1])
+        except ValueError:
+            data = None
+        if isinstance(data, dict):
+            cases = _first_value(data, CASE_KEYS)
+            code = _first_value(data, CODE_KEYS)
+            if (isinstance(cases, list) and cases) or isinstance(code, str):
+                return {
+                    "manual_test_cases": [
+                        c for c in cases if isinstance(c, dict)
+                    ] if isinstance(cases, list) else [],
+                    "pytest_code": code if isinstance(code, str) else ""
+                }
+
+    parser = StreamingResponseParser()
+    parser.feed(text)
+    result = parser.finish()
+    return result if parser.structured else None
+
+
+def parse_model_response(text: str) -> Dict[str, Any]:
+    """Parse a complete model answer, falling back like finish() does."""
+    result = parse_json_answer(text)
+    if result is not None:
+        return result
+    code_match = _PYTHON_BLOCK.search(text)
+    return {
+        "manual_test_cases": [dict(PLACEHOLDER_CASE)],
+        "pytest_code": code_match.group(1) if code_match else text
+    }
@@ -0,0 +1,233 @@
+"""Admission control for requests that reach Ollama."""
+
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, asynccontextmanager
+from typing import Optional, Dict, Any, Iterator, AsyncIterator
+
+from .cancellation import CancellationToken
+
+
+class QueueFullError(RuntimeError):
+    """Raised when the scheduler queue is full; carries a Retry-After hint."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Generation queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class Ticket:
+    """A request's place in the scheduler: queued, then running, then done."""
+
+    def __init__(self, scheduler: "_SchedulerBase"):
+        self.scheduler = scheduler
+        self.enqueued_at = time.monotonic()
+        self.admitted_at: Optional[float] = None
+        self.initial_position = 0
+        self.released = False
+
+    @property
+    def wait_ms(self) -> int:
+        """Milliseconds spent queued before admission."""
+        end = self.admitted_at or time.monotonic()
+        return int((end - self.enqueued_at) * 1000)
+
+
+class _SchedulerBase:
+    """Shared bookkeeping for the thread and asyncio schedulers."""
+
+    DEFAULT_MAX_CONCURRENT = 2
+    DEFAULT_MAX_QUEUE = 16
+    # Seed for the service-time average before any request has finished
+    INITIAL_SERVICE_SECONDS = 30.0
+
+    def __init__(self, max_concurrent: int = None, max_queue: int = None):
+        self.max_concurrent = max_concurrent or self.DEFAULT_MAX_CONCURRENT
+        self.max_queue = self.DEFAULT_MAX_QUEUE if max_queue is None else max_queue
+        self._queue: deque = deque()
+        self._active = 0
+        self._avg_service = self.INITIAL_SERVICE_SECONDS
+        self._rejected = 0
+
+    def configure(self, max_concurrent: int = None, max_queue: int = None) -> None:
+        """Change limits; takes effect for the next admission decision."""
+        if max_concurrent:
+            self.max_concurrent = max_concurrent
+        if max_queue is not None:
+            self.max_queue = max_queue
+
+    def retry_after(self) -> int:
+        """Estimate seconds until a queue slot frees up."""
+        waves = (len(self._queue) + 1) / self.max_concurrent
+        return max(1, math.ceil(self._avg_service * waves))
+
+    def position(self, ticket: Ticket) -> int:
+        """1-based queue position, or 0 once admitted."""
+        try:
+            return self._queue.index(ticket) + 1
+        except ValueError:
+            return 0
+
+    def _new_ticket(self) -> Ticket:
+        """Create and enqueue a ticket, or raise QueueFullError."""
+        if self._active >= self.max_concurrent and len(self._queue) >= self.max_queue:
+            self._rejected += 1
+            raise QueueFullError(self.retry_after())
+        ticket = Ticket(self)
+        self._queue.append(ticket)
+        ticket.initial_position = len(self._queue)
+        return ticket
+
+    def _can_admit(self, ticket: Ticket) -> bool:
+        return bool(self._queue) and self._queue[0] is ticket and self._active < self.max_concurrent
+
+    def _admit(self, ticket: Ticket) -> None:
+        self._queue.popleft()
+        self._active += 1
+        ticket.admitted_at = time.monotonic()
+
+    def _finish(self, ticket: Ticket) -> None:
+        """Release a ticket's slot or queue entry; safe to call twice."""
+        if ticket.released:
+            return
+        ticket.released = True
+        if ticket.admitted_at is None:
+            if ticket in self._queue:
+                self._queue.remove(ticket)
+            return
+        self._active -= 1
+        service = time.monotonic() - ticket.admitted_at
+        self._avg_service = 0.8 * self._avg_service + 0.2 * service
+
+    def stats(self) -> Dict[str, Any]:
+        """Current load and limits."""
+        return {
+            "active": self._active,
+            "queued": len(self._queue),
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "rejected": self._rejected,
+            "avg_service_seconds": round(self._avg_service, 2)
+        }
+
+
+class RequestScheduler(_SchedulerBase):
+    """
+    Limits concurrent Ollama requests and queues the rest FIFO.
+
+    At most max_concurrent requests run at once and at most max_queue wait;
+    beyond that enqueue() raises QueueFullError with a Retry-After estimate
+    based on a moving average of recent service times.
+    """
+
+    POLL_INTERVAL = 1.0
+
+    def __init__(self, max_concurrent: int = None, max_queue: int = None):
+        super().__init__(max_concurrent, max_queue)
+        self._cond = threading.Condition()
+
+    def enqueue(self) -> Ticket:
+        """Join the queue without waiting; raises QueueFullError when full."""
+        with self._cond:
+            return self._new_ticket()
+
+    def wait(self, ticket: Ticket, cancel: Optional[CancellationToken] = None) -> Iterator[int]:
+        """
+        Block until the ticket is admitted.
+
+        Yields the ticket's queue position whenever it changes, so callers
+        can report progress; returns once the request may run. cancel is
+        checked every POLL_INTERVAL; the caller still has to release the
+        ticket after GenerationCancelled.
+        """
+        last = None
+        while True:
+            if cancel is not None:
+                cancel.raise_if_cancelled()
+            with self._cond:
+                if self._can_admit(ticket):
+                    self._admit(ticket)
+                    # The next ticket may fit in a remaining slot
+                    self._cond.notify_all()
+                    return
+                current = self.position(ticket)
+                if current != last:
+                    last = current
+                else:
+                    self._cond.wait(self.POLL_INTERVAL)
+                    continue
+            yield current
+
+    def release(self, ticket: Ticket) -> None:
+        """Free the ticket's slot (or queue entry) and wake waiters."""
+        with self._cond:
+            self._finish(ticket)
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self) -> Iterator[Ticket]:
+        """Enqueue, wait for admission and release on exit."""
+        ticket = self.enqueue()
+        try:
+            for _ in self.wait(ticket):
+                pass
+            yield ticket
+        finally:
+            self.release(ticket)
+
+
+class AsyncRequestScheduler(_SchedulerBase):
+    """asyncio counterpart of RequestScheduler for the ASGI serving path."""
+
+    def __init__(self, max_concurrent: int = None, max_queue: int = None):
+        super().__init__(max_concurrent, max_queue)
+        self._cond: Optional[asyncio.Condition] = None
+
+    def _condition(self) -> asyncio.Condition:
+        # Created on first use so it binds to the server's event loop
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        return self._cond
+
+    def enqueue(self) -> Ticket:
+        """Join the queue without waiting; raises QueueFullError when full."""
+        return self._new_ticket()
+
+    async def wait(self, ticket: Ticket) -> AsyncIterator[int]:
+        """Async-iterate queue positions until the ticket is admitted."""
+        cond = self._condition()
+        last = None
+        while True:
+            async with cond:
+                if self._can_admit(ticket):
+                    self._admit(ticket)
+                    # The next ticket may fit in a remaining slot
+                    cond.notify_all()
+                    return
+                current = self.position(ticket)
+                if current == last:
+                    await cond.wait()
+                    continue
+                last = current
+            yield current
+
+    async def release(self, ticket: Ticket) -> None:
+        """Free the ticket's slot (or queue entry) and wake waiters."""
+        cond = self._condition()
+        async with cond:
+            self._finish(ticket)
+            cond.notify_all()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[Ticket]:
+        """Enqueue, wait for admission and release on exit."""
+        ticket = self.enqueue()
+        try:
+            async for _ in self.wait(ticket):
+                pass
+            yield ticket
+        finally:
+            await self.release(ticket)
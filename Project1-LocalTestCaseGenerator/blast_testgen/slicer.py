@@ -0,0 +1,245 @@
+"""Slice a module down to one function and the definitions it depends on."""
+
+import ast
+from collections import deque
+from typing import Optional, Dict, Any, List, Set, Tuple
+
+from .code_parser import ParsedModule
+from .compaction import DEFAULT_TOKEN_BUDGET, estimate_tokens, stub_functions
+
+
+# Definitions more than this many references away from the target are stubbed
+DEFAULT_MAX_DEPTH = 2
+
+_FUNCTION_TYPES = (ast.FunctionDef, ast.AsyncFunctionDef)
+_DEF_TYPES = _FUNCTION_TYPES + (ast.ClassDef,)
+_ASSIGN_TYPES = (ast.Assign, ast.AnnAssign, ast.AugAssign)
+
+
+def _bound_names(node: ast.AST) -> Set[str]:
+    """Names a top-level statement defines."""
+    if isinstance(node, _DEF_TYPES):
+        return {node.name}
+    if isinstance(node, (ast.Import, ast.ImportFrom)):
+        return {
+            alias.asname or alias.name.split(".")[0]
+            for alias in node.names if alias.name != "*"
+        }
+    targets = []
+    if isinstance(node, ast.Assign):
+        targets = node.targets
+    elif isinstance(node, (ast.AnnAssign, ast.AugAssign)):
+        targets = [node.target]
+    names = set()
+    for target in targets:
+        for child in ast.walk(target):
+            if isinstance(child, ast.Name):
+                names.add(child.id)
+    return names
+
+
+def _referenced_names(node: ast.AST) -> Set[str]:
+    """Every bare name a node loads (calls, attribute bases, annotations...)."""
+    return {
+        child.id for child in ast.walk(node)
+        if isinstance(child, ast.Name) and isinstance(child.ctx, ast.Load)
+    }
+
+
+def find_target(tree: ast.Module, target: str) -> Tuple[Optional[ast.AST], Optional[ast.AST]]:
+    """
+    Locate a function or class to test.
+
+    target is a top-level name, the name of a method, or a dotted path
+    such as Class.method. Deeper nested functions are found by name as a
+    last resort.
+
+    Returns:
+        Tuple of (top-level node holding it, the node itself), or
+        (None, None) when it does not exist
+    """
+    if "." in target:
+        first, *rest = target.split(".")
+        for top in reversed(tree.body):
+            if isinstance(top, _DEF_TYPES) and top.name == first:
+                node = top
+                for part in rest:
+                    node = next((
+                        child for child in reversed(node.body)
+                        if isinstance(child, _DEF_TYPES) and child.name == part
+                    ), None)
+                    if node is None:
+                        break
+                if node is not None:
+                    return top, node
+        return None, None
+
+    # Later definitions win, as they do when the module runs
+    for top in reversed(tree.body):
+        if isinstance(top, _DEF_TYPES) and top.name == target:
+            return top, top
+    for top in tree.body:
+        if isinstance(top, ast.ClassDef):
+            for child in top.body:
+                if isinstance(child, _FUNCTION_TYPES) and child.name == target:
+                    return top, child
+    # Slow path: functions nested deeper (closures, methods of inner classes)
+    for top in tree.body:
+        if not isinstance(top, _DEF_TYPES):
+            continue
+        for child in ast.walk(top):
+            if child is not top and isinstance(child, _FUNCTION_TYPES) and child.name == target:
+                return top, child
+    return None, None
+
+
+def _enclosing_functions(top: ast.AST, target: ast.AST) -> Set[str]:
+    """Names of the functions under top whose bodies contain target."""
+    return {
+        node.name for node in ast.walk(top)
+        if isinstance(node, _FUNCTION_TYPES)
+        and node is not target
+        and any(child is target for child in ast.walk(node))
+    }
+
+
+class DependencySlicer:
+    """
+    Builds the intra-module reference graph of a parsed module.
+
+    Nodes are top-level functions, classes and assignments; an edge means
+    one definition mentions another's name. slice() walks the graph from a
+    target function breadth-first.
+    """
+
+    def __init__(self, module: ParsedModule):
+        self.module = module
+        self.definitions: Dict[str, ast.AST] = {}
+        self.imports: List[ast.AST] = []
+        for node in module.tree.body:
+            if isinstance(node, (ast.Import, ast.ImportFrom)):
+                self.imports.append(node)
+            elif isinstance(node, _DEF_TYPES + _ASSIGN_TYPES):
+                for name in _bound_names(node):
+                    self.definitions[name] = node
+        self._refs: Dict[int, Set[str]] = {}
+
+    def references(self, node: ast.AST) -> Set[str]:
+        """Top-level definitions a node refers to (excluding itself)."""
+        key = id(node)
+        if key not in self._refs:
+            names = _referenced_names(node) & set(self.definitions)
+            self._refs[key] = {n for n in names if self.definitions[n] is not node}
+        return self._refs[key]
+
+    def source(self, node: ast.AST) -> str:
+        """Source of a top-level statement, including decorators."""
+        start = min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])])
+        return "\n".join(self.module.lines[start - 1:node.end_lineno])
+
+    def slice(
+        self,
+        target: str,
+        max_depth: int = None,
+        token_budget: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Extract the target and the definitions it reaches.
+
+        Definitions within max_depth references keep their full source
+        while they fit in token_budget; the next ring, and anything past
+        the budget, is reduced to signatures. Imports are kept only when
+        the slice uses a name they bind.
+
+        Returns:
+            Dict with 'code', 'included' (full source), 'stubbed', and
+            'keep' (names whose bodies must stay intact), or None if the
+            target does not exist
+        """
+        max_depth = DEFAULT_MAX_DEPTH if max_depth is None else max_depth
+        budget = token_budget or DEFAULT_TOKEN_BUDGET
+        top, seed = find_target(self.module.tree, target)
+        if top is None:
+            return None
+
+        # Breadth-first so nearer dependencies claim the budget first
+        depth = {id(top): 0}
+        order = [top]
+        queue = deque([(top, 0)])
+        while queue:
+            node, level = queue.popleft()
+            if level > max_depth:
+                continue
+            refs = self.references(seed if node is top else node)
+            if node is top and seed is not top and isinstance(top, ast.ClassDef):
+                # A method also needs its class's bases and class attributes
+                for part in top.bases + [n for n in top.body if not isinstance(n, _DEF_TYPES)]:
+                    refs = refs | (_referenced_names(part) & set(self.definitions))
+            for name in sorted(refs):
+                dep = self.definitions[name]
+                if id(dep) not in depth:
+                    depth[id(dep)] = level + 1
+                    order.append(dep)
+                    queue.append((dep, level + 1))
+
+        full: Set[int] = {id(top)}
+        used = estimate_tokens(self.source(top))
+        for node in order[1:]:
+            # Constants and other assignments are cheap; always keep them whole
+            if isinstance(node, _DEF_TYPES) and depth[id(node)] > max_depth:
+                continue
+            cost = estimate_tokens(self.source(node))
+            if isinstance(node, _DEF_TYPES) and used + cost > budget:
+                continue
+            full.add(id(node))
+            used += cost
+
+        parts = []
+        included, stubbed = [], []
+        needed = set()
+        # Emit in file order so definitions precede their uses as in the source
+        for node in self.module.tree.body:
+            if id(node) not in depth:
+                continue
+            names = sorted(_bound_names(node))
+            text = self.source(node)
+            if id(node) in full:
+                included.extend(names)
+                needed |= _referenced_names(node)
+            else:
+                text = stub_functions(text, set()).rstrip("\n")
+                stubbed.extend(names)
+                needed |= _referenced_names(ast.parse(text))
+            parts.append(text)
+
+        imports = [
+            self.source(node) for node in self.imports
+            if _bound_names(node) & needed
+            or not _bound_names(node)
+            or getattr(node, "module", None) == "__future__"
+        ]
+        code = "\n\n\n".join(["\n".join(imports)] + parts if imports else parts) + "\n"
+
+        keep = set(included) | {seed.name}
+        if seed is not top:
+            if isinstance(top, ast.ClassDef):
+                # Let compaction stub the target's sibling methods
+                keep.discard(top.name)
+            # Stubbing a function that holds the target would drop it too
+            keep |= _enclosing_functions(top, seed)
+        return {
+            "code": code,
+            "included": included,
+            "stubbed": stubbed,
+            "keep": sorted(keep)
+        }
+
+
+def slice_for_target(
+    module: ParsedModule,
+    target: str,
+    max_depth: int = None,
+    token_budget: Optional[int] = None
+) -> Optional[Dict[str, Any]]:
+    """Slice a module around one function; see DependencySlicer.slice."""
+    return DependencySlicer(module).slice(target, max_depth, token_budget)
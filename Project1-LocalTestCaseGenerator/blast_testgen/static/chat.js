@@ -5,9 +5,12 @@
 const messagesContainer = document.getElementById('messages');
 const userInput = document.getElementById('userInput');
 const sendBtn = document.getElementById('sendBtn');
+const stopBtn = document.getElementById('stopBtn');
 const clearBtn = document.getElementById('clearBtn');
 const loadingOverlay = document.getElementById('loadingOverlay');
 const statusEl = document.getElementById('status');
+const loadingText = document.getElementById('loadingText');
+const LOADING_TEXT = loadingText ? loadingText.textContent : '';
 
 // Example inputs
 const EXAMPLES = {
@@ -29,16 +32,26 @@ const EXAMPLES = {
     return {"id": 1, "email": email}`
 };
 
-// Request timeout in milliseconds (2 minutes for code generation)
+// Reconnect to a job's event stream after this long without data
 const REQUEST_TIMEOUT = 120000;
+const MAX_RECONNECTS = 5;
+const RECONNECT_DELAY = 2000;
+
+// localStorage key of the job currently running, for resume after reload
+const JOB_STORAGE_KEY = 'blast_testgen_job';
+
+// Job being followed, so the Stop button can cancel it
+let activeJob = null;
 
 document.addEventListener('DOMContentLoaded', () => {
     checkStatus();
     initEventListeners();
+    resumeJob();
 });
 
 function initEventListeners() {
     sendBtn.addEventListener('click', sendMessage);
+    if (stopBtn) stopBtn.addEventListener('click', stopJob);
     
     userInput.addEventListener('keydown', (e) => {
         if (e.ctrlKey && e.key === 'Enter') {
@@ -105,46 +118,249 @@ async function sendMessage() {
     userInput.style.height = 'auto';
     
     showLoading();
-    
-    // Create abort controller for timeout
-    const controller = new AbortController();
-    const timeoutId = setTimeout(() => {
-        controller.abort();
-    }, REQUEST_TIMEOUT);
 
+    let job;
     try {
-        const response = await fetch('/api/generate', {
+        const response = await fetch('/api/jobs', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ code: userInput_text }),
-            signal: controller.signal
+            body: JSON.stringify({ code: userInput_text })
         });
-        
-        clearTimeout(timeoutId);
-        hideLoading();
 
         if (!response.ok) {
             const errorData = await response.json();
-            throw new Error(errorData.error || `HTTP ${response.status}`);
+            const err = new Error(errorData.error || `HTTP ${response.status}`);
+            err.hint = errorData.hint;
+            throw err;
         }
+        job = await response.json();
+    } catch (error) {
+        hideLoading();
+        addErrorMessage(error.message || 'Failed to connect to server', error.hint || 'Make sure the server is running');
+        return;
+    }
 
-        const data = await response.json();
+    // Remember the job so a reload can pick up its result
+    localStorage.setItem(JOB_STORAGE_KEY, JSON.stringify({ id: job.id, input: userInput_text }));
+    await followJob(job.id);
+}
 
-        if (data.error) {
-            addErrorMessage(data.error, data.hint);
-        } else {
-            addCombinedResult(data.test_cases, data.pytest_code, data.note);
-        }
+/**
+ * Resume the job that was running when the page was last closed.
+ */
+async function resumeJob() {
+    let saved = null;
+    try {
+        saved = JSON.parse(localStorage.getItem(JOB_STORAGE_KEY));
+    } catch (e) {
+        // Corrupt entry; ignore it
+    }
+    if (!saved || !saved.id) return;
+
+    addUserMessage(saved.input || '');
+    showLoading();
+    await followJob(saved.id);
+}
+
+/**
+ * Cancel the job being followed; the server stops its Ollama generation.
+ */
+async function stopJob() {
+    if (!activeJob || activeJob.stopped) return;
+    activeJob.stopped = true;
+    if (activeJob.controller) activeJob.controller.abort();
+    try {
+        await fetch(`/api/jobs/${activeJob.id}/cancel`, { method: 'POST' });
     } catch (error) {
-        hideLoading();
-        clearTimeout(timeoutId);
-        
-        if (error.name === 'AbortError') {
-            addErrorMessage('Request timed out', 'The generation took too long. Try with simpler code or check if Ollama is responding.');
-        } else {
-            addErrorMessage(error.message || 'Failed to connect to server', 'Make sure the server is running');
+        // The server drops the job when it expires either way
+    }
+}
+
+/**
+ * Follow a job's event stream until it produces a result, reconnecting
+ * from the last seen event if the connection drops or goes quiet.
+ */
+async function followJob(jobId) {
+    let lastEventId = null;
+    let streamingEl = null;
+    let result = null;
+    let jobError = null;
+    let reconnects = 0;
+    let lostConnection = false;
+    const job = { id: jobId, controller: null, stopped: false };
+    activeJob = job;
+
+    while (!result && !jobError && !job.stopped) {
+        // Abort if the stream goes quiet for too long; any data resets the timer
+        const controller = new AbortController();
+        job.controller = controller;
+        let timeoutId = setTimeout(() => controller.abort(), REQUEST_TIMEOUT);
+        const resetTimeout = () => {
+            clearTimeout(timeoutId);
+            timeoutId = setTimeout(() => controller.abort(), REQUEST_TIMEOUT);
+        };
+
+        try {
+            const query = lastEventId === null ? '' : `?after=${lastEventId}`;
+            const response = await fetch(`/api/jobs/${jobId}/events${query}`, {
+                signal: controller.signal
+            });
+
+            if (response.status === 404) {
+                jobError = { error: 'Generation result is no longer available', hint: 'Please submit the input again' };
+                break;
+            }
+            if (!response.ok) {
+                throw new Error(`HTTP ${response.status}`);
+            }
+
+            await readEventStream(response, (event, data, id) => {
+                if (id !== null) lastEventId = id;
+                reconnects = 0;
+                if (event === 'queued') {
+                    setLoadingText(`Waiting in queue - position ${data.position}`);
+                } else if (event === 'token') {
+                    if (!streamingEl) {
+                        hideLoading();
+                        sendBtn.disabled = true;
+                        streamingEl = addStreamingMessage();
+                    }
+                    appendStreamingText(streamingEl, data.text);
+                } else if (event === 'test_case') {
+                    if (streamingEl) countStreamingTestCase(streamingEl);
+                } else if (event === 'result') {
+                    result = data;
+                } else if (event === 'error') {
+                    jobError = { error: data.error, hint: 'Try with simpler code or check if Ollama is responding.' };
+                } else if (event === 'cancelled') {
+                    job.stopped = true;
+                }
+            }, resetTimeout);
+        } catch (error) {
+            // The job keeps running on the server; reconnect below
+        } finally {
+            clearTimeout(timeoutId);
+        }
+
+        if (!result && !jobError && !job.stopped) {
+            reconnects += 1;
+            if (reconnects > MAX_RECONNECTS) {
+                lostConnection = true;
+                jobError = { error: 'Lost connection to the server', hint: 'Reload the page to resume this generation' };
+                break;
+            }
+            await new Promise(resolve => setTimeout(resolve, RECONNECT_DELAY));
         }
     }
+
+    activeJob = null;
+    hideLoading();
+    removeStreamingMessage(streamingEl);
+
+    // Keep the job only if it may still finish for a later reload
+    if (!lostConnection) {
+        localStorage.removeItem(JOB_STORAGE_KEY);
+    }
+
+    if (jobError) {
+        addErrorMessage(jobError.error, jobError.hint);
+    } else if (!result) {
+        addSystemMessage('Generation stopped.');
+    } else if (result.error) {
+        addErrorMessage(result.error, result.hint);
+    } else {
+        addCombinedResult(result.test_cases, result.pytest_code, result.note, result.validation);
+    }
+}
+
+/**
+ * Read a text/event-stream response body and call onEvent(event, data, id)
+ * for every complete event, and onData() whenever any bytes arrive
+ * (including keep-alive comments). Resolves when the stream ends.
+ */
+async function readEventStream(response, onEvent, onData) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        if (onData) onData();
+        buffer += decoder.decode(value, { stream: true });
+
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const block = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+
+            let event = 'message';
+            let id = null;
+            const dataLines = [];
+            block.split('\n').forEach(line => {
+                if (line.startsWith('event:')) event = line.slice(6).trim();
+                else if (line.startsWith('data:')) dataLines.push(line.slice(5).trim());
+                else if (line.startsWith('id:')) id = parseInt(line.slice(3).trim(), 10);
+            });
+            if (dataLines.length) {
+                onEvent(event, JSON.parse(dataLines.join('\n')), id);
+            }
+        }
+    }
+}
+
+function addStreamingMessage() {
+    const messageDiv = document.createElement('div');
+    messageDiv.className = 'message bot-message streaming-message';
+    
+    const avatar = document.createElement('div');
+    avatar.className = 'avatar';
+    avatar.innerHTML = '...';
+    
+    const content = document.createElement('div');
+    content.className = 'content';
+    
+    const pre = document.createElement('pre');
+    const code = document.createElement('code');
+    pre.appendChild(code);
+    content.appendChild(pre);
+    
+    const stop = document.createElement('button');
+    stop.className = 'stop-btn';
+    stop.textContent = 'Stop';
+    stop.addEventListener('click', stopJob);
+    content.appendChild(stop);
+    
+    messageDiv.appendChild(avatar);
+    messageDiv.appendChild(content);
+    messagesContainer.appendChild(messageDiv);
+    
+    scrollToBottom();
+    return messageDiv;
+}
+
+function appendStreamingText(messageDiv, text) {
+    messageDiv.querySelector('code').textContent += text;
+    scrollToBottom();
+}
+
+function countStreamingTestCase(messageDiv) {
+    let label = messageDiv.querySelector('.streaming-count');
+    if (!label) {
+        label = document.createElement('div');
+        label.className = 'streaming-count';
+        label.dataset.count = '0';
+        messageDiv.querySelector('.content').prepend(label);
+    }
+    label.dataset.count = String(Number(label.dataset.count) + 1);
+    const count = Number(label.dataset.count);
+    label.textContent = `${count} test case${count === 1 ? '' : 's'} ready`;
+}
+
+function removeStreamingMessage(messageDiv) {
+    if (messageDiv && messageDiv.parentNode) {
+        messageDiv.parentNode.removeChild(messageDiv);
+    }
 }
 
 function addUserMessage(text) {
@@ -197,7 +413,25 @@ function addSystemMessage(text, type = 'info') {
     scrollToBottom();
 }
 
-function addCombinedResult(testCases, pytestCode, note) {
+function validationBadge(validation) {
+    let label;
+    if (validation.status === 'timeout') {
+        label = 'Test run timed out';
+    } else if (!validation.compiled) {
+        label = 'Does not compile';
+    } else {
+        label = `${validation.passed} passed, ${validation.failed} failed`;
+        if (validation.errors) label += `, ${validation.errors} error${validation.errors === 1 ? '' : 's'}`;
+    }
+    const title = validation.error || validation.tests
+        .filter((t) => t.outcome === 'failed' || t.outcome === 'error')
+        .map((t) => `${t.name}: ${t.message.split('\n')[0]}`)
+        .join('\n');
+    const state = validation.status === 'passed' ? 'passed' : 'failed';
+    return `<span class="validation-badge ${state}" title="${escapeHtml(title).replace(/"/g, '&quot;')}">${escapeHtml(label)}</span>`;
+}
+
+function addCombinedResult(testCases, pytestCode, note, validation) {
     const messageDiv = document.createElement('div');
     messageDiv.className = 'message bot-message';
     
@@ -253,6 +487,7 @@ function addCombinedResult(testCases, pytestCode, note) {
             <div class="pytest-section">
                 <div class="pytest-header">
                     <h4>Automation Code (pytest)</h4>
+                    ${validation ? validationBadge(validation) : ''}
                     <button class="copy-btn" onclick="copyCode('${codeBlockId}', this)">
                         <svg width="14" height="14" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2">
                             <rect x="9" y="9" width="13" height="13" rx="2" ry="2"></rect>
@@ -329,7 +564,12 @@ function addErrorMessage(error, hint) {
     scrollToBottom();
 }
 
+function setLoadingText(text) {
+    if (loadingText) loadingText.textContent = text;
+}
+
 function showLoading() {
+    setLoadingText(LOADING_TEXT);
     loadingOverlay.classList.add('active');
     sendBtn.disabled = true;
 }
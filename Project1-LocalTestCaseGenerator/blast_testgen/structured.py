@@ -0,0 +1,118 @@
+"""Schema-constrained generation with field-level repair."""
+
+from typing import Optional, Dict, Any, List, Iterable
+
+from .cancellation import CancellationToken
+from .prompts import FIELD_SCHEMAS, build_repair_prompt, field_schema
+from .response_parser import parse_json_answer
+
+# Metrics route for repair generations
+REPAIR_ROUTE = "repair"
+
+
+def empty_answer() -> Dict[str, Any]:
+    return {"manual_test_cases": [], "pytest_code": ""}
+
+
+def invalid_fields(
+    answer: Optional[Dict[str, Any]],
+    fields: Iterable[str] = tuple(FIELD_SCHEMAS)
+) -> List[str]:
+    """
+    Fields of a parsed answer that are missing or unusable.
+
+    manual_test_cases must hold at least one case with a title and steps;
+    pytest_code must be non-empty and compile.
+    """
+    answer = answer or {}
+    invalid = []
+    for field in fields:
+        if field == "manual_test_cases":
+            cases = answer.get(field) or []
+            if not any(c.get("title") and c.get("steps") for c in cases):
+                invalid.append(field)
+        elif field == "pytest_code":
+            code = answer.get(field) or ""
+            try:
+                compile(code, "<pytest_code>", "exec")
+            except (SyntaxError, ValueError):
+                invalid.append(field)
+            else:
+                if not code.strip():
+                    invalid.append(field)
+    return invalid
+
+
+def _merge(answer: Dict[str, Any], field: str, text: str) -> bool:
+    """Copy field from a repair answer into answer if it is valid."""
+    repaired = parse_json_answer(text)
+    if not repaired or invalid_fields(repaired, (field,)):
+        return False
+    answer[field] = repaired[field]
+    return True
+
+
+def repair_answer(
+    client,
+    prompt: str,
+    answer: Dict[str, Any],
+    fields: Iterable[str] = tuple(FIELD_SCHEMAS),
+    num_predict: int = 1500,
+    cancel: Optional[CancellationToken] = None
+) -> List[str]:
+    """
+    Re-ask for each invalid field of answer, one field at a time.
+
+    Only the broken field is generated again, constrained by its schema,
+    instead of regenerating the whole answer. answer is updated in place;
+    a field whose repair fails is left as it was.
+
+    Returns:
+        Names of the fields that were repaired
+
+    Raises:
+        GenerationCancelled: If cancel fires before or during a repair
+    """
+    repaired = []
+    for field in invalid_fields(answer, fields):
+        if cancel is not None:
+            cancel.raise_if_cancelled()
+        try:
+            response = client.generate(
+                build_repair_prompt(prompt, field, answer),
+                temperature=0.2,
+                num_predict=num_predict,
+                route=REPAIR_ROUTE,
+                format=field_schema(field),
+                cancel=cancel
+            )
+        except (ConnectionError, RuntimeError):
+            continue
+        if _merge(answer, field, response.get("response", "")):
+            repaired.append(field)
+    return repaired
+
+
+async def repair_answer_async(
+    client,
+    prompt: str,
+    answer: Dict[str, Any],
+    fields: Iterable[str] = tuple(FIELD_SCHEMAS),
+    num_predict: int = 1500
+) -> List[str]:
+    """repair_answer for an AsyncOllamaClient."""
+    repaired = []
+    for field in invalid_fields(answer, fields):
+        try:
+            response = await client.generate(
+                build_repair_prompt(prompt, field, answer),
+                temperature=0.2,
+                num_predict=num_predict,
+                route=REPAIR_ROUTE,
+                format=field_schema(field)
+            )
+        except (ConnectionError, RuntimeError):
+            continue
+        if _merge(answer, field, response.get("response", "")):
+            repaired.append(field)
+    return repaired
@@ -1,14 +1,24 @@
 """Web application for Testcase Generator Chat UI."""
 
-from flask import Flask, render_template, request, jsonify, send_from_directory
+from flask import Flask, Response, render_template, request, jsonify, send_from_directory
 from flask_cors import CORS
+import ipaddress
 import os
 import sys
 import json
-import re
 
-from .ollama_client import OllamaClient
-from .prompts import build_test_prompt
+from .ollama_client import OllamaClient, KeepAliveRefresher, parse_keep_alive
+from .ollama_pool import OllamaPool, create_client
+from .cache import GenerationCache
+from .cancellation import CancellationToken, GenerationCancelled
+from .classifier import classify_input, URL, TEXT
+from .prompts import build_test_prompt, COMBINED_OUTPUT_SCHEMA, FIELD_SCHEMAS
+from .scheduler import RequestScheduler, QueueFullError
+from .jobs import JobManager
+from .metrics import OllamaMetrics, response_timings
+from .response_parser import StreamingResponseParser, parse_json_answer, parse_model_response
+from .structured import empty_answer, invalid_fields, repair_answer
+from .validator import TestValidator
 
 # Check if React build exists
 REACT_BUILD_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'frontend', 'build')
@@ -21,8 +31,30 @@ else:
 
 CORS(app)
 
-# Initialize Ollama client
-client = OllamaClient()
+# Ollama timing counters for /api/metrics
+metrics = OllamaMetrics()
+
+# Initialize Ollama client (generations are cached on disk)
+client = OllamaClient(cache=GenerationCache(), metrics=metrics)
+
+# Admission control for LLM-bound requests (configured by run_web_app)
+scheduler = RequestScheduler()
+
+# Background generations for /api/jobs
+jobs = JobManager()
+
+# Keeps the model loaded while the server is idle (started by prepare_model)
+keep_alive_refresher = None
+
+# Constrain answers to COMBINED_OUTPUT_SCHEMA and repair invalid fields
+# (configure_server(structured=True); needs Ollama 0.5 or later)
+structured_output = False
+
+# Runs generated pytest code against the submitted source when set
+# (configure_server(validate=True)). This executes whatever users paste,
+# as the server's user, so it stays off on network-facing binds unless
+# explicitly allowed
+validator = None
 
 
 @app.route('/')
@@ -48,114 +80,362 @@ def serve_static(path):
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Check if Ollama is available."""
-    is_available = client.is_available()
-    models = []
-    if is_available:
-        try:
-            models = client.list_models()
-        except:
-            pass
+    snapshot = client.health()
+    is_available = snapshot['available']
     return jsonify({
         'status': 'healthy' if is_available else 'ollama_unavailable',
         'ollama_connected': is_available,
         'model': client.model,
-        'available_models': models
+        'available_models': snapshot['models'],
+        'hosts': snapshot.get('hosts'),
+        'circuit_open': client.circuit_open(),
+        'cache': client.cache.stats() if client.cache else None,
+        'scheduler': scheduler.stats(),
+        'jobs': jobs.stats()
     })
 
 
-@app.route('/api/generate', methods=['POST'])
-def generate_tests():
-    """Generate testcases from user input."""
-    data = request.get_json()
+@app.route('/api/metrics', methods=['GET'])
+def metrics_endpoint():
+    """
+    Ollama timings in Prometheus text format.
+
+    Add ?format=json for the same data as a per-model, per-route summary.
+    """
+    if request.args.get('format') == 'json':
+        return jsonify(metrics.summary())
+    return Response(
+        metrics.render_prometheus(),
+        mimetype='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
+def _read_input():
+    """
+    Validate the JSON body of a generate request.
+
+    Returns:
+        Tuple of (user_input, error_response); exactly one is None
+    """
+    data = request.get_json(silent=True)
     
     if not data or 'code' not in data:
-        return jsonify({'error': 'No input provided'}), 400
+        return None, (jsonify({'error': 'No input provided'}), 400)
     
     user_input = data['code'].strip()
     
     if len(user_input) < 2:
-        return jsonify({
+        return None, (jsonify({
             'error': 'Input too short',
             'hint': 'Please provide at least 2 characters'
-        }), 400
+        }), 400)
     
     # Check Ollama availability
     if not client.is_available():
-        return jsonify({
+        return None, (jsonify({
             'error': 'Ollama not available. Please start Ollama server.',
             'hint': 'Run: ollama serve'
-        }), 503
+        }), 503)
+    
+    return user_input, None
+
+
+@app.route('/api/generate', methods=['POST'])
+def generate_tests():
+    """Generate testcases from user input."""
+    user_input, error_response = _read_input()
+    if error_response:
+        return error_response
     
     try:
+        kind = classify_input(user_input).kind
+        
         # Check if it's a URL/website
-        if is_url(user_input):
+        if kind == URL:
             return generate_website_tests(user_input)
         
-        # Check if it looks like Python code
-        is_code = looks_like_code(user_input)
-        
         # For non-code inputs, ALWAYS use quick generation (no LLM)
-        if not is_code:
+        if kind == TEXT:
             return generate_feature_tests(user_input)
         
         # For code inputs, use LLM with timeout handling
-        return generate_code_tests(user_input)
+        return generate_code_tests(user_input, cancel=_disconnect_token())
         
+    except QueueFullError as e:
+        return _busy_response(e)
     except Exception as e:
         # Fallback to quick generation on any error
         return generate_feature_tests(user_input, fallback=True)
 
 
-def is_url(text: str) -> bool:
-    """Check if input is a URL or domain."""
-    clean_text = text.lower().strip()
+@app.route('/api/generate/stream', methods=['POST'])
+def generate_tests_stream():
+    """
+    Stream testcase generation as Server-Sent Events.
+
+    Emits 'token' events with partial model output while the LLM decodes,
+    then a single 'result' event carrying the same payload /api/generate
+    would return. URL and text inputs go straight to 'result'.
+    """
+    user_input, error_response = _read_input()
+    if error_response:
+        return error_response
+    
+    # Admission happens before the stream opens so a full queue is a real 429
+    ticket = None
+    if reaches_llm(user_input):
+        try:
+            ticket = scheduler.enqueue()
+        except QueueFullError as e:
+            return _busy_response(e)
     
-    # Common TLDs
-    tlds = ['.com', '.org', '.net', '.io', '.app', '.co', '.in', '.dev', '.ai']
+    response = Response(
+        _stream_events(user_input, ticket, route=request.path, cancel=_disconnect_token()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    if ticket:
+        # Frees the slot even if the client leaves before the stream starts
+        response.call_on_close(lambda: scheduler.release(ticket))
+    return response
+
+
+def _busy_response(error: QueueFullError):
+    """429 response telling the client when to retry."""
+    response = jsonify({
+        'error': 'Server busy. Too many generations in progress.',
+        'hint': f'Please retry in about {error.retry_after} seconds',
+        'retry_after': error.retry_after
+    })
+    response.status_code = 429
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
+
+def _disconnect_token() -> CancellationToken:
+    """
+    Token that fires once the client of the current request has gone.
+
+    Only waitress reports disconnects (deploy.py turns this on with
+    channel_request_lookahead); under other servers it never fires.
+    """
+    return CancellationToken(poll=request.environ.get('waitress.client_disconnected'))
+
+
+def _cancelled_response():
+    """Answer for a client that has already left (nginx's 499)."""
+    return Response(status=499)
+
+
+@app.route('/api/jobs', methods=['POST'])
+def create_job():
+    """
+    Start a generation in the background and return its id immediately.
+
+    The job keeps running if the client disconnects; poll
+    /api/jobs/<id> or follow /api/jobs/<id>/events for the result.
+    """
+    user_input, error_response = _read_input()
+    if error_response:
+        return error_response
     
-    # Check if it ends with a TLD
-    for tld in tlds:
-        if clean_text.endswith(tld):
-            return True
+    ticket = None
+    if reaches_llm(user_input):
+        try:
+            ticket = scheduler.enqueue()
+        except QueueFullError as e:
+            return _busy_response(e)
     
-    # Check for domain pattern
-    if re.match(r'^[\w\-]+\.[\w\-]+', clean_text):
-        return True
+    cancellation = CancellationToken()
+    job = jobs.submit(
+        _generation_events(user_input, ticket, route=request.path, cancel=cancellation),
+        cancellation
+    )
+    response = jsonify(job.to_dict())
+    response.status_code = 202
+    response.headers['Location'] = f'/api/jobs/{job.id}'
+    return response
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Return a job's status, and its result once finished."""
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found', 'hint': 'Finished jobs expire after a while'}), 404
+    return jsonify(job.to_dict())
+
+
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """
+    Stop a job and the Ollama generation behind it.
+
+    Returns the job; its status becomes 'cancelled' once the generation
+    has stopped. Cancelling a finished job changes nothing.
+    """
+    job = jobs.cancel(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found', 'hint': 'Finished jobs expire after a while'}), 404
+    response = jsonify(job.to_dict())
+    response.status_code = 200 if job.finished else 202
+    return response
+
+
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """
+    Stream a job's events as Server-Sent Events.
+
+    Replays from the start, or from ?after=<n> / Last-Event-ID so a
+    reconnecting client only receives what it missed.
+    """
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found', 'hint': 'Finished jobs expire after a while'}), 404
     
-    # Check for http/https
-    if clean_text.startswith('http'):
-        return True
+    start = request.args.get('after', request.headers.get('Last-Event-ID'))
+    try:
+        start = int(start) + 1 if start is not None else 0
+    except ValueError:
+        start = 0
     
-    return False
+    return Response(
+        _job_stream(job, start),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+def _job_stream(job, start: int):
+    """Yield SSE frames for a job, with ids and keep-alive comments."""
+    for item in jobs.follow(job, start):
+        if item is None:
+            yield ': keep-alive\n\n'
+            continue
+        index, event, data = item
+        yield f"id: {index}\n" + _sse(event, data)
+
+
+def _sse(event: str, data: dict) -> str:
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _stream_events(user_input: str, ticket=None, route=None, cancel=None):
+    """Yield SSE frames for a generation request."""
+    for event, data in _generation_events(user_input, ticket, route, cancel):
+        yield _sse(event, data)
+
+
+def _generation_events(user_input: str, ticket=None, route=None, cancel=None):
+    """
+    Yield (event, data) pairs for a generation request.
+
+    Shared by the stream endpoint and background jobs: 'queued' while
+    waiting for a slot, 'token' per partial model output, 'test_case' as
+    soon as each manual test case is complete, 'validating' while the
+    generated tests run (when validation is on), then 'result'. route
+    labels the Ollama call in metrics. When the cancel token fires the
+    generation is stopped and the events end without a result.
+    """
+    kind = classify_input(user_input).kind
+    if kind == URL:
+        yield 'result', website_test_payload(user_input)
+        return
+    
+    if kind == TEXT:
+        yield 'result', feature_test_payload(user_input)
+        return
+    
+    if ticket is None or client.circuit_open():
+        # No ticket means the breaker was already open on arrival
+        if ticket:
+            scheduler.release(ticket)
+        yield 'result', feature_test_payload(user_input, fallback=True)
+        return
+    
+    try:
+        # Report queue position until the scheduler admits us
+        for position in scheduler.wait(ticket, cancel):
+            yield 'queued', {'position': position}
+        
+        prompt = build_test_prompt(user_input)
+        parser = StreamingResponseParser()
+        timings = None
+        for chunk in client.generate_stream(
+            prompt=prompt,
+            temperature=0.2,
+            num_predict=1500,
+            route=route,
+            format=output_format(),
+            cancel=cancel
+        ):
+            text = chunk.get('response', '')
+            if text:
+                yield 'token', {'text': text}
+                for case in parser.feed(text):
+                    yield 'test_case', {'test_case': case}
+            if chunk.get('done'):
+                timings = response_timings(chunk)
+        parsed = parser.finish()
+        repaired = None
+        if structured_output:
+            parsed, repaired = structured_answer(
+                prompt, parsed if parser.structured else None, parsed, cancel
+            )
+            if 'manual_test_cases' in repaired:
+                for case in parsed['manual_test_cases']:
+                    yield 'test_case', {'test_case': case}
+        payload = code_test_payload(
+            user_input, None, timings=timings, parsed=parsed, repaired=repaired
+        )
+        payload['queue'] = {'position': ticket.initial_position, 'wait_ms': ticket.wait_ms}
+        generated = True
+    except GenerationCancelled:
+        return
+    except Exception:
+        payload = feature_test_payload(user_input, fallback=True)
+        generated = False
+    finally:
+        scheduler.release(ticket)
+    
+    if cancel is not None and cancel.cancelled:
+        return
+    if validator and generated:
+        yield 'validating', {}
+        attach_validation(payload, user_input)
+    yield 'result', payload
+
+
+def reaches_llm(user_input: str) -> bool:
+    """
+    True when an input would be sent to Ollama.
+
+    Code goes to the model unless its circuit breaker is open, in which
+    case it is answered in quick mode straight away instead of queueing
+    for a model that keeps failing.
+    """
+    return classify_input(user_input).is_code and not client.circuit_open()
+
+
+def is_url(text: str) -> bool:
+    """Check if input is a URL or domain (see classifier.InputClassifier)."""
+    return classify_input(text).is_url
 
 
 def looks_like_code(text: str) -> bool:
-    """Check if input looks like Python code."""
-    code_indicators = [
-        'def ',
-        'class ',
-        'import ',
-        'return ',
-        'if ',
-        'for ',
-        'while ',
-        'try:',
-        'except',
-        'self.',
-        '():',
-        'print(',
-        '# '
-    ]
-    
-    for indicator in code_indicators:
-        if indicator in text:
-            return True
-    
-    return False
+    """Check if input is source code (see classifier.InputClassifier)."""
+    return classify_input(text).is_code
 
 
-def generate_website_tests(url: str) -> dict:
+def generate_website_tests(url: str):
     """Generate test cases for website testing."""
+    return jsonify(website_test_payload(url))
+
+
+def website_test_payload(url: str) -> dict:
+    """Build the website-mode response payload."""
     domain = url.replace('https://', '').replace('http://', '').strip('/')
     
     test_cases = [
@@ -252,18 +532,23 @@ def test_responsive_mobile(browser):
     assert body_width <= 375
 '''
     
-    return jsonify({
+    return {
         'success': True,
         'test_cases': test_cases,
         'pytest_code': pytest_code,
         'model_used': 'website-mode',
         'input_length': len(url),
         'note': f'Website testing: {domain}'
-    })
+    }
 
 
-def generate_feature_tests(user_input: str, fallback: bool = False) -> dict:
+def generate_feature_tests(user_input: str, fallback: bool = False):
     """Generate test cases for feature/requirement text (no LLM)."""
+    return jsonify(feature_test_payload(user_input, fallback))
+
+
+def feature_test_payload(user_input: str, fallback: bool = False) -> dict:
+    """Build the quick-mode response payload."""
     
     # Extract keywords from input
     words = user_input.lower().split()
@@ -360,99 +645,231 @@ def test_max_length():
         process_input(input_data)
 '''
     
-    return jsonify({
+    return {
         'success': True,
         'test_cases': test_cases,
         'pytest_code': pytest_code,
         'model_used': 'quick-mode',
         'input_length': len(user_input),
         'note': 'Quick generation' + (' (LLM fallback)' if fallback else ' - Instant results')
-    })
+    }
+
 
+def generate_code_tests(user_input: str, cancel: CancellationToken = None):
+    """
+    Generate test cases for Python code using LLM.
 
-def generate_code_tests(user_input: str) -> dict:
-    """Generate test cases for Python code using LLM."""
+    When cancel fires (the client disconnected) the generation is stopped
+    and an empty 499 response is returned.
+
+    Raises:
+        QueueFullError: If the scheduler cannot take another request
+    """
+    if client.circuit_open():
+        return generate_feature_tests(user_input, fallback=True)
+    
+    ticket = scheduler.enqueue()
     try:
+        for _ in scheduler.wait(ticket, cancel):
+            pass
+        
         prompt = build_test_prompt(user_input)
         
         response = client.generate(
             prompt=prompt,
             temperature=0.2,
-            num_predict=1500
+            num_predict=1500,
+            route='/api/generate',
+            format=output_format(),
+            cancel=cancel
         )
         
         generated_text = response.get('response', '')
-        result = parse_combined_response(generated_text)
-        
-        return jsonify({
-            'success': True,
-            'test_cases': result.get('manual_test_cases', []),
-            'pytest_code': result.get('pytest_code', ''),
-            'model_used': client.model,
-            'input_length': len(user_input)
-        })
+        parsed = repaired = None
+        if structured_output:
+            answer = parse_json_answer(generated_text)
+            parsed, repaired = structured_answer(
+                prompt, answer, answer or parse_model_response(generated_text), cancel
+            )
+        payload = code_test_payload(
+            user_input, generated_text, timings=response_timings(response),
+            parsed=parsed, repaired=repaired
+        )
+        payload['queue'] = {'position': ticket.initial_position, 'wait_ms': ticket.wait_ms}
+    except GenerationCancelled:
+        return _cancelled_response()
     except Exception as e:
         # If LLM fails, fallback to quick generation
         return generate_feature_tests(user_input, fallback=True)
+    finally:
+        scheduler.release(ticket)
+    
+    # After the slot is released, so test runs do not hold up generations
+    attach_validation(payload, user_input)
+    return jsonify(payload)
+
+
+def code_test_payload(user_input: str, generated_text: str, model: str = None,
+                      timings: dict = None, parsed: dict = None,
+                      repaired: list = None) -> dict:
+    """
+    Build the LLM-mode response payload from raw model output.
+
+    timings (see metrics.response_timings) splits the generation into
+    load, prompt evaluation and decoding time; None for cache hits.
+    parsed is the StreamingResponseParser result when the output was
+    already parsed while streaming. repaired lists the fields that
+    structured mode had to ask for again.
+    """
+    result = parsed if parsed is not None else parse_combined_response(generated_text)
+    
+    return {
+        'success': True,
+        'test_cases': result.get('manual_test_cases', []),
+        'pytest_code': result.get('pytest_code', ''),
+        'model_used': model or client.model,
+        'input_length': len(user_input),
+        'timings': timings,
+        'repaired': repaired or []
+    }
+
+
+def attach_validation(payload: dict, user_input: str) -> dict:
+    """
+    Run the payload's pytest code against the submitted source.
+
+    Adds 'validation' (see TestValidator.validate) when validation is on.
+    The tests see the source's names even if they do not import them.
+    """
+    if validator and payload.get('pytest_code'):
+        payload['validation'] = validator.validate(
+            payload['pytest_code'], user_input, preload=True
+        )
+    return payload
+
+
+def output_format():
+    """Structured-output schema for generations, or None when it is off."""
+    return COMBINED_OUTPUT_SCHEMA if structured_output else None
+
+
+def structured_answer(prompt: str, answer, fallback: dict, cancel: CancellationToken = None):
+    """
+    Re-ask for the fields of a structured-mode answer that are invalid.
+
+    answer is the parsed JSON, or None when the model produced none;
+    fallback is used instead when repair leaves nothing usable. Repairs
+    stop (raising GenerationCancelled) once cancel fires.
+
+    Returns:
+        Tuple of (answer, names of the repaired fields)
+    """
+    answer = answer or empty_answer()
+    repaired = repair_answer(client, prompt, answer, cancel=cancel)
+    if len(invalid_fields(answer)) == len(FIELD_SCHEMAS):
+        return fallback, repaired
+    return answer, repaired
 
 
 def parse_combined_response(text: str) -> dict:
     """Parse combined JSON response with manual test cases and pytest code."""
-    result = {
-        'manual_test_cases': [],
-        'pytest_code': ''
-    }
-    
-    # Try to extract JSON from markdown code blocks
-    json_match = re.search(r'```(?:json)?\s*([\s\S]*?)\s*```', text)
-    if json_match:
-        text = json_match.group(1)
-    
-    # Try to find JSON object
-    obj_match = re.search(r'\{[\s\S]*\}', text)
-    if obj_match:
-        text = obj_match.group(0)
-    
+    return parse_model_response(text)
+
+
+def use_ollama_hosts(hosts):
+    """
+    Point the app at one or more Ollama hosts.
+
+    Several hosts (a list or comma-separated string) are served by an
+    OllamaPool that routes each generation to the least-loaded one.
+    """
+    global client
+    previous = client
+    client = create_client(
+        hosts,
+        model=previous.model,
+        cache=previous.cache,
+        keep_alive=previous.keep_alive,
+        metrics=previous.metrics
+    )
+    previous.close()
+    return client
+
+
+def is_loopback(host: str) -> bool:
+    """True when a bind address only accepts connections from this machine."""
+    if host == 'localhost':
+        return True
     try:
-        data = json.loads(text)
-        if isinstance(data, dict):
-            # Extract manual test cases
-            if 'manual_test_cases' in data:
-                result['manual_test_cases'] = data['manual_test_cases']
-            elif 'test_cases' in data:
-                result['manual_test_cases'] = data['test_cases']
-            
-            # Extract pytest code
-            if 'pytest_code' in data:
-                result['pytest_code'] = data['pytest_code']
-            elif 'python_code' in data:
-                result['pytest_code'] = data['python_code']
-            
-            return result
-    except json.JSONDecodeError:
-        pass
-    
-    # Fallback: try to extract pytest code block
-    code_match = re.search(r'```python\s*([\s\S]*?)\s*```', text)
-    if code_match:
-        result['pytest_code'] = code_match.group(1)
-    else:
-        result['pytest_code'] = text
-    
-    # Create a simple info test case
-    result['manual_test_cases'] = [{
-        "id": "TC_001",
-        "title": "Generated Test",
-        "type": "INFO",
-        "steps": ["See generated pytest code below"],
-        "expected": "Code should execute successfully"
-    }]
-    
-    return result
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def validation_allowed(validate, host=None, allow_remote=False) -> bool:
+    """
+    Whether to turn validation on for a server bound to host.
+
+    Validation runs submitted code unconfined, so a server reachable from
+    the network only gets it with allow_remote.
+    """
+    if not validate:
+        return False
+    if host is None or is_loopback(host) or allow_remote:
+        return True
+    print(f"   Validation: off - {host} is reachable from the network and validation "
+          f"runs submitted code on this machine (pass --allow-remote-validation to override)")
+    return False
 
 
-def run_web_app(host='127.0.0.1', port=5000, debug=False):
+def configure_server(max_concurrent=None, max_queue=None, job_retention=None,
+                     ollama_hosts=None, keep_alive=None, structured=None, validate=None,
+                     host=None, allow_remote_validation=False):
+    """Apply serving limits and Ollama settings before the app starts."""
+    global structured_output, validator
+    if structured is not None:
+        structured_output = structured
+    if validate is not None:
+        allowed = validation_allowed(validate, host, allow_remote_validation)
+        validator = TestValidator() if allowed else None
+    if ollama_hosts:
+        use_ollama_hosts(ollama_hosts)
+    if keep_alive is not None:
+        client.keep_alive = parse_keep_alive(keep_alive)
+    if not max_concurrent and isinstance(client, OllamaPool):
+        # Default slots are per host, so throughput grows with the pool
+        max_concurrent = scheduler.DEFAULT_MAX_CONCURRENT * len(client.clients)
+    scheduler.configure(max_concurrent, max_queue)
+    # One job worker per admissible request, so queued jobs report positions
+    jobs.configure(scheduler.max_concurrent + scheduler.max_queue, job_retention)
+
+
+def prepare_model(warm_up=True):
+    """
+    Load the model before serving and keep it loaded while idle.
+
+    A cold model load is the slowest part of a first request, so pay it
+    at startup; the refresher then renews keep_alive in the background.
+    """
+    global keep_alive_refresher
+    if warm_up:
+        print(f"   Warming up {client.model}...")
+        result = client.warm_up()
+        if result['loaded']:
+            print(f"   Model loaded in {result['seconds']}s (keep_alive: {client.keep_alive})")
+        else:
+            print(f"   Warm-up skipped: {result['error']}")
+    if keep_alive_refresher is None:
+        keep_alive_refresher = KeepAliveRefresher(client).start()
+
+
+def run_web_app(host='127.0.0.1', port=5000, debug=False,
+                max_concurrent=None, max_queue=None, job_retention=None,
+                ollama_hosts=None, keep_alive=None, warm_up=True, structured=None,
+                validate=None, allow_remote_validation=False):
     """Run the Flask web application."""
+    configure_server(max_concurrent, max_queue, job_retention, ollama_hosts, keep_alive,
+                     structured, validate, host, allow_remote_validation)
     print(f"Starting Testcase Generator UI")
     if USE_REACT:
         print(f"   Using React frontend from: {REACT_BUILD_DIR}")
@@ -460,6 +877,13 @@ def run_web_app(host='127.0.0.1', port=5000, debug=False):
         print(f"   Using Flask templates (React build not found)")
     print(f"   URL: http://{host}:{port}")
     print(f"   Model: {client.model}")
+    print(f"   Ollama: {client.host}")
+    print(f"   Concurrency: {scheduler.max_concurrent} running, {scheduler.max_queue} queued")
+    if structured_output:
+        print(f"   Structured output: on")
+    if validator:
+        print(f"   Validation: up to {validator.max_workers} test run(s) at once")
+    prepare_model(warm_up)
     print(f"   Press Ctrl+C to stop")
     app.run(host=host, port=port, debug=debug)
 
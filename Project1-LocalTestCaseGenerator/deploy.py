@@ -35,11 +35,71 @@ def main():
         default=4,
         help='Number of worker threads (default: 4)'
     )
+    parser.add_argument(
+        '--max-concurrent',
+        type=int,
+        default=None,
+        help='Generations sent to Ollama at once (default: 2)'
+    )
+    parser.add_argument(
+        '--max-queue',
+        type=int,
+        default=None,
+        help='Generations allowed to wait before returning 429 (default: 16)'
+    )
+    parser.add_argument(
+        '--ollama-host',
+        default=None,
+        help='Ollama server URL, or comma-separated URLs to spread '
+             'generations over several hosts (default: http://localhost:11434)'
+    )
+    parser.add_argument(
+        '--keep-alive',
+        default=None,
+        help='How long Ollama keeps the model loaded after a request, '
+             'e.g. 30m, 1h or -1 for always (default: 30m)'
+    )
+    parser.add_argument(
+        '--no-warm-up',
+        action='store_true',
+        help='Skip loading the model at startup'
+    )
+    parser.add_argument(
+        '--structured',
+        action='store_true',
+        help='Constrain answers to a JSON schema and re-ask for invalid fields '
+             '(requires Ollama 0.5+)'
+    )
+    parser.add_argument(
+        '--validate',
+        action='store_true',
+        help='Run generated pytest code against the submitted source in a '
+             'subprocess and attach per-test results. This executes whatever '
+             'users paste, unconfined, as this user; it stays off when binding '
+             'a non-loopback address unless --allow-remote-validation is given'
+    )
+    parser.add_argument(
+        '--allow-remote-validation',
+        action='store_true',
+        help='Allow --validate on a server reachable from the network'
+    )
+    parser.add_argument(
+        '--job-retention',
+        type=float,
+        default=None,
+        help='Seconds to keep finished /api/jobs results (default: 3600)'
+    )
     
     args = parser.parse_args()
     
     # Import here to get the client model info
-    from blast_testgen.web_app import client
+    from blast_testgen import web_app
+    web_app.configure_server(
+        args.max_concurrent, args.max_queue, args.job_retention,
+        args.ollama_host, args.keep_alive, args.structured, args.validate,
+        args.host, args.allow_remote_validation
+    )
+    client, scheduler = web_app.client, web_app.scheduler
     
     print("""
 =============================================================
@@ -47,7 +107,9 @@ def main():
 =============================================================
   Server: http://{host}:{port}
   Model: {model}
+  Ollama: {ollama}
   Threads: {threads}
+  Ollama concurrency: {running} running, {queued} queued
 =============================================================
   Press Ctrl+C to stop
 =============================================================
@@ -55,8 +117,12 @@ def main():
         host=args.host,
         port=args.port,
         model=client.model,
-        threads=args.threads
+        ollama=client.host,
+        threads=args.threads,
+        running=scheduler.max_concurrent,
+        queued=scheduler.max_queue
     ))
+    web_app.prepare_model(warm_up=not args.no_warm_up)
     
     try:
         serve(
@@ -65,6 +131,9 @@ def main():
             port=args.port,
             threads=args.threads,
             channel_timeout=300,
+            # Keep reading sockets mid-request so web_app can tell when a
+            # client hangs up and stop its generation
+            channel_request_lookahead=1,
             ident='BLAST-Testcase-Generator/1.0'
         )
     except KeyboardInterrupt:
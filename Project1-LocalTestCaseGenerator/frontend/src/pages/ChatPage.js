@@ -33,8 +33,9 @@ import {
   Security as SecurityIcon,
   Download as DownloadIcon,
   Delete as DeleteIcon,
+  Stop as StopIcon,
 } from '@mui/icons-material';
-import { checkHealth, generateTests } from '../services/api';
+import { checkHealth, createJob, followJob, cancelJob } from '../services/api';
 import TestCaseCard from '../components/TestCaseCard';
 import CodeBlock from '../components/CodeBlock';
 
@@ -65,15 +66,32 @@ const EXAMPLES = [
   },
 ];
 
+// Short summary of a validation run of the generated tests
+const validationLabel = (validation) => {
+  if (validation.status === 'timeout') return 'Test run timed out';
+  if (!validation.compiled) return 'Does not compile';
+  let label = `${validation.passed} passed, ${validation.failed} failed`;
+  if (validation.errors) label += `, ${validation.errors} error${validation.errors === 1 ? '' : 's'}`;
+  return label;
+};
+
+// localStorage key of the job currently running, for resume after reload
+const JOB_STORAGE_KEY = 'blast_testgen_job';
+
 const ChatPage = () => {
   const [input, setInput] = useState('');
   const [messages, setMessages] = useState([]);
   const [loading, setLoading] = useState(false);
+  const [streamingText, setStreamingText] = useState('');
+  const [streamedCases, setStreamedCases] = useState(0);
+  const [queuePosition, setQueuePosition] = useState(0);
   const [status, setStatus] = useState({ connected: false, model: '' });
   const [error, setError] = useState(null);
   const [copied, setCopied] = useState(false);
   const messagesEndRef = useRef(null);
   const inputRef = useRef(null);
+  // Job being followed and the controller that stops following it
+  const jobRef = useRef(null);
 
   // Scroll to bottom
   const scrollToBottom = () => {
@@ -82,7 +100,7 @@ const ChatPage = () => {
 
   useEffect(() => {
     scrollToBottom();
-  }, [messages]);
+  }, [messages, streamingText]);
 
   // Check Ollama status on load
   useEffect(() => {
@@ -98,6 +116,67 @@ const ChatPage = () => {
       });
   }, []);
 
+  // Follow a job to completion and append its result to the chat
+  const runJob = async (jobId) => {
+    setLoading(true);
+    setStreamingText('');
+    setStreamedCases(0);
+    setError(null);
+    const controller = new AbortController();
+    jobRef.current = { id: jobId, controller };
+
+    try {
+      const data = await followJob(jobId, {
+        signal: controller.signal,
+        onQueued: (position) => setQueuePosition(position),
+        onToken: (text) => {
+          setQueuePosition(0);
+          setStreamingText((prev) => prev + text);
+        },
+        onTestCase: () => setStreamedCases((count) => count + 1),
+      });
+      localStorage.removeItem(JOB_STORAGE_KEY);
+
+      // Add bot response
+      setMessages((prev) => [
+        ...prev,
+        {
+          type: 'bot',
+          testCases: data.test_cases || [],
+          pytestCode: data.pytest_code || '',
+          note: data.note || '',
+          model: data.model_used,
+          validation: data.validation || null,
+        },
+      ]);
+    } catch (err) {
+      // Keep the job for a later reload only if it may still finish
+      if (!err.resumable) localStorage.removeItem(JOB_STORAGE_KEY);
+      if (!err.cancelled) setError(err.message || 'Failed to generate test cases');
+    } finally {
+      jobRef.current = null;
+      setLoading(false);
+      setStreamingText('');
+      setStreamedCases(0);
+      setQueuePosition(0);
+    }
+  };
+
+  // Resume the job that was running when the page was last closed
+  useEffect(() => {
+    let saved = null;
+    try {
+      saved = JSON.parse(localStorage.getItem(JOB_STORAGE_KEY));
+    } catch (e) {
+      // Corrupt entry; ignore it
+    }
+    if (!saved || !saved.id) return;
+
+    setMessages((prev) => [...prev, { type: 'user', content: saved.input || '' }]);
+    runJob(saved.id);
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, []);
+
   const handleSend = async () => {
     if (!input.trim() || loading) return;
 
@@ -115,25 +194,28 @@ const ChatPage = () => {
       },
     ]);
 
+    let job;
     try {
-      const data = await generateTests(userMessage);
-
-      // Add bot response
-      setMessages((prev) => [
-        ...prev,
-        {
-          type: 'bot',
-          testCases: data.test_cases || [],
-          pytestCode: data.pytest_code || '',
-          note: data.note || '',
-          model: data.model_used,
-        },
-      ]);
+      job = await createJob(userMessage);
     } catch (err) {
       setError(err.message || 'Failed to generate test cases');
-    } finally {
       setLoading(false);
+      return;
     }
+
+    // Remember the job so a reload can pick up its result
+    localStorage.setItem(JOB_STORAGE_KEY, JSON.stringify({ id: job.id, input: userMessage }));
+    await runJob(job.id);
+  };
+
+  // Stop following the current job and have the server cancel it
+  const stopJob = () => {
+    const job = jobRef.current;
+    if (!job) return;
+    job.controller.abort();
+    cancelJob(job.id).catch(() => {
+      // The server drops the job when it expires either way
+    });
   };
 
   const handleKeyPress = (e) => {
@@ -386,6 +468,16 @@ const ChatPage = () => {
                         >
                           <Typography variant="h6" fontWeight="600">
                             Automation Code (pytest)
+                            {message.validation && (
+                              <Chip
+                                size="small"
+                                label={validationLabel(message.validation)}
+                                color={message.validation.status === 'passed' ? 'success' : 'error'}
+                                variant="outlined"
+                                title={message.validation.error || ''}
+                                sx={{ ml: 1, height: 20, fontSize: '0.65rem' }}
+                              />
+                            )}
                           </Typography>
                           <Button
                             size="small"
@@ -425,9 +517,35 @@ const ChatPage = () => {
           <Paper sx={{ p: 2, display: 'flex', alignItems: 'center', gap: 2 }}>
             <LinearProgress sx={{ flex: 1 }} />
             <Typography variant="caption" color="text.secondary">
-              Generating test cases...
+              {queuePosition
+                ? `Waiting in queue (position ${queuePosition})...`
+                : streamedCases
+                  ? `Receiving tokens... ${streamedCases} test case${streamedCases === 1 ? '' : 's'} ready`
+                  : streamingText
+                    ? 'Receiving tokens...'
+                  : 'Generating test cases...'}
             </Typography>
+            <Button size="small" color="error" startIcon={<StopIcon />} onClick={stopJob}>
+              Stop
+            </Button>
           </Paper>
+          {streamingText && (
+            <Paper sx={{ mt: 1, p: 2, maxHeight: 240, overflow: 'auto' }}>
+              <Typography
+                component="pre"
+                color="text.secondary"
+                sx={{
+                  fontFamily: '"JetBrains Mono", monospace',
+                  fontSize: '0.75rem',
+                  whiteSpace: 'pre-wrap',
+                  wordBreak: 'break-word',
+                  m: 0,
+                }}
+              >
+                {streamingText}
+              </Typography>
+            </Paper>
+          )}
         </Container>
       )}
 
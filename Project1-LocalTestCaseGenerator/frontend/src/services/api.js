@@ -31,4 +31,200 @@ export const generateTests = async (input) => {
   }
 };
 
+const readError = async (response) => {
+  let message = 'Generation failed';
+  try {
+    const data = await response.json();
+    message = data.error || message;
+    if (data.hint) message += ` - ${data.hint}`;
+  } catch (e) {
+    // Non-JSON error body
+  }
+  return new Error(message);
+};
+
+/**
+ * Read a text/event-stream body, calling onEvent(event, data, id) for each
+ * complete event and onData() whenever bytes arrive (including keep-alives).
+ */
+const readEventStream = async (response, onEvent, onData) => {
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    if (onData) onData();
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const block = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+
+      let event = 'message';
+      let id = null;
+      const dataLines = [];
+      block.split('\n').forEach((line) => {
+        if (line.startsWith('event:')) event = line.slice(6).trim();
+        else if (line.startsWith('data:')) dataLines.push(line.slice(5).trim());
+        else if (line.startsWith('id:')) id = parseInt(line.slice(3).trim(), 10);
+      });
+      if (dataLines.length) {
+        onEvent(event, JSON.parse(dataLines.join('\n')), id);
+      }
+    }
+  }
+};
+
+/**
+ * Stream a generation from /api/generate/stream (Server-Sent Events).
+ * Calls onQueued(position) while waiting for a generation slot,
+ * onToken(text) for each partial model output and onTestCase(testCase)
+ * as soon as each manual test case is complete, and resolves with the
+ * final result payload. Uses fetch because axios cannot read a streaming
+ * body in the browser.
+ */
+export const streamTests = async (input, { onToken, onQueued, onTestCase, signal } = {}) => {
+  const response = await fetch(`${API_BASE_URL}/api/generate/stream`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ code: input }),
+    signal,
+  });
+
+  if (!response.ok) {
+    throw await readError(response);
+  }
+
+  let result = null;
+  await readEventStream(response, (event, data) => {
+    if (event === 'queued' && onQueued) {
+      onQueued(data.position);
+    } else if (event === 'token' && onToken) {
+      onToken(data.text);
+    } else if (event === 'test_case' && onTestCase) {
+      onTestCase(data.test_case);
+    } else if (event === 'result') {
+      result = data;
+    }
+  });
+
+  if (!result) {
+    throw new Error('Stream ended without a result');
+  }
+  return result;
+};
+
+/**
+ * Start a background generation job; resolves with the job status
+ * (including its id) as soon as the server has accepted it.
+ */
+export const createJob = async (input) => {
+  try {
+    const response = await api.post('/api/jobs', { code: input });
+    return response.data;
+  } catch (error) {
+    if (error.response) {
+      const { data } = error.response;
+      let message = data.error || 'Generation failed';
+      if (data.hint) message += ` - ${data.hint}`;
+      throw new Error(message);
+    }
+    throw new Error('Network error - please check connection');
+  }
+};
+
+/**
+ * Stop a job; the server cancels its Ollama generation. Resolves with the
+ * job status (still 'running' until the generation has stopped).
+ */
+export const cancelJob = async (jobId) => {
+  const response = await api.post(`/api/jobs/${jobId}/cancel`);
+  return response.data;
+};
+
+// Reconnect to a job's event stream after this long without data
+const JOB_IDLE_TIMEOUT = 120000;
+const JOB_MAX_RECONNECTS = 5;
+const JOB_RECONNECT_DELAY = 2000;
+
+/**
+ * Follow a job's event stream until it produces a result. Takes the same
+ * callbacks as streamTests; if the connection drops or goes quiet it
+ * reconnects and resumes after the last event seen, since the job keeps
+ * running on the server either way. Aborting signal stops following (pair
+ * it with cancelJob to stop the job too); the promise then rejects with an
+ * error whose `cancelled` flag is set, as it does when the job is cancelled.
+ */
+export const followJob = async (jobId, { onToken, onQueued, onTestCase, signal } = {}) => {
+  let lastEventId = null;
+  let reconnects = 0;
+  const stopped = () => {
+    const err = new Error('Generation stopped');
+    err.cancelled = true;
+    return err;
+  };
+
+  while (true) {
+    if (signal && signal.aborted) throw stopped();
+    const controller = new AbortController();
+    const abort = () => controller.abort();
+    if (signal) signal.addEventListener('abort', abort);
+    let timeoutId = setTimeout(() => controller.abort(), JOB_IDLE_TIMEOUT);
+    const resetTimeout = () => {
+      clearTimeout(timeoutId);
+      timeoutId = setTimeout(() => controller.abort(), JOB_IDLE_TIMEOUT);
+    };
+
+    let result = null;
+    let jobError = null;
+    try {
+      const query = lastEventId === null ? '' : `?after=${lastEventId}`;
+      const response = await fetch(`${API_BASE_URL}/api/jobs/${jobId}/events${query}`, {
+        signal: controller.signal,
+      });
+      if (!response.ok) {
+        jobError = await readError(response);
+      } else {
+        await readEventStream(response, (event, data, id) => {
+          if (id !== null) lastEventId = id;
+          reconnects = 0;
+          if (event === 'queued' && onQueued) {
+            onQueued(data.position);
+          } else if (event === 'token' && onToken) {
+            onToken(data.text);
+          } else if (event === 'test_case' && onTestCase) {
+            onTestCase(data.test_case);
+          } else if (event === 'result') {
+            result = data;
+          } else if (event === 'error') {
+            jobError = new Error(data.error || 'Generation failed');
+          } else if (event === 'cancelled') {
+            jobError = stopped();
+          }
+        }, resetTimeout);
+      }
+    } catch (e) {
+      // Network error or idle timeout; reconnect below
+    } finally {
+      clearTimeout(timeoutId);
+      if (signal) signal.removeEventListener('abort', abort);
+    }
+
+    if (jobError) throw jobError;
+    if (result) return result;
+    if (signal && signal.aborted) throw stopped();
+
+    reconnects += 1;
+    if (reconnects > JOB_MAX_RECONNECTS) {
+      const err = new Error('Lost connection to the server - reload the page to resume');
+      err.resumable = true;
+      throw err;
+    }
+    await new Promise((resolve) => setTimeout(resolve, JOB_RECONNECT_DELAY));
+  }
+};
+
 export default api;
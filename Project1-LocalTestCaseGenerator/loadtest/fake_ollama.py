@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Ollama API, for load tests without a model.
+
+Implements /api/tags and /api/generate (streaming and non-streaming, plus
+the empty-prompt warm-up) with configurable latency, token rate, error
+injection and canned responses. Final responses carry the same timing
+counters real Ollama returns.
+
+Usage:
+    python loadtest/fake_ollama.py --port 11435 --latency 0.5 --token-rate 40
+    python run_web.py --ollama-host http://localhost:11435 --no-warm-up
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Answer in the shape COMBINED_TEST_GENERATION_PROMPT asks for
+DEFAULT_RESPONSE = json.dumps({
+    "manual_test_cases": [
+        {"id": "TC_001", "title": "Valid input", "type": "POSITIVE",
+         "steps": ["Call the function with valid arguments"], "expected": "Returns the result"},
+        {"id": "TC_002", "title": "Invalid input", "type": "NEGATIVE",
+         "steps": ["Call the function with None"], "expected": "Raises an error"}
+    ],
+    "pytest_code": "import pytest\n\ndef test_valid():\n    assert True\n\n"
+                   "def test_invalid():\n    with pytest.raises(TypeError):\n        raise TypeError()\n"
+})
+
+# Characters per simulated token when splitting a response into chunks
+CHARS_PER_TOKEN = 4
+
+
+class FakeOllama:
+    """Behaviour and counters shared by every request handler."""
+
+    def __init__(
+        self,
+        models=("llama3.2:latest",),
+        latency: float = 0.2,
+        jitter: float = 0.0,
+        token_rate: float = 50.0,
+        load_time: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 500,
+        stream_error_rate: float = 0.0,
+        responses=None,
+        seed: int = None
+    ):
+        self.models = list(models)
+        self.latency = latency
+        self.jitter = jitter
+        self.token_rate = token_rate
+        self.load_time = load_time
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.stream_error_rate = stream_error_rate
+        self.responses = list(responses or [DEFAULT_RESPONSE])
+        self.random = random.Random(seed)
+
+        self._lock = threading.Lock()
+        self._loaded = load_time <= 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.requests = 0
+        self.errors = 0
+
+    def begin(self) -> None:
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def end(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    def load(self) -> float:
+        """Pay the model load time once; returns seconds spent."""
+        with self._lock:
+            if self._loaded:
+                return 0.0
+            time.sleep(self.load_time)
+            self._loaded = True
+            return self.load_time
+
+    def chance(self, rate: float) -> bool:
+        with self._lock:
+            hit = self.random.random() < rate
+            if hit:
+                self.errors += 1
+            return hit
+
+    def pick_response(self) -> str:
+        with self._lock:
+            return self.random.choice(self.responses)
+
+    def first_token_delay(self) -> float:
+        with self._lock:
+            return max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "in_flight": self.in_flight,
+                "max_in_flight": self.max_in_flight
+            }
+
+
+def _tokens(text: str):
+    return [text[i:i + CHARS_PER_TOKEN] for i in range(0, len(text), CHARS_PER_TOKEN)]
+
+
+def _counters(prompt: str, tokens: int, load: float, prompt_seconds: float,
+              eval_seconds: float) -> dict:
+    """Timing fields in Ollama's units (nanoseconds)."""
+    return {
+        "total_duration": int((load + prompt_seconds + eval_seconds) * 1e9),
+        "load_duration": int(load * 1e9),
+        "prompt_eval_count": max(1, len(prompt) // CHARS_PER_TOKEN),
+        "prompt_eval_duration": int(prompt_seconds * 1e9),
+        "eval_count": tokens,
+        "eval_duration": int(eval_seconds * 1e9)
+    }
+
+
+class FakeOllamaServer(ThreadingHTTPServer):
+    """Threaded server that stays quiet about dropped client connections."""
+
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients dropping idle keep-alive connections is normal under load
+        pass
+
+
+def make_handler(fake: FakeOllama):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send_json(self, data: dict, status: int = 200) -> None:
+            body = json.dumps(data).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _write_chunk(self, data: dict) -> None:
+            line = (json.dumps(data) + "\n").encode()
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+            self.wfile.flush()
+
+        def do_GET(self):
+            if self.path == "/api/tags":
+                self._send_json({"models": [{"name": name} for name in fake.models]})
+            elif self.path == "/stats":
+                self._send_json(fake.stats())
+            else:
+                self._send_json({"error": "not found"}, 404)
+
+        def do_POST(self):
+            if self.path != "/api/generate":
+                self._send_json({"error": "not found"}, 404)
+                return
+            length = int(self.headers.get("Content-Length", 0))
+            try:
+                body = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                self._send_json({"error": "invalid JSON"}, 400)
+                return
+
+            fake.begin()
+            try:
+                self._generate(body)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            finally:
+                fake.end()
+
+        def _generate(self, body: dict) -> None:
+            prompt = body.get("prompt", "")
+            model = body.get("model", fake.models[0])
+            load = fake.load()
+
+            if not prompt:
+                # Warm-up: load the model and return without generating
+                self._send_json({"model": model, "response": "", "done": True,
+                                 **_counters(prompt, 0, load, 0.0, 0.0)})
+                return
+
+            if fake.chance(fake.error_rate):
+                self._send_json({"error": "injected failure"}, fake.error_status)
+                return
+
+            prompt_seconds = fake.first_token_delay()
+            time.sleep(prompt_seconds)
+            tokens = _tokens(fake.pick_response())
+            per_token = 1.0 / fake.token_rate if fake.token_rate > 0 else 0.0
+
+            if not body.get("stream", True):
+                eval_seconds = per_token * len(tokens)
+                time.sleep(eval_seconds)
+                self._send_json({
+                    "model": model,
+                    "response": "".join(tokens),
+                    "done": True,
+                    **_counters(prompt, len(tokens), load, prompt_seconds, eval_seconds)
+                })
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            break_at = (
+                fake.random.randrange(len(tokens)) if fake.chance(fake.stream_error_rate) else None
+            )
+            started = time.monotonic()
+            for index, token in enumerate(tokens):
+                if index == break_at:
+                    # Drop the connection mid-stream
+                    self.close_connection = True
+                    return
+                self._write_chunk({"model": model, "response": token, "done": False})
+                time.sleep(per_token)
+            eval_seconds = time.monotonic() - started
+            self._write_chunk({
+                "model": model,
+                "response": "",
+                "done": True,
+                **_counters(prompt, len(tokens), load, prompt_seconds, eval_seconds)
+            })
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+
+    return Handler
+
+
+def serve(fake: FakeOllama, host: str = "127.0.0.1", port: int = 11435) -> FakeOllamaServer:
+    """Start the fake server on a daemon thread and return it."""
+    server = FakeOllamaServer((host, port), make_handler(fake))
+    threading.Thread(target=server.serve_forever, name="fake-ollama", daemon=True).start()
+    return server
+
+
+def load_responses(path: str):
+    """Canned responses: a JSON list of strings, or one response per file."""
+    text = Path(path).read_text(encoding="utf-8")
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return [text]
+    if isinstance(data, list):
+        return [r if isinstance(r, str) else json.dumps(r) for r in data]
+    return [text]
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Fake-server options, shared with the load driver."""
+    parser.add_argument("--latency", type=float, default=0.2,
+                        help="Seconds before the first token (default: 0.2)")
+    parser.add_argument("--jitter", type=float, default=0.0,
+                        help="Random +/- seconds added to --latency (default: 0)")
+    parser.add_argument("--token-rate", type=float, default=50.0,
+                        help="Tokens per second while decoding (default: 50)")
+    parser.add_argument("--load-time", type=float, default=0.0,
+                        help="Seconds the first request spends loading the model (default: 0)")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Fraction of generations that fail with --error-status (default: 0)")
+    parser.add_argument("--error-status", type=int, default=500,
+                        help="HTTP status for injected failures (default: 500)")
+    parser.add_argument("--stream-error-rate", type=float, default=0.0,
+                        help="Fraction of streams dropped part-way (default: 0)")
+    parser.add_argument("--responses",
+                        help="File of canned responses (JSON list of strings, or one raw response)")
+    parser.add_argument("--model", action="append", dest="models",
+                        help="Model name to advertise in /api/tags (repeatable; default: llama3.2:latest)")
+    parser.add_argument("--error-seed", type=int, default=None,
+                        help="Seed for error injection and response choice")
+
+
+def fake_from_args(args: argparse.Namespace) -> FakeOllama:
+    return FakeOllama(
+        models=args.models or ("llama3.2:latest",),
+        latency=args.latency,
+        jitter=args.jitter,
+        token_rate=args.token_rate,
+        load_time=args.load_time,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        stream_error_rate=args.stream_error_rate,
+        responses=load_responses(args.responses) if args.responses else None,
+        seed=args.error_seed
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Ollama server for load tests")
+    parser.add_argument("--host", default="127.0.0.1", help="Host to bind to (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=11435, help="Port to bind to (default: 11435)")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    fake = fake_from_args(args)
+    server = FakeOllamaServer((args.host, args.port), make_handler(fake))
+    print(f"Fake Ollama on http://{args.host}:{args.port} "
+          f"(latency {args.latency}s, {args.token_rate} tok/s, errors {args.error_rate:.0%})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Replay concurrent chat users against the web app and report capacity.
+
+By default the driver starts a fake Ollama (see fake_ollama.py) and the
+Flask app under waitress in this process, so the numbers reflect the
+app's own queueing and threading. Point --url at a running server
+(e.g. deploy.py against a real model) to measure that instead.
+
+Usage:
+    python loadtest/load_driver.py --users 20 --duration 30 --mode stream
+    python loadtest/load_driver.py --url http://localhost:8080 --users 5 -o load.json
+"""
+
+import argparse
+import json
+import logging
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+
+import requests
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import fake_ollama
+
+# What a chat user types, by routing outcome in web_app
+INPUTS = {
+    "code": [
+        "def add(a, b):\n    return a + b\n",
+        "def divide(a, b):\n    if b == 0:\n        raise ValueError('b is zero')\n    return a / b\n",
+        "class Stack:\n    def __init__(self):\n        self.items = []\n\n"
+        "    def push(self, item):\n        self.items.append(item)\n",
+    ],
+    "feature": [
+        "User should be able to reset the password by email",
+        "Checkout must reject expired credit cards",
+    ],
+    "url": [
+        "https://example.com/login",
+        "example.org",
+    ],
+}
+
+DEFAULT_MIX = "code=0.7,feature=0.2,url=0.1"
+
+
+def parse_mix(text: str) -> dict:
+    """Parse 'code=0.7,feature=0.3' into normalised weights."""
+    weights = {}
+    for part in text.split(","):
+        kind, _, weight = part.partition("=")
+        kind = kind.strip()
+        if kind not in INPUTS:
+            raise ValueError(f"Unknown input kind: {kind}")
+        weights[kind] = float(weight or 1)
+    total = sum(weights.values())
+    if total <= 0:
+        raise ValueError("Input mix weights must add up to more than zero")
+    return {kind: weight / total for kind, weight in weights.items()}
+
+
+def percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile of values (0 when empty)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def _read_events(response):
+    """Yield (event, data) from an SSE response."""
+    event, data = "message", []
+    for line in response.iter_lines(decode_unicode=True):
+        if line is None:
+            continue
+        if not line:
+            if data:
+                yield event, json.loads("\n".join(data))
+            event, data = "message", []
+        elif line.startswith("event:"):
+            event = line[6:].strip()
+        elif line.startswith("data:"):
+            data.append(line[5:].strip())
+
+
+class ChatUser(threading.Thread):
+    """One simulated user sending requests until the deadline."""
+
+    def __init__(self, index: int, args, weights: dict, deadline: float, results: list,
+                 lock: threading.Lock):
+        super().__init__(name=f"user-{index}", daemon=True)
+        self.args = args
+        self.weights = weights
+        self.deadline = deadline
+        self.results = results
+        self.lock = lock
+        self.random = random.Random(f"{args.seed}-{index}")
+        self.session = requests.Session()
+
+    def run(self) -> None:
+        sent = 0
+        while time.monotonic() < self.deadline:
+            if self.args.requests and sent >= self.args.requests:
+                break
+            kind = self.random.choices(list(self.weights), list(self.weights.values()))[0]
+            text = self.random.choice(INPUTS[kind])
+            if kind == "code" and not self.args.cacheable:
+                # A unique statement (comments are compacted away) keeps the
+                # generation cache from answering
+                text = f"{text}\nREQUEST_ID = '{self.name}-{sent}-{self.random.random()}'\n"
+            result = self.send(kind, text)
+            with self.lock:
+                self.results.append(result)
+            sent += 1
+            if self.args.think_time:
+                time.sleep(self.random.uniform(0, 2 * self.args.think_time))
+        self.session.close()
+
+    def send(self, kind: str, text: str) -> dict:
+        result = {"kind": kind, "outcome": "error", "status": None,
+                  "latency": None, "first_token": None}
+        started = time.monotonic()
+        try:
+            payload = getattr(self, f"_send_{self.args.mode}")(text, result, started)
+        except (requests.RequestException, ValueError) as e:
+            result["error"] = str(e)
+            return result
+        result["latency"] = time.monotonic() - started
+        if result["status"] == 429:
+            result["outcome"] = "rejected"
+        elif payload is None or result["status"] not in (200, 202):
+            result["outcome"] = "error"
+        elif "LLM fallback" in payload.get("note", ""):
+            result["outcome"] = "fallback"
+        else:
+            result["outcome"] = "ok"
+        return result
+
+    def _send_generate(self, text: str, result: dict, started: float):
+        response = self.session.post(
+            f"{self.args.url}/api/generate", json={"code": text}, timeout=self.args.timeout
+        )
+        result["status"] = response.status_code
+        return response.json() if response.ok else None
+
+    def _consume(self, response, result: dict, started: float):
+        """Read an SSE stream up to its result event."""
+        for event, data in _read_events(response):
+            if event == "token" and result["first_token"] is None:
+                result["first_token"] = time.monotonic() - started
+            elif event == "result":
+                return data
+            elif event == "error":
+                return None
+        return None
+
+    def _send_stream(self, text: str, result: dict, started: float):
+        with self.session.post(
+            f"{self.args.url}/api/generate/stream", json={"code": text},
+            stream=True, timeout=self.args.timeout
+        ) as response:
+            result["status"] = response.status_code
+            if not response.ok:
+                return None
+            return self._consume(response, result, started)
+
+    def _send_jobs(self, text: str, result: dict, started: float):
+        response = self.session.post(
+            f"{self.args.url}/api/jobs", json={"code": text}, timeout=self.args.timeout
+        )
+        result["status"] = response.status_code
+        if response.status_code != 202:
+            return None
+        job_id = response.json()["id"]
+        with self.session.get(
+            f"{self.args.url}/api/jobs/{job_id}/events", stream=True, timeout=self.args.timeout
+        ) as events:
+            return self._consume(events, result, started)
+
+
+def summarize(results: list, wall_seconds: float) -> dict:
+    """Throughput, latency percentiles and outcome rates."""
+    total = len(results)
+    answered = [r["latency"] for r in results if r["outcome"] in ("ok", "fallback")]
+    first_tokens = [r["first_token"] for r in results if r["first_token"] is not None]
+    outcomes = {}
+    for r in results:
+        outcomes[r["outcome"]] = outcomes.get(r["outcome"], 0) + 1
+
+    def rate(outcome):
+        return round(outcomes.get(outcome, 0) / total, 4) if total else 0.0
+
+    def latency(values):
+        return {
+            "p50": round(percentile(values, 50), 3),
+            "p95": round(percentile(values, 95), 3),
+            "p99": round(percentile(values, 99), 3),
+            "max": round(max(values), 3) if values else 0.0
+        }
+
+    by_kind = {}
+    for kind in sorted({r["kind"] for r in results}):
+        subset = [r for r in results if r["kind"] == kind]
+        by_kind[kind] = {
+            "requests": len(subset),
+            "latency_seconds": latency(
+                [r["latency"] for r in subset if r["outcome"] in ("ok", "fallback")]
+            )
+        }
+
+    return {
+        "requests": total,
+        "wall_seconds": round(wall_seconds, 2),
+        "throughput_rps": round(len(answered) / wall_seconds, 3) if wall_seconds else 0.0,
+        "latency_seconds": latency(answered),
+        "first_token_seconds": latency(first_tokens) if first_tokens else None,
+        "outcomes": outcomes,
+        "error_rate": rate("error"),
+        "fallback_rate": rate("fallback"),
+        "rejected_rate": rate("rejected"),
+        "by_kind": by_kind
+    }
+
+
+def start_stack(args):
+    """Start a fake Ollama and the Flask app in this process; return the app URL."""
+    from waitress.server import create_server
+    from blast_testgen import web_app
+
+    fake = fake_ollama.fake_from_args(args)
+    fake_ollama.serve(fake, port=args.fake_port)
+    web_app.client.cache = None
+    web_app.configure_server(
+        max_concurrent=args.max_concurrent,
+        max_queue=args.max_queue,
+        ollama_hosts=f"http://127.0.0.1:{args.fake_port}"
+    )
+    # Waitress warns on every queued task, which is the point of a load test
+    logging.getLogger("waitress.queue").setLevel(logging.ERROR)
+    server = create_server(web_app.app, host="127.0.0.1", port=args.port, threads=args.threads)
+    threading.Thread(target=server.run, name="waitress", daemon=True).start()
+    return f"http://127.0.0.1:{args.port}", fake
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the Testcase Generator web app")
+    parser.add_argument("--url", help="Target a running server instead of starting one")
+    parser.add_argument("--users", type=int, default=10, help="Concurrent users (default: 10)")
+    parser.add_argument("--duration", type=float, default=30.0,
+                        help="Seconds to keep sending (default: 30)")
+    parser.add_argument("--requests", type=int, default=None,
+                        help="Stop each user after this many requests")
+    parser.add_argument("--mode", choices=("generate", "stream", "jobs"), default="generate",
+                        help="Endpoint to exercise (default: generate)")
+    parser.add_argument("--mix", default=DEFAULT_MIX,
+                        help=f"Input kinds and weights (default: {DEFAULT_MIX})")
+    parser.add_argument("--think-time", type=float, default=0.0,
+                        help="Mean seconds a user pauses between requests (default: 0)")
+    parser.add_argument("--timeout", type=float, default=300.0,
+                        help="Per-request timeout in seconds (default: 300)")
+    parser.add_argument("--cacheable", action="store_true",
+                        help="Repeat identical prompts so the generation cache can answer")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for input selection")
+    parser.add_argument("-o", "--output", help="Write the summary as JSON to this path")
+
+    stack = parser.add_argument_group("in-process stack (without --url)")
+    stack.add_argument("--port", type=int, default=5055, help="App port (default: 5055)")
+    stack.add_argument("--fake-port", type=int, default=11435,
+                       help="Fake Ollama port (default: 11435)")
+    stack.add_argument("--threads", type=int, default=8,
+                       help="Waitress worker threads (default: 8)")
+    stack.add_argument("--max-concurrent", type=int, default=None,
+                       help="Scheduler slots (default: the app's)")
+    stack.add_argument("--max-queue", type=int, default=None,
+                       help="Scheduler queue length (default: the app's)")
+    fake_ollama.add_arguments(stack)
+    args = parser.parse_args()
+
+    try:
+        weights = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+
+    fake = None
+    if args.url:
+        args.url = args.url.rstrip("/")
+    else:
+        args.url, fake = start_stack(args)
+        time.sleep(0.5)
+
+    print(f"Load test: {args.users} user(s), {args.mode} mode, {args.duration}s against {args.url}")
+    results, lock = [], threading.Lock()
+    started = time.monotonic()
+    users = [
+        ChatUser(i, args, weights, started + args.duration, results, lock)
+        for i in range(args.users)
+    ]
+    for user in users:
+        user.start()
+    for user in users:
+        user.join()
+    summary = summarize(results, time.monotonic() - started)
+    summary["config"] = {
+        "url": args.url,
+        "users": args.users,
+        "mode": args.mode,
+        "mix": weights,
+        "duration": args.duration,
+        "think_time": args.think_time
+    }
+    if fake:
+        summary["ollama"] = fake.stats()
+
+    latency = summary["latency_seconds"]
+    print(f"   Requests: {summary['requests']} in {summary['wall_seconds']}s "
+          f"({summary['throughput_rps']} answered/s)")
+    print(f"   Latency: p50 {latency['p50']}s, p95 {latency['p95']}s, p99 {latency['p99']}s")
+    if summary["first_token_seconds"]:
+        first = summary["first_token_seconds"]
+        print(f"   First token: p50 {first['p50']}s, p95 {first['p95']}s")
+    print(f"   Errors: {summary['error_rate']:.1%}, fallbacks: {summary['fallback_rate']:.1%}, "
+          f"rejected (429): {summary['rejected_rate']:.1%}")
+    if fake:
+        print(f"   Ollama: {summary['ollama']['requests']} request(s), "
+              f"max {summary['ollama']['max_in_flight']} in flight")
+    if args.output:
+        Path(args.output).write_text(json.dumps(summary, indent=2) + "\n", encoding="utf-8")
+        print(f"   Report: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
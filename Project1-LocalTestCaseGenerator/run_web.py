@@ -7,6 +7,7 @@ import argparse
 # Add current directory to path
 sys.path.insert(0, '.')
 
+from blast_testgen.ollama_pool import parse_hosts
 from blast_testgen.web_app import run_web_app
 
 
@@ -30,8 +31,70 @@ def main():
         action='store_true',
         help='Enable debug mode'
     )
+    parser.add_argument(
+        '--max-concurrent',
+        type=int,
+        default=None,
+        help='Generations sent to Ollama at once (default: 2)'
+    )
+    parser.add_argument(
+        '--max-queue',
+        type=int,
+        default=None,
+        help='Generations allowed to wait before returning 429 (default: 16)'
+    )
+    parser.add_argument(
+        '--job-retention',
+        type=float,
+        default=None,
+        help='Seconds to keep finished /api/jobs results (default: 3600)'
+    )
+    parser.add_argument(
+        '--ollama-host',
+        default=None,
+        help='Ollama server URL, or comma-separated URLs to spread '
+             'generations over several hosts (one host with --asgi; '
+             'default: http://localhost:11434)'
+    )
+    parser.add_argument(
+        '--keep-alive',
+        default=None,
+        help='How long Ollama keeps the model loaded after a request, '
+             'e.g. 30m, 1h or -1 for always (default: 30m)'
+    )
+    parser.add_argument(
+        '--no-warm-up',
+        action='store_true',
+        help='Skip loading the model at startup'
+    )
+    parser.add_argument(
+        '--structured',
+        action='store_true',
+        help='Constrain answers to a JSON schema and re-ask for invalid fields '
+             '(requires Ollama 0.5+)'
+    )
+    parser.add_argument(
+        '--validate',
+        action='store_true',
+        help='Run generated pytest code against the submitted source in a '
+             'subprocess and attach per-test results. This executes whatever '
+             'users paste, unconfined, as this user; it stays off when binding '
+             'a non-loopback address unless --allow-remote-validation is given'
+    )
+    parser.add_argument(
+        '--allow-remote-validation',
+        action='store_true',
+        help='Allow --validate on a server reachable from the network'
+    )
+    parser.add_argument(
+        '--asgi',
+        action='store_true',
+        help='Serve with the asyncio/ASGI stack (requires httpx and uvicorn)'
+    )
     
     args = parser.parse_args()
+    if args.asgi and len(parse_hosts(args.ollama_host)) > 1:
+        parser.error('--asgi serves a single Ollama host; drop --asgi to pool several')
     
     print("""
 ╔══════════════════════════════════════════════════════════════╗
@@ -41,7 +104,36 @@ def main():
 ╚══════════════════════════════════════════════════════════════╝
     """)
     
-    run_web_app(host=args.host, port=args.port, debug=args.debug)
+    if args.asgi:
+        from blast_testgen.asgi_app import run_asgi_app
+        run_asgi_app(
+            host=args.host,
+            port=args.port,
+            max_concurrent=args.max_concurrent,
+            max_queue=args.max_queue,
+            job_retention=args.job_retention,
+            keep_alive=args.keep_alive,
+            warm_up=not args.no_warm_up,
+            structured=args.structured,
+            validate=args.validate,
+            allow_remote_validation=args.allow_remote_validation,
+            ollama_host=args.ollama_host
+        )
+    else:
+        run_web_app(
+            host=args.host,
+            port=args.port,
+            debug=args.debug,
+            max_concurrent=args.max_concurrent,
+            max_queue=args.max_queue,
+            job_retention=args.job_retention,
+            ollama_hosts=args.ollama_host,
+            keep_alive=args.keep_alive,
+            warm_up=not args.no_warm_up,
+            structured=args.structured,
+            validate=args.validate,
+            allow_remote_validation=args.allow_remote_validation
+        )
 
 
 if __name__ == '__main__':
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Layer 3 Tool: Check Classifier
+Deterministic check of the input classifier against known inputs.
+Usage: python tools/check_classifier.py [--verbose]
+
+InputClassifier's weights are tuned by hand; run this after changing
+them or its patterns. Exits 1 when any input is routed differently.
+"""
+
+import sys
+import argparse
+
+sys.path.insert(0, '.')
+
+from blast_testgen.classifier import InputClassifier, CODE, URL, TEXT
+
+
+# (input, expected kind, expected language for code)
+EXPECTED = [
+    # Python
+    ("def add(a, b):\n    return a + b\n", CODE, "python"),
+    ("class Stack:\n    def __init__(self):\n        self.items = []", CODE, "python"),
+    ("import os\nprint(os.getcwd())", CODE, "python"),
+    ("x = 5\ny = x * 2", CODE, "python"),
+    ("print('hello')", CODE, "python"),
+    ("lambda x: x + 1", CODE, "python"),
+    ("def broken(:\n    return", CODE, None),
+    ("@app.route('/')\ndef index():\n    return 'ok'", CODE, "python"),
+    ("def calcular_total(precios):\n    # Suma los precios\n    return sum(precios)",
+     CODE, "python"),
+    ("def 合計(値):\n    return sum(値)", CODE, "python"),
+    ("np.array([1, 2, 3]).mean()", CODE, None),
+    ("result = requests.get(url).json()", CODE, None),
+    # Other languages
+    ("function add(a, b) {\n  return a + b;\n}", CODE, "javascript"),
+    ("const sum = (a, b) => a + b;\nconsole.log(sum(1, 2));", CODE, "javascript"),
+    ("public class Main {\n    public static void main(String[] args) {\n"
+     "        System.out.println(\"Hi\");\n    }\n}", CODE, "java"),
+    ("#include <stdio.h>\nint main() {\n    printf(\"hi\\n\");\n    return 0;\n}", CODE, "c"),
+    ("package main\n\nfunc add(a int, b int) int {\n\treturn a + b\n}", CODE, "go"),
+    ("SELECT * FROM users WHERE id=1", CODE, "sql"),
+    ("SELECT name, email FROM users WHERE active = 1;", CODE, "sql"),
+    ("SELECT name\nFROM users\nWHERE active = 1\nORDER BY name", CODE, "sql"),
+    ("UPDATE users SET name = 'x' WHERE id = 2", CODE, "sql"),
+    # URLs
+    ("https://example.com/login", URL, None),
+    ("example.org", URL, None),
+    ("www.google.com", URL, None),
+    ("github.com/user/repo", URL, None),
+    ("http://localhost:5000/api", URL, None),
+    ("localhost:5000", URL, None),
+    ("127.0.0.1:8080", URL, None),
+    ("utils.py", TEXT, None),
+    ("1.2.3.4", TEXT, None),
+    # Requirements
+    ("As a user I want to reset my password by email so that I can log in again", TEXT, None),
+    ("Check if the user can log in with valid credentials", TEXT, None),
+    ("Users can import contacts and return to the list", TEXT, None),
+    ("Select the items from the list and update the cart", TEXT, None),
+    ("FROM the start, users must log in", TEXT, None),
+    ("Shopping cart: add items, remove items, apply discount codes", TEXT, None),
+    ("When the user clicks submit, the form (name, email) is validated.", TEXT, None),
+    ("Users => Admin panel => Settings", TEXT, None),
+    ("Requirements:\n- users can sign up\n- users can log in\n- admins can delete users",
+     TEXT, None),
+    ("# Feature: Login\nUsers must be able to log in. If the password is wrong, show an error.",
+     TEXT, None),
+    ("El usuario debe poder iniciar sesión con su correo electrónico y contraseña", TEXT, None),
+    ("用户应该能够使用电子邮件和密码登录系统", TEXT, None),
+    ("Password reset flow", TEXT, None),
+    ("test", TEXT, None),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check input classification')
+    parser.add_argument('--verbose', action='store_true', help='Print every input')
+    args = parser.parse_args()
+
+    classifier = InputClassifier()
+    failures = 0
+    for text, kind, language in EXPECTED:
+        result = classifier.classify(text)
+        ok = result.kind == kind and (language is None or result.language == language)
+        if not ok:
+            failures += 1
+        if args.verbose or not ok:
+            expected = f"{kind}/{language}" if language else kind
+            print(f"{'ok  ' if ok else 'FAIL'} {result!r} expected {expected}: {text[:60]!r}")
+
+    print(f"{len(EXPECTED) - failures}/{len(EXPECTED)} inputs classified as expected")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -14,6 +14,8 @@ sys.path.insert(0, '.')
 from blast_testgen.ollama_client import OllamaClient
 from blast_testgen.prompts import build_test_prompt
 from blast_testgen.code_parser import CodeAnalyzer
+from blast_testgen.cache import GenerationCache
+from blast_testgen.slicer import slice_for_target
 
 
 def main():
@@ -22,6 +24,7 @@ def main():
     parser.add_argument('-o', '--output', help='Output file (default: stdout)')
     parser.add_argument('-f', '--function', help='Target specific function')
     parser.add_argument('--model', default='llama3.2', help='Ollama model')
+    parser.add_argument('--no-cache', action='store_true', help='Bypass the generation cache')
     args = parser.parse_args()
     
     # Read input
@@ -33,14 +36,23 @@ def main():
         sys.exit(1)
     
     # Validate
-    analyzer = CodeAnalyzer()
-    is_valid, error = analyzer.validate_python(code)
-    if not is_valid:
+    try:
+        module = CodeAnalyzer.parse(code)
+    except SyntaxError as error:
         print(json.dumps({"error": f"Invalid Python: {error}"}))
         sys.exit(1)
     
+    keep = None
+    if args.function:
+        sliced = slice_for_target(module, args.function)
+        if sliced is None:
+            print(json.dumps({"error": f"Function '{args.function}' not found"}))
+            sys.exit(1)
+        code, keep = sliced["code"], set(sliced["keep"])
+    
     # Check Ollama
-    client = OllamaClient(model=args.model)
+    cache = None if args.no_cache else GenerationCache()
+    client = OllamaClient(model=args.model, cache=cache)
     if not client.is_available():
         print(json.dumps({
             "error": "Ollama not available",
@@ -50,14 +62,15 @@ def main():
     
     # Generate
     try:
-        prompt = build_test_prompt(code, args.function)
+        prompt = build_test_prompt(code, args.function, keep=keep)
         response = client.generate(prompt, temperature=0.2, num_predict=2048)
         
         result = {
             "success": True,
             "generated_tests": response.get('response', ''),
             "model": args.model,
-            "input_file": args.input
+            "input_file": args.input,
+            "cached": response.get('cached', False)
         }
         
         output = json.dumps(result, indent=2)
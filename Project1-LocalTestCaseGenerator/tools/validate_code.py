@@ -28,16 +28,15 @@ def main():
         sys.exit(1)
     
     # Validate
-    analyzer = CodeAnalyzer()
-    is_valid, error = analyzer.validate_python(code)
-    
-    if not is_valid:
-        print(json.dumps({"valid": False, "error": error}))
+    try:
+        module = CodeAnalyzer.parse(code)
+    except SyntaxError as error:
+        print(json.dumps({"valid": False, "error": str(error)}))
         sys.exit(1)
     
-    # Extract info
-    functions = analyzer.extract_functions(code)
-    classes = analyzer.extract_classes(code)
+    # Extract info (from the same parse)
+    functions = module.functions
+    classes = module.classes
     
     result = {
         "valid": True,